@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 import collections
+import concurrent.futures
 import functools
 import logging
 import random
 import secrets
+import threading
 import warnings
 from argparse import Namespace
 from collections import Counter, deque, defaultdict
@@ -102,6 +104,10 @@ class MultiWorld():
     random: random.Random
     per_slot_randoms: Utils.DeprecateDict[int, random.Random]
     """Deprecated. Please use `self.random` instead."""
+    _location_spheres: Optional[Dict[bool, LocationSpheres]] = None
+    """completed logical spheres by cull_events, only kept after cache_location_spheres"""
+    _location_spheres_lock: threading.Lock
+    """created by cache_location_spheres, so threads generating output compute each kind of spheres only once"""
 
     class AttributeProxy():
         def __init__(self, rule):
@@ -498,6 +504,7 @@ class MultiWorld():
     def push_item(self, location: Location, item: Item, collect: bool = True):
         location.item = item
         item.location = location
+        self.invalidate_location_spheres()
         if collect:
             self.state.collect(item, location.advancement, location)
 
@@ -582,6 +589,31 @@ class MultiWorld():
 
         return False
 
+    def cache_location_spheres(self) -> None:
+        """
+        Keep logical spheres once they are computed, as the placement of items is final from now on.
+        They are dropped again by push_item and Fill.swap_location_item.
+        """
+        self._location_spheres = {}
+        self._location_spheres_lock = threading.Lock()
+
+    def invalidate_location_spheres(self) -> None:
+        if self._location_spheres:
+            self._location_spheres = {}
+
+    def get_location_spheres(self, cull_events: bool = False) -> LocationSpheres:
+        """
+        Returns the completed logical spheres of all filled locations, see LocationSpheres.
+        After cache_location_spheres these are computed only once, shared by all callers.
+        """
+        if self._location_spheres is None:
+            return LocationSpheres(self, cull_events).complete()
+        with self._location_spheres_lock:
+            spheres = self._location_spheres.get(cull_events)
+            if spheres is None:
+                spheres = self._location_spheres[cull_events] = LocationSpheres(self, cull_events).complete()
+            return spheres
+
     def get_spheres(self) -> Iterator[Set[Location]]:
         """
         yields a set of locations for each logical sphere
@@ -590,24 +622,11 @@ class MultiWorld():
         locations is followed by an empty set, and then a set of all of the
         unreachable locations.
         """
-        state = CollectionState(self)
-        locations = set(self.get_filled_locations())
-
-        while locations:
-            sphere: Set[Location] = set()
-
-            for location in locations:
-                if location.can_reach(state):
-                    sphere.add(location)
-            yield sphere
-            if not sphere:
-                if locations:
-                    yield locations  # unreachable locations
-                break
-
-            for location in sphere:
-                state.collect(location.item, True, location)
-            locations -= sphere
+        if self._location_spheres is None:
+            # computed as it is iterated, as callers may modify items between spheres
+            yield from LocationSpheres(self, False).sweep()
+        else:
+            yield from self.get_location_spheres(False).iter_spheres()
 
     def get_sendable_spheres(self) -> Iterator[Set[Location]]:
         """
@@ -616,46 +635,13 @@ class MultiWorld():
         If there are unreachable locations, the last sphere of reachable locations is followed by an empty set,
         and then a set of all of the unreachable locations.
         """
-        state = CollectionState(self)
-        locations: Set[Location] = set()
-        events: Set[Location] = set()
-        for location in self.get_filled_locations():
-            if type(location.item.code) is int and type(location.address) is int:
-                locations.add(location)
-            else:
-                events.add(location)
-
-        while locations:
-            sphere: Set[Location] = set()
-
-            # cull events out
-            done_events: Set[Union[Location, None]] = {None}
-            while done_events:
-                done_events = set()
-                for event in events:
-                    if event.can_reach(state):
-                        state.collect(event.item, True, event)
-                        done_events.add(event)
-                events -= done_events
-
-            for location in locations:
-                if location.can_reach(state):
-                    sphere.add(location)
-
-            yield sphere
-            if not sphere:
-                if locations:
-                    yield locations  # unreachable locations
-                break
-
-            for location in sphere:
-                state.collect(location.item, True, location)
-            locations -= sphere
+        if self._location_spheres is None:
+            yield from LocationSpheres(self, True).sweep()
+        else:
+            yield from self.get_location_spheres(True).iter_spheres()
 
     def fulfills_accessibility(self, state: Optional[CollectionState] = None):
         """Check if accessibility rules are fulfilled with current or supplied state."""
-        if not state:
-            state = CollectionState(self)
         players: Dict[str, Set[int]] = {
             "minimal": set(),
             "items": set(),
@@ -683,8 +669,32 @@ class MultiWorld():
                 return False  # still locations required to be collected
             return True
 
+        def missing() -> bool:
+            """Report locations that could not be reached"""
+            if __debug__:
+                from Fill import FillError
+                raise FillError(
+                    f"Could not access required locations for accessibility check. Missing: {locations}",
+                    multiworld=self,
+                )
+            # ran out of places and did not finish yet, quit
+            logging.warning(f"Could not access required locations for accessibility check."
+                            f" Missing: {locations}")
+            return False
+
         locations = [location for location in self.get_locations() if location_relevant(location)]
 
+        if not state:
+            if not locations:
+                return False
+            # reachability is monotonic, so sweeping everything in the shared spheres gives the same outcome
+            spheres = self.get_location_spheres(True)
+            locations = [location for location in locations if not spheres.can_reach(location)]
+            beatable_fulfilled = self.has_beaten_game(spheres.state)
+            if all_done():
+                return True
+            return missing() if locations else False
+
         while locations:
             sphere: List[Location] = []
             for n in range(len(locations) - 1, -1, -1):
@@ -692,16 +702,7 @@ class MultiWorld():
                     sphere.append(locations.pop(n))
 
             if not sphere:
-                if __debug__:
-                    from Fill import FillError
-                    raise FillError(
-                        f"Could not access required locations for accessibility check. Missing: {locations}",
-                        multiworld=self,
-                    )
-                # ran out of places and did not finish yet, quit
-                logging.warning(f"Could not access required locations for accessibility check."
-                                f" Missing: {locations}")
-                return False
+                return missing()
 
             for location in sphere:
                 if location.item:
@@ -716,11 +717,163 @@ class MultiWorld():
         return False
 
 
+class LocationSpheres:
+    """
+    Logical spheres of the filled locations of a multiworld, swept from a new CollectionState.
+    With cull_events, locations that can't be sent through the multiserver are collected as soon as they are reachable,
+    instead of being part of a sphere.
+    """
+    multiworld: MultiWorld
+    cull_events: bool
+    state: CollectionState
+    """state the spheres are collected into, holding everything reachable once completed"""
+    spheres: List[Set[Location]]
+    unreachable: Set[Location]
+    sphere_index: Dict[Location, int]
+    """index into spheres of each reached location, culled events get the index of the sphere following them"""
+
+    def __init__(self, multiworld: MultiWorld, cull_events: bool) -> None:
+        self.multiworld = multiworld
+        self.cull_events = cull_events
+        self.state = CollectionState(multiworld)
+        self.spheres = []
+        self.unreachable = set()
+        self.sphere_index = {}
+
+    def sweep(self) -> Iterator[Set[Location]]:
+        """Computes the spheres, yielding each one before it is collected, in the format of MultiWorld.get_spheres"""
+        state = self.state
+        locations: Set[Location] = set()
+        events: Set[Location] = set()
+        for location in self.multiworld.get_filled_locations():
+            if not self.cull_events or type(location.item.code) is int and type(location.address) is int:
+                locations.add(location)
+            else:
+                events.add(location)
+
+        def cull() -> None:
+            done_events: Set[Location] = events
+            while done_events:
+                done_events = set()
+                for event in events:
+                    if event.can_reach(state):
+                        state.collect(event.item, True, event)
+                        done_events.add(event)
+                        self.sphere_index[event] = len(self.spheres)
+                events.difference_update(done_events)
+
+        while locations:
+            cull()
+            sphere = {location for location in locations if location.can_reach(state)}
+            yield sphere
+            if not sphere:
+                self.unreachable = locations
+                yield locations  # unreachable locations
+                break
+
+            for location in sphere:
+                state.collect(location.item, True, location)
+                self.sphere_index[location] = len(self.spheres)
+            self.spheres.append(sphere)
+            locations -= sphere
+        cull()
+
+    def complete(self) -> LocationSpheres:
+        for _ in self.sweep():
+            pass
+        return self
+
+    def iter_spheres(self) -> Iterator[Set[Location]]:
+        """yields a copy of each completed sphere in the format of MultiWorld.get_spheres"""
+        for sphere in self.spheres:
+            yield set(sphere)
+        if self.unreachable:
+            yield set()
+            yield set(self.unreachable)
+
+    def can_reach(self, location: Location) -> bool:
+        """Whether the location is reachable once everything reachable was collected, filled or not."""
+        return location in self.sphere_index or location.item is None and location.can_reach(self.state)
+
+
+class ItemCounter(Counter[str]):
+    """
+    Counter of one player's items in a CollectionState, which additionally mirrors the counts of the world's registered
+    items into `counts`, indexed by `World.item_name_to_index`.
+    Lookups by name work like any Counter, precompiled rules can check `counts` without hashing item names.
+    """
+    __slots__ = ("counts", "index")
+    counts: List[int]
+    """count of each registered item, by its index"""
+    index: Mapping[str, int]
+    """item name to index in counts, shared with the world class"""
+
+    def __init__(self, index: Mapping[str, int], iterable: Any = None, /, **kwds: int) -> None:
+        self.index = index
+        self.counts = [0] * len(index)
+        super().__init__(iterable, **kwds)
+
+    def __setitem__(self, key: str, value: int) -> None:
+        dict.__setitem__(self, key, value)
+        index = self.index.get(key)
+        if index is not None:
+            self.counts[index] = value
+
+    def __delitem__(self, key: str) -> None:
+        if key in self:
+            dict.__delitem__(self, key)
+            index = self.index.get(key)
+            if index is not None:
+                self.counts[index] = 0
+
+    def update(self, iterable: Any = None, /, **kwds: int) -> None:
+        super().update(iterable, **kwds)
+        if isinstance(iterable, Mapping):
+            # Counter.update skips __setitem__ when updating an empty Counter from a mapping
+            for key in iterable:
+                index = self.index.get(key)
+                if index is not None:
+                    self.counts[index] = dict.get(self, key, 0)
+
+    def pop(self, key: str, *default: Any) -> Any:
+        value = dict.pop(self, key, *default)
+        index = self.index.get(key)
+        if index is not None:
+            self.counts[index] = 0
+        return value
+
+    def popitem(self) -> Tuple[str, int]:
+        key, value = dict.popitem(self)
+        index = self.index.get(key)
+        if index is not None:
+            self.counts[index] = 0
+        return key, value
+
+    def setdefault(self, key: str, default: int = 0) -> int:
+        if key not in self:
+            self[key] = default
+        return dict.__getitem__(self, key)
+
+    def clear(self) -> None:
+        dict.clear(self)
+        self.counts = [0] * len(self.index)
+
+    def copy(self) -> ItemCounter:
+        new = ItemCounter.__new__(ItemCounter)
+        dict.update(new, self)
+        new.index = self.index
+        new.counts = self.counts.copy()
+        return new
+
+    def __reduce__(self):
+        return self.__class__, (self.index, dict(self))
+
+
 PathValue = Tuple[str, Optional["PathValue"]]
 
 
 class CollectionState():
-    prog_items: Dict[int, Counter[str]]
+    prog_items: Dict[int, ItemCounter]
     multiworld: MultiWorld
     reachable_regions: Dict[int, Set[Region]]
     blocked_connections: Dict[int, Set[Entrance]]
@@ -735,7 +888,8 @@ class CollectionState():
 
     def __init__(self, parent: MultiWorld, allow_partial_entrances: bool = False):
         assert parent.worlds, "CollectionState created without worlds initialized in parent"
-        self.prog_items = {player: Counter() for player in parent.get_all_ids()}
+        self.prog_items = {player: ItemCounter(parent.worlds[player].item_name_to_index)
+                           for player in parent.get_all_ids()}
         self.multiworld = parent
         self.reachable_regions = {player: set() for player in parent.get_all_ids()}
         self.blocked_connections = {player: set() for player in parent.get_all_ids()}
@@ -750,11 +904,15 @@ class CollectionState():
             for item in items:
                 self.collect(item, True)
 
-    def update_reachable_regions(self, player: int):
+    def update_reachable_regions(self, player: int, connections: Optional[Iterable[Entrance]] = None):
+        """
+        :param connections: Only search onwards from these blocked connections, instead of all of them. Only valid if
+        nothing that could make any other blocked connection passable changed since the last update.
+        """
         self.stale[player] = False
         world: AutoWorld.World = self.multiworld.worlds[player]
         reachable_regions = self.reachable_regions[player]
-        queue = deque(self.blocked_connections[player])
+        queue = deque(self.blocked_connections[player] if connections is None else connections)
         start: Region = world.get_region(world.origin_region_name)
 
         # init on first call - this can't be done on construction since the regions don't exist yet
@@ -874,6 +1032,12 @@ class CollectionState():
         """
         all_players = {player for player, _ in advancements_per_player}
         players_to_check = all_players
+        # Unreachable locations of worlds that provide their dependencies wait here, instead of being re-tested in every
+        # iteration that checks their player.
+        waiting_per_player: Dict[int, _SweepWaitingLocations] = {
+            player: _SweepWaitingLocations(self.multiworld.worlds[player]) for player in all_players
+            if self.multiworld.worlds[player].sweep_dependencies
+        }
         # As an optimization, it is assumed that each player's world only logically depends on itself. However, worlds
         # are allowed to logically depend on other worlds, so once there are no more players that should be checked
         # under this assumption, an extra sweep iteration is performed that checks every player, to confirm that the
@@ -888,6 +1052,11 @@ class CollectionState():
                     next_advancements_per_player.append((player, locations))
                     continue
 
+                waiting = waiting_per_player.get(player)
+                if waiting:
+                    # waiting locations do not track dependencies on other worlds, which the confirmation iteration checks
+                    locations = locations + (waiting.wake_all() if checking_if_finished else waiting.wake(self))
+
                 # Accessibility of each location is checked first because a player's region accessibility cache becomes
                 # stale whenever one of their own items is collected into the state.
                 reachable_locations: List[Location] = []
@@ -898,9 +1067,9 @@ class CollectionState():
                         # because they won't stale `player`'s region accessibility cache, but, for simplicity, all the
                         # items at reachable locations are collected in a single loop.
                         reachable_locations.append(location)
-                    else:
+                    elif not waiting or not waiting.wait(self, location):
                         unreachable_locations.append(location)
-                if unreachable_locations:
+                if unreachable_locations or (waiting and waiting.locations):
                     next_advancements_per_player.append((player, unreachable_locations))
 
                 # A previous player's locations processed in the current `while players_to_check` iteration could have
@@ -919,6 +1088,9 @@ class CollectionState():
                     self.advancements.add(advancement)
                     item = advancement.item
                     assert isinstance(item, Item), "tried to collect advancement Location with no Item"
+                    waiting = waiting_per_player.get(item.player)
+                    if waiting:
+                        waiting.collecting(self, item)
                     if self.collect(item, True, advancement):
                         # The player the item belongs to may be able to reach additional locations in the next sweep
                         # iteration.
@@ -1077,9 +1249,13 @@ class CollectionState():
     # item name group related
     def has_group(self, item_name_group: str, player: int, count: int = 1) -> bool:
         """Returns True if the state contains at least `count` items present in a specified item group."""
+        world = self.multiworld.worlds[player]
+        group_indices = world.item_name_group_indices.get(item_name_group)
+        if group_indices is not None:
+            return self.has_from_indices(group_indices, player, count)
         found: int = 0
         player_prog_items = self.prog_items[player]
-        for item_name in self.multiworld.worlds[player].item_name_groups[item_name_group]:
+        for item_name in world.item_name_groups[item_name_group]:
             found += player_prog_items[item_name]
             if found >= count:
                 return True
@@ -1089,9 +1265,13 @@ class CollectionState():
         """Returns True if the state contains at least `count` items present in a specified item group.
         Ignores duplicates of the same item.
         """
+        world = self.multiworld.worlds[player]
+        group_indices = world.item_name_group_indices.get(item_name_group)
+        if group_indices is not None:
+            return self.has_from_indices_unique(group_indices, player, count)
         found: int = 0
         player_prog_items = self.prog_items[player]
-        for item_name in self.multiworld.worlds[player].item_name_groups[item_name_group]:
+        for item_name in world.item_name_groups[item_name_group]:
             found += player_prog_items[item_name] > 0
             if found >= count:
                 return True
@@ -1099,21 +1279,69 @@ class CollectionState():
 
     def count_group(self, item_name_group: str, player: int) -> int:
         """Returns the cumulative count of items from an item group present in state."""
+        world = self.multiworld.worlds[player]
+        group_indices = world.item_name_group_indices.get(item_name_group)
+        if group_indices is not None:
+            counts = self.prog_items[player].counts
+            return sum([counts[index] for index in group_indices])
         player_prog_items = self.prog_items[player]
         return sum(
             player_prog_items[item_name]
-            for item_name in self.multiworld.worlds[player].item_name_groups[item_name_group]
+            for item_name in world.item_name_groups[item_name_group]
         )
 
     def count_group_unique(self, item_name_group: str, player: int) -> int:
         """Returns the cumulative count of items from an item group present in state.
         Ignores duplicates of the same item."""
+        world = self.multiworld.worlds[player]
+        group_indices = world.item_name_group_indices.get(item_name_group)
+        if group_indices is not None:
+            counts = self.prog_items[player].counts
+            return sum([counts[index] > 0 for index in group_indices])
         player_prog_items = self.prog_items[player]
         return sum(
             player_prog_items[item_name] > 0
-            for item_name in self.multiworld.worlds[player].item_name_groups[item_name_group]
+            for item_name in world.item_name_groups[item_name_group]
         )
 
+    # Precompiled variants of the above, taking indices from World.item_name_to_index instead of item names
+    def has_all_indices(self, indices: Iterable[int], player: int) -> bool:
+        """Returns True if each item index is present in state."""
+        counts = self.prog_items[player].counts
+        for index in indices:
+            if not counts[index]:
+                return False
+        return True
+
+    def has_any_indices(self, indices: Iterable[int], player: int) -> bool:
+        """Returns True if at least one item index is present in state."""
+        counts = self.prog_items[player].counts
+        for index in indices:
+            if counts[index]:
+                return True
+        return False
+
+    def has_from_indices(self, indices: Iterable[int], player: int, count: int) -> bool:
+        """Returns True if the state contains at least `count` items matching any of the item indices."""
+        found: int = 0
+        counts = self.prog_items[player].counts
+        for index in indices:
+            found += counts[index]
+            if found >= count:
+                return True
+        return False
+
+    def has_from_indices_unique(self, indices: Iterable[int], player: int, count: int) -> bool:
+        """Returns True if the state contains at least `count` items matching any of the item indices.
+        Ignores duplicates of the same item."""
+        found: int = 0
+        counts = self.prog_items[player].counts
+        for index in indices:
+            found += counts[index] > 0
+            if found >= count:
+                return True
+        return False
+
     # Item related
     def collect(self, item: Item, prevent_sweep: bool = False, location: Optional[Location] = None) -> bool:
         if location:
@@ -1175,6 +1403,88 @@ class CollectionState():
             self.prog_items[player][item] = count
 
 
+class _SweepWaitingLocations:
+    """
+    Unreachable advancement locations of a single player during a sweep, which are only re-tested once an item or region
+    their reachability depends on according to `World.get_sweep_dependencies` was collected or reached.
+    """
+    __slots__ = ("world", "locations", "item_locations", "region_locations", "collected_items")
+
+    world: AutoWorld.World
+    locations: Set[Location]
+    """The waiting locations, which can also be in multiple lists of item_locations and region_locations"""
+    item_locations: Dict[str, List[Location]]
+    region_locations: Dict[Region, List[Location]]
+    collected_items: Set[str]
+    """Names of the items collected for the player since the locations were last woken, and the names they count as"""
+
+    def __init__(self, world: AutoWorld.World) -> None:
+        self.world = world
+        self.locations = set()
+        self.item_locations = defaultdict(list)
+        self.region_locations = defaultdict(list)
+        self.collected_items = set()
+
+    def collecting(self, state: CollectionState, item: Item) -> None:
+        """Records the names collecting the item of this player changes, to be called before it is collected."""
+        self.collected_items.add(item.name)
+        # the name counted in prog_items, which differs from the item name for progressive items for example
+        name = self.world.collect_item(state, item)
+        if name:
+            self.collected_items.add(name)
+
+    def wait(self, state: CollectionState, location: Location) -> bool:
+        """Returns True if the unreachable location waits for its dependencies, False if it has to be re-tested."""
+        parent_region = location.parent_region
+        if type(location).can_reach is not Location.can_reach or type(parent_region).can_reach is not Region.can_reach:
+            return False
+        dependencies = self.world.get_sweep_dependencies(location)
+        if dependencies is None:
+            return False
+        if not parent_region.can_reach(state):
+            self.region_locations[parent_region].append(location)
+        else:
+            item_names, region_names = dependencies
+            for item_name in item_names:
+                self.item_locations[item_name].append(location)
+            for region_name in region_names:
+                region = self.world.get_region(region_name)
+                if not region.can_reach(state):
+                    self.region_locations[region].append(location)
+        self.locations.add(location)
+        return True
+
+    def wake(self, state: CollectionState) -> List[Location]:
+        """Returns the waiting locations that depend on newly collected items or newly reached regions."""
+        woken: List[Location] = []
+        locations = self.locations
+        if not locations:
+            self.collected_items.clear()
+            return woken
+        for item_name in self.collected_items:
+            for location in self.item_locations.pop(item_name, ()):
+                if location in locations:
+                    locations.remove(location)
+                    woken.append(location)
+        self.collected_items.clear()
+        reached_regions = [region for region in self.region_locations if region.can_reach(state)]
+        for region in reached_regions:
+            for location in self.region_locations.pop(region):
+                if location in locations:
+                    locations.remove(location)
+                    woken.append(location)
+        return woken
+
+    def wake_all(self) -> List[Location]:
+        """Returns all waiting locations."""
+        woken = list(self.locations)
+        self.locations.clear()
+        self.item_locations.clear()
+        self.region_locations.clear()
+        self.collected_items.clear()
+        return woken
+
+
 CollectionRule = Callable[[CollectionState], bool]
 DEFAULT_COLLECTION_RULE: CollectionRule = staticmethod(lambda state: True)
 
@@ -1675,6 +1985,26 @@ class EntranceInfo(TypedDict, total=False):
     direction: str
 
 
+_playthrough_checks: Optional[Tuple[MultiWorld, List[Optional[CollectionState]], List[Location]]] = None
+"""multiworld, state per sphere and progress locations of a playthrough being created, inherited by forked workers"""
+
+
+def _find_removable(num: int, removed: List[int], candidates: List[int]) -> List[bool]:
+    """
+    Checks in a playthrough worker if the game can be beaten from the state of sphere num
+    without each one of the candidate locations and the removed locations.
+    """
+    assert _playthrough_checks, "playthrough worker was not forked from a process creating a playthrough"
+    multiworld, state_cache, locations = _playthrough_checks
+    required_locations = set(locations).difference([locations[index] for index in removed])
+    removable: List[bool] = []
+    for index in candidates:
+        required_locations.remove(locations[index])
+        removable.append(multiworld.can_beat_game(state_cache[num], required_locations))
+        required_locations.add(locations[index])
+    return removable
+
+
 class Spoiler:
     multiworld: MultiWorld
     hashes: Dict[int, str]
@@ -1699,8 +2029,14 @@ class Spoiler:
             self.entrances[(entrance, direction, player)] = \
                 {"player": player, "entrance": entrance, "exit": exit_, "direction": direction}
 
-    def create_playthrough(self, create_paths: bool = True) -> None:
-        """Destructive to the multiworld while it is run, damage gets repaired afterwards."""
+    def create_playthrough(self, create_paths: bool = True, workers: int = 0) -> None:
+        """
+        Destructive to the multiworld while it is run, damage gets repaired afterwards.
+
+        :param create_paths: Also find the paths to each location of the playthrough.
+        :param workers: Amount of forked processes that check which locations are required, 0 to check them here.
+        """
+        global _playthrough_checks
         from itertools import chain
         # get locations containing progress items
         multiworld = self.multiworld
@@ -1709,13 +2045,15 @@ class Spoiler:
         collection_spheres: List[Set[Location]] = []
         state = CollectionState(multiworld)
         sphere_candidates = set(prog_locations)
+        # non-progress items don't change reachability, so the logical spheres hold the progress spheres
+        logical_spheres = iter(multiworld.get_location_spheres().spheres)
         logging.debug('Building up collection spheres.')
         while sphere_candidates:
 
             # build up spheres of collection radius.
             # Everything in each sphere is independent from each other in dependencies and only depends on lower spheres
 
-            sphere = {location for location in sphere_candidates if state.can_reach(location)}
+            sphere = sphere_candidates.intersection(next(logical_spheres, ()))
 
             for location in sphere:
                 state.collect(location.item, True, location)
@@ -1742,21 +2080,27 @@ class Spoiler:
         # in the second phase, we cull each sphere such that the game is still beatable,
         # reducing each range of influence to the bare minimum required inside it
         required_locations = {location for sphere in collection_spheres for location in sphere}
-        for num, sphere in reversed(tuple(enumerate(collection_spheres))):
-            to_delete: Set[Location] = set()
-            for location in sphere:
-                # we remove the location from required_locations to sweep from, and check if the game is still beatable
-                logging.debug('Checking if %s (Player %d) is required to beat the game.', location.item.name,
-                              location.item.player)
-                required_locations.remove(location)
-                if multiworld.can_beat_game(state_cache[num], required_locations):
-                    to_delete.add(location)
-                else:
-                    # still required, got to keep it around
-                    required_locations.add(location)
-
-            # cull entries in spheres for spoiler walkthrough at end
-            sphere -= to_delete
+        pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+        if workers > 0:
+            import multiprocessing
+            if "fork" not in multiprocessing.get_all_start_methods() or multiprocessing.current_process().daemon:
+                logging.info("Processes can't be forked here, checking required playthrough locations serially.")
+            else:
+                # workers are forked on first use, inheriting the states of the spheres
+                _playthrough_checks = multiworld, state_cache, sorted(required_locations)
+                pool = concurrent.futures.ProcessPoolExecutor(workers, multiprocessing.get_context("fork"))
+        try:
+            for num, sphere in reversed(tuple(enumerate(collection_spheres))):
+                candidates = list(sphere)
+                grouped = bool(pool) and len(candidates) > 1
+                if grouped:
+                    candidates = self.find_removable(pool, workers, num, candidates, required_locations)
+                # cull entries in spheres for spoiler walkthrough at end
+                sphere -= self.find_unrequired(state_cache[num], candidates, required_locations, grouped)
+        finally:
+            if pool:
+                pool.shutdown()
+                _playthrough_checks = None
 
         # second phase, sphere 0
         removed_precollected: List[Item] = []
@@ -1815,6 +2159,62 @@ class Spoiler:
         for item in removed_precollected:
             multiworld.push_precollected(item)
 
+    @staticmethod
+    def find_removable(pool: concurrent.futures.ProcessPoolExecutor, workers: int, num: int,
+                       candidates: List[Location], required_locations: Set[Location]) -> List[Location]:
+        """
+        Returns the candidates of sphere num that the game can be beaten without, each one checked on its own in
+        the pool. As fewer required locations can't make the game beatable, the others are required either way.
+        """
+        from itertools import chain, repeat
+        assert _playthrough_checks
+        locations = _playthrough_checks[2]
+        index = {location: n for n, location in enumerate(locations)}
+        removed = [n for n, location in enumerate(locations) if location not in required_locations]
+        chunk_size = -(-len(candidates) // (workers * 4))
+        chunks = [[index[location] for location in candidates[start:start + chunk_size]]
+                  for start in range(0, len(candidates), chunk_size)]
+        removable = chain.from_iterable(pool.map(_find_removable, repeat(num), repeat(removed), chunks))
+        return [location for location, can_remove in zip(candidates, removable) if can_remove]
+
+    def find_unrequired(self, state: Optional[CollectionState], candidates: List[Location],
+                        required_locations: Set[Location], grouped: bool = False) -> Set[Location]:
+        """
+        Returns the candidates that are not required to beat the game from state, removing them from
+        required_locations, the same as removing and checking one candidate at a time in order.
+
+        :param grouped: Candidates are likely removable, as each one was found removable on its own.
+            As the game stays beatable with any subset of removable candidates removed, they are checked in groups
+            that double in size while all of them are removable, and a group that is not is split up.
+        """
+        unrequired: Set[Location] = set()
+        size = 1
+        start = 0
+        while start < len(candidates):
+            group = candidates[start:start + size]
+            removed = self.remove_unrequired(state, group, required_locations)
+            unrequired |= removed
+            start += len(group)
+            size = size * 2 if grouped and len(removed) == len(group) else 1
+        return unrequired
+
+    def remove_unrequired(self, state: Optional[CollectionState], candidates: List[Location],
+                          required_locations: Set[Location]) -> Set[Location]:
+        """Bisects candidates, see find_unrequired."""
+        logging.debug('Checking if any of %s are required to beat the game.', [
+            '%s (Player %d)' % (location.item.name, location.item.player) for location in candidates])
+        # we remove the locations from required_locations to sweep from, and check if the game is still beatable
+        required_locations.difference_update(candidates)
+        if self.multiworld.can_beat_game(state, required_locations):
+            return set(candidates)
+        # still required, got to keep them around
+        required_locations.update(candidates)
+        if len(candidates) == 1:
+            return set()
+        middle = len(candidates) // 2
+        unrequired = self.remove_unrequired(state, candidates[:middle], required_locations)
+        return unrequired | self.remove_unrequired(state, candidates[middle:], required_locations)
+
     def create_paths(self, state: CollectionState, collection_spheres: List[Set[Location]]) -> None:
         from itertools import zip_longest
         multiworld = self.multiworld
@@ -4,6 +4,7 @@ import collections
 import copy
 import logging
 import asyncio
+import os
 import urllib.parse
 import sys
 import typing
@@ -20,13 +21,15 @@ import Utils
 
 if __name__ == "__main__":
     Utils.init_logging("TextClient", exception_logger="Client")
+    # only import the worlds of the games that are connected to, see worlds.lazy_loading
+    os.environ.setdefault("ARCHIPELAGO_LAZY_WORLDS", "1")
 
 from MultiServer import CommandProcessor, mark_raw
-from NetUtils import (Endpoint, decode, NetworkItem, encode, JSONtoTextParser, ClientStatus, Permission, NetworkSlot,
-                      RawJSONtoTextParser, add_json_text, add_json_location, add_json_item, JSONTypes, HintStatus, SlotType)
+from NetUtils import (Endpoint, NetworkItem, JSONtoTextParser, ClientStatus, Permission, NetworkSlot,
+                      RawJSONtoTextParser, add_json_text, add_json_location, add_json_item, JSONTypes, HintStatus, SlotType,
+                      decode_message, wire_encoders, MappedNameToId)
 from Utils import gui_enabled, Version, stream_input, async_start
-from worlds import network_data_package, AutoWorldRegister
-import os
+from worlds import network_data_package, AutoWorldRegister, get_mapped_data_package
 import ssl
 
 if typing.TYPE_CHECKING:
@@ -234,6 +237,7 @@ class CommonContext:
     game: typing.Optional[str] = None
     items_handling: typing.Optional[int] = None
     want_slot_data: bool = True  # should slot_data be retrieved via Connect
+    wire_encoding: str = "msgpack"  # encoding requested via Connect, the server may fall back to "json"
 
     class NameLookupDict:
         """A specialized dict, with helper methods, for id -> name item/location data package lookups by game."""
@@ -282,10 +286,16 @@ class CommonContext:
 
             return self.lookup_in_game(code, self.ctx.slot_info[slot].game)
 
-        def update_game(self, game: str, name_to_id_lookup_table: typing.Dict[str, int]) -> None:
+        def update_game(self, game: str, name_to_id_lookup_table: typing.Mapping[str, int]) -> None:
             """Overrides existing lookup tables for a particular game."""
-            id_to_name_lookup_table = Utils.KeyedDefaultDict(self._unknown_item)
-            id_to_name_lookup_table.update({code: name for name, code in name_to_id_lookup_table.items()})
+            id_to_name_lookup_table: typing.Mapping[int, str]
+            if isinstance(name_to_id_lookup_table, MappedNameToId):
+                # look names up in the shared mapped file instead of copying them
+                id_to_name_lookup_table = collections.ChainMap(name_to_id_lookup_table.inverse,
+                                                               Utils.KeyedDefaultDict(self._unknown_item))
+            else:
+                id_to_name_lookup_table = Utils.KeyedDefaultDict(self._unknown_item)
+                id_to_name_lookup_table.update({code: name for name, code in name_to_id_lookup_table.items()})
             self._game_store[game] = collections.ChainMap(self._archipelago_lookup, id_to_name_lookup_table)
             if game == "Archipelago":
                 # Keep track of the Archipelago data package separately so if it gets updated in a custom datapackage,
@@ -427,7 +437,7 @@ class CommonContext:
         self.rawjsontotextparser = RawJSONtoTextParser(self)
         if self.game:
             self.checksums[self.game] = network_data_package["games"][self.game]["checksum"]
-        self.update_data_package(network_data_package)
+        self.update_data_package({"games": self.get_local_games_package()})
 
         # execution
         self.keep_alive_task = asyncio.create_task(keep_alive(self), name="Bouncy")
@@ -486,7 +496,7 @@ class CommonContext:
         """ `msgs` JSON serializable """
         if not self.server or not self.server.socket.open or self.server.socket.closed:
             return
-        await self.server.socket.send(encode(msgs))
+        await self.server.socket.send(wire_encoders[self.server.encoding](msgs))
 
     def consume_players_package(self, package: typing.List[tuple]):
         self.player_names = {slot: name for team, slot, name, orig_name in package if self.team == team}
@@ -521,6 +531,7 @@ class CommonContext:
             'password': self.password, 'name': self.auth, 'version': Utils.version_tuple,
             'tags': self.tags, 'items_handling': self.items_handling,
             'uuid': Utils.get_unique_identifier(), 'game': self.game, "slot_data": self.want_slot_data,
+            "encoding": self.wire_encoding,
         }
         if kwargs:
             payload.update(kwargs)
@@ -663,7 +674,7 @@ class CommonContext:
             if remote_checksum != cached_checksum:
                 local_checksum: typing.Optional[str] = network_data_package["games"].get(game, {}).get("checksum")
                 if remote_checksum == local_checksum:
-                    self.update_game(network_data_package["games"][game], game)
+                    self.update_game(self.get_local_games_package()[game], game)
                 else:
                     cached_game = Utils.load_data_package_for_checksum(game, remote_checksum)
                     cache_checksum: typing.Optional[str] = cached_game.get("checksum")
@@ -675,7 +686,16 @@ class CommonContext:
         if needed_updates:
             await self.send_msgs([{"cmd": "GetDataPackage", "games": [game_name]} for game_name in needed_updates])
 
-    def update_game(self, game_package: dict, game: str):
+    @staticmethod
+    def get_local_games_package() -> typing.Mapping[str, typing.Mapping[str, typing.Any]]:
+        """Returns the games of the installed worlds, memory mapped if possible, so clients share their lookups."""
+        try:
+            return get_mapped_data_package()
+        except OSError as e:
+            logger.debug(f"Could not map data package: {e}")
+            return network_data_package["games"]
+
+    def update_game(self, game_package: typing.Mapping[str, typing.Any], game: str):
         self.item_names.update_game(game, game_package["item_name_to_id"])
         self.location_names.update_game(game, game_package["location_name_to_id"])
         self.checksums[game] = game_package.get("checksum")
@@ -880,7 +900,7 @@ async def server_loop(ctx: CommonContext, address: typing.Optional[str] = None)
         ctx.current_reconnect_delay = ctx.starting_reconnect_delay
         ctx.disconnected_intentionally = False
         async for data in ctx.server.socket:
-            for msg in decode(data):
+            for msg in decode_message(data):
                 await process_server_cmd(ctx, msg)
         logger.warning(f"Disconnected from multiworld server{reconnect_hint()}")
     except websockets.InvalidMessage:
@@ -1002,6 +1022,8 @@ async def process_server_cmd(ctx: CommonContext, args: dict):
 
     elif cmd == 'Connected':
         ctx.username = ctx.auth
+        if args.get("encoding") in wire_encoders:
+            ctx.server.encoding = args["encoding"]
         ctx.team = args["team"]
         ctx.slot = args["slot"]
         # int keys get lost in JSON transfer
@@ -33,6 +33,53 @@ def sweep_from_pool(base_state: CollectionState, itempool: typing.Sequence[Item]
     return new_state
 
 
+class _ExplorationCheckpoint:
+    """
+    Swept state of `fill_restrictive` that has collected the items placed last from the item pool, so each maximum
+    exploration state can be swept starting from a copy of it, instead of collecting and sweeping the whole pool from the
+    base state again.
+    Assuming logic is monotonic, the checkpoint stays a subset of every later maximum exploration state until one of its
+    items leaves the item pool, or a location it collected an item from gets a different item through a swap.
+    """
+    base_state: CollectionState
+    state: typing.Optional[CollectionState]
+    item_ids: typing.Set[int]
+    """ids of the items collected into `state`, as items compare equal by name and player"""
+
+    def __init__(self, base_state: CollectionState) -> None:
+        self.base_state = base_state
+        self.state = None
+        self.item_ids = set()
+
+    def discard_items(self, items: typing.Iterable[Item]) -> None:
+        if self.state and any(id(item) in self.item_ids for item in items):
+            self.state = None
+
+    def discard_location(self, location: Location) -> None:
+        if self.state and location in self.state.advancements:
+            self.state = None
+
+    def sweep(self, reachable_items: typing.Dict[int, typing.Deque[Item]], extra_items: typing.Sequence[Item],
+              locations: typing.Optional[typing.List[Location]]) -> CollectionState:
+        """
+        Returns a state that has collected every item in `reachable_items` and `extra_items` and swept `locations`.
+
+        :param reachable_items: Items still to be placed, per player, in reverse placement order.
+        :param extra_items: Items to collect that are not part of the checkpoint, like unplaced items.
+        :param locations: Locations to sweep, defaulting to all locations in the multiworld.
+        """
+        if not self.state:
+            # Items are placed from the end of each player's deque, so the first half of each stays in the pool longest.
+            checkpoint_items = [item for items in reachable_items.values()
+                                for item in itertools.islice(items, len(items) // 2)]
+            self.state = sweep_from_pool(self.base_state, checkpoint_items, locations)
+            self.item_ids = {id(item) for item in checkpoint_items}
+        item_ids = self.item_ids
+        new_items = [item for items in reachable_items.values() for item in items if id(item) not in item_ids]
+        new_items.extend(extra_items)
+        return sweep_from_pool(self.state, new_items, locations)
+
+
 def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locations: typing.List[Location],
                      item_pool: typing.List[Item], single_player_placement: bool = False, lock: bool = False,
                      swap: bool = True, on_place: typing.Optional[typing.Callable[[Location], None]] = None,
@@ -58,6 +105,7 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
     reachable_items: typing.Dict[int, typing.Deque[Item]] = {}
     for item in item_pool:
         reachable_items.setdefault(item.player, deque()).append(item)
+    exploration_checkpoint = _ExplorationCheckpoint(base_state)
 
     # for progress logging
     total = min(len(item_pool), len(locations))
@@ -82,8 +130,9 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
                     del item_pool[-p]
                     break
 
-        maximum_exploration_state = sweep_from_pool(
-            base_state, item_pool + unplaced_items, multiworld.get_filled_locations(item.player)
+        exploration_checkpoint.discard_items(items_to_place)
+        maximum_exploration_state = exploration_checkpoint.sweep(
+            reachable_items, unplaced_items, multiworld.get_filled_locations(item.player)
             if single_player_placement else None)
 
         has_beaten_game = multiworld.has_beaten_game(maximum_exploration_state)
@@ -173,6 +222,7 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
                             # Add this item to the existing placement, and
                             # add the old item to the back of the queue
                             spot_to_fill = placements.pop(i)
+                            exploration_checkpoint.discard_location(spot_to_fill)
 
                             swap_count += 1
                             swapped_items[placed_item.player, placed_item.name, unsafe] = swap_count
@@ -932,6 +982,7 @@ def swap_location_item(location_1: Location, location_2: Location, check_locked:
     location_2.item, location_1.item = location_1.item, location_2.item
     location_1.item.location = location_1
     location_2.item.location = location_2
+    location_1.parent_region.multiworld.invalidate_location_spheres()
 
 
 def parse_planned_blocks(multiworld: MultiWorld) -> dict[int, list[PlandoItemBlock]]:
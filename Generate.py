@@ -82,6 +82,10 @@ def main(args=None) -> tuple[argparse.Namespace, int]:
     if __name__ == "__main__" and "worlds" in sys.modules:
         raise Exception("Worlds system should not be loaded before logging init.")
 
+    if __name__ == "__main__":
+        # only import the worlds of the games being generated, see worlds.lazy_loading
+        os.environ.setdefault("ARCHIPELAGO_LAZY_WORLDS", "1")
+
     if not args:
         args = mystery_argparse()
 
@@ -123,26 +127,33 @@ def main(args=None) -> tuple[argparse.Namespace, int]:
     player_id: int = 1
     player_files: dict[int, str] = {}
     player_errors: list[str] = []
+    player_paths: dict[str, str] = {}
     for file in os.scandir(args.player_files_path):
         fname = file.name
         if file.is_file() and not fname.startswith(".") and not fname.lower().endswith(".ini") and \
                 os.path.join(args.player_files_path, fname) not in {args.meta_file_path, args.weights_file_path}:
-            path = os.path.join(args.player_files_path, fname)
-            try:
-                weights_for_file = []
-                for doc_idx, yaml in enumerate(read_weights_yamls(path)):
-                    if yaml is None:
-                        logging.warning(f"Ignoring empty yaml document #{doc_idx + 1} in {fname}")
-                    else:
-                        weights_for_file.append(yaml)
-                weights_cache[fname] = tuple(weights_for_file)
+            player_paths[fname] = os.path.join(args.player_files_path, fname)
 
-            except Exception as e:
-                logging.exception(f"Exception reading weights in file {fname}")
-                player_errors.append(
-                    f"{len(player_errors) + 1}. "
-                    f"File {fname} is invalid. Please fix your yaml.\n{Utils.get_all_causes(e)}"
-                )
+    player_weights = read_player_weights(list(player_paths.values()))
+    for fname, path in player_paths.items():
+        try:
+            yamls = player_weights[path]
+            if isinstance(yamls, Exception):
+                raise yamls
+            weights_for_file = []
+            for doc_idx, yaml in enumerate(yamls):
+                if yaml is None:
+                    logging.warning(f"Ignoring empty yaml document #{doc_idx + 1} in {fname}")
+                else:
+                    weights_for_file.append(yaml)
+            weights_cache[fname] = tuple(weights_for_file)
+
+        except Exception as e:
+            logging.exception(f"Exception reading weights in file {fname}")
+            player_errors.append(
+                f"{len(player_errors) + 1}. "
+                f"File {fname} is invalid. Please fix your yaml.\n{Utils.get_all_causes(e)}"
+            )
 
     # sort dict for consistent results across platforms:
     weights_cache = {key: value for key, value in sorted(weights_cache.items(), key=lambda k: k[0].casefold())}
@@ -206,11 +217,12 @@ def main(args=None) -> tuple[argparse.Namespace, int]:
                             else:
                                 yaml[category_name][key] = option
 
+    option_cache: OptionCache = {}
     settings_cache: dict[str, tuple[argparse.Namespace, ...] | None] = {fname: None for fname in weights_cache}
     if args.sameoptions:
         for fname, yamls in weights_cache.items():
             try:
-                settings_cache[fname] = tuple(roll_settings(yaml, args.plando) for yaml in yamls)
+                settings_cache[fname] = tuple(roll_settings(yaml, args.plando, option_cache) for yaml in yamls)
             except Exception as e:
                 logging.exception(f"Exception reading settings in file {fname}")
                 player_errors.append(
@@ -243,7 +255,8 @@ def main(args=None) -> tuple[argparse.Namespace, int]:
                 # Use the cached settings object if it exists, otherwise roll settings within the try-catch
                 # Invariant: settings_cache[path] and weights_cache[path] have the same length
                 cached = settings_cache[path]
-                settings_object: argparse.Namespace = (cached[doc_index] if cached else roll_settings(yaml, args.plando))
+                settings_object: argparse.Namespace = (cached[doc_index] if cached else
+                                                       roll_settings(yaml, args.plando, option_cache))
 
                 for k, v in vars(settings_object).items():
                     if v is not None:
@@ -289,16 +302,17 @@ def main(args=None) -> tuple[argparse.Namespace, int]:
     return args, seed
 
 
-def read_weights_yamls(path) -> tuple[Any, ...]:
+def read_weights_text(path) -> str:
     try:
         if urllib.parse.urlparse(path).scheme in ('https', 'file'):
-            yaml = str(urllib.request.urlopen(path).read(), "utf-8-sig")
-        else:
-            with open(path, 'rb') as f:
-                yaml = str(f.read(), "utf-8-sig")
+            return str(urllib.request.urlopen(path).read(), "utf-8-sig")
+        with open(path, 'rb') as f:
+            return str(f.read(), "utf-8-sig")
     except Exception as e:
         raise Exception(f"Failed to read weights ({path})") from e
 
+
+def parse_weights_yamls(yaml: str) -> tuple[Any, ...]:
     from yaml.error import MarkedYAMLError
     try:
         return tuple(parse_yamls(yaml))
@@ -315,6 +329,53 @@ def read_weights_yamls(path) -> tuple[Any, ...]:
         raise ex
 
 
+def read_weights_yamls(path) -> tuple[Any, ...]:
+    return parse_weights_yamls(read_weights_text(path))
+
+
+parallel_parse_threshold = 32
+"""Amount of distinct yaml files from which on they get parsed in a process pool."""
+
+
+def read_player_weights(paths: list[str]) -> dict[str, tuple[Any, ...] | Exception]:
+    """
+    Read the yaml documents of multiple files, returning either their documents or the exception reading them raised.
+    Files with identical content are only parsed once, and large amounts of files are parsed in parallel.
+    """
+    results: dict[str, tuple[Any, ...] | Exception] = {}
+    paths_by_text: dict[str, list[str]] = {}
+    for path in paths:
+        try:
+            paths_by_text.setdefault(read_weights_text(path), []).append(path)
+        except Exception as e:
+            results[path] = e
+
+    parsed: dict[str, tuple[Any, ...] | Exception] = {}
+    if len(paths_by_text) >= parallel_parse_threshold:
+        from concurrent.futures import ProcessPoolExecutor
+        from concurrent.futures.process import BrokenProcessPool
+        try:
+            with ProcessPoolExecutor(max(1, min(os.cpu_count() or 1, len(paths_by_text) // 8))) as pool:
+                futures = {text: pool.submit(parse_weights_yamls, text) for text in paths_by_text}
+                for text, future in futures.items():
+                    parsed[text] = future.exception() or future.result()
+        except (OSError, BrokenProcessPool) as e:
+            logging.warning(f"Could not parse yaml files in parallel, falling back to a single process: {e}")
+            parsed.clear()
+    for text in paths_by_text.keys() - parsed.keys():
+        try:
+            parsed[text] = parse_weights_yamls(text)
+        except Exception as e:
+            parsed[text] = e
+
+    for text, text_paths in paths_by_text.items():
+        result = parsed[text]
+        for index, path in enumerate(text_paths):
+            # every file needs its own documents, as meta options get applied to them in place
+            results[path] = result if index == 0 or isinstance(result, Exception) else copy.deepcopy(result)
+    return results
+
+
 def interpret_on_off(value) -> bool:
     return {"on": True, "off": False}.get(value, value)
 
@@ -501,26 +562,50 @@ def roll_triggers(weights: dict, triggers: list, valid_keys: set) -> dict:
     return weights
 
 
-def handle_option(ret: argparse.Namespace, game_weights: dict, option_key: str, option: type[Options.Option], plando_options: PlandoOptions):
+option_cache_size = 4096
+OptionCache = dict[tuple[type[Options.Option], str, str, PlandoOptions], Options.Option]
+
+
+def handle_option(ret: argparse.Namespace, game_weights: dict, option_key: str, option: type[Options.Option],
+                  plando_options: PlandoOptions, option_cache: OptionCache | None = None):
+    """
+    Create and verify an option from its weights.
+    If an option_cache is given, options of cacheable types created from the same container value, like item lists of
+    identical yamls, are only created and verified once.
+    """
     try:
         if option_key in game_weights:
             if not option.supports_weighting:
-                player_option = option.from_any(game_weights[option_key])
+                value = game_weights[option_key]
             else:
-                player_option = option.from_any(get_choice(option_key, game_weights))
+                value = get_choice(option_key, game_weights)
         else:
-            player_option = option.from_any(option.default)  # call the from_any here to support default "random"
+            value = option.default  # call the from_any here to support default "random"
+        cache_key = None
+        if option_cache is not None and option.cacheable and isinstance(value, (dict, list, set, frozenset, tuple)):
+            cache_key = (option, ret.game, repr(value), plando_options)
+            cached = option_cache.get(cache_key)
+            if cached is not None:
+                setattr(ret, option_key, copy.deepcopy(cached))
+                return
+        player_option = option.from_any(value)
         setattr(ret, option_key, player_option)
     except Exception as e:
         raise Options.OptionError(f"Error generating option {option_key} in {ret.game}") from e
     else:
         from worlds import AutoWorldRegister
         player_option.verify(AutoWorldRegister.world_types[ret.game], ret.name, plando_options)
+        if cache_key:
+            if len(option_cache) >= option_cache_size:
+                option_cache.clear()
+            option_cache[cache_key] = copy.deepcopy(player_option)
 
 
-def roll_settings(weights: dict, plando_options: PlandoOptions = PlandoOptions.bosses):
+def roll_settings(weights: dict, plando_options: PlandoOptions = PlandoOptions.bosses,
+                  option_cache: OptionCache | None = None):
     """
     Roll options from specified weights, usually originating from a .yaml options file.
+    Options may be reused from option_cache, which should only be shared by the players of one generation.
 
     Important note:
     The same weights dict is shared between all slots using the same yaml (e.g. generic weights file for filler slots).
@@ -604,7 +689,7 @@ def roll_settings(weights: dict, plando_options: PlandoOptions = PlandoOptions.b
         setattr(ret, option_key, option.from_any(get_choice(option_key, weights, option.default)))
 
     for option_key, option in world_type.options_dataclass.type_hints.items():
-        handle_option(ret, game_weights, option_key, option, plando_options)
+        handle_option(ret, game_weights, option_key, option, plando_options, option_cache)
         valid_keys.add(option_key)
 
     if ret.game == "A Link to the Past":
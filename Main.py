@@ -7,15 +7,14 @@ import tempfile
 import time
 from typing import Any
 import zipfile
-import zlib
 
 import worlds
 from BaseClasses import CollectionState, Item, Location, LocationProgressType, MultiWorld
 from Fill import FillError, balance_multiworld_progression, distribute_items_restrictive, flood_items, \
     parse_planned_blocks, distribute_planned_blocks, resolve_early_locations_for_planned
-from NetUtils import convert_to_base_types
+from NetUtils import convert_to_base_types, encode_multidata
 from Options import StartInventoryPool
-from Utils import __version__, output_path, restricted_dumps, version_tuple
+from Utils import __version__, output_path, version_tuple
 from settings import get_settings
 from worlds import AutoWorld
 from worlds.generic.Rules import exclusion_rules, locality_rules
@@ -51,16 +50,18 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
     multiworld.state = CollectionState(multiworld)
     logger.info('Archipelago Version %s  -  Seed: %s\n', __version__, multiworld.seed)
 
-    logger.info(f"Found {len(AutoWorld.AutoWorldRegister.world_types)} World Types:")
-    longest_name = max(len(text) for text in AutoWorld.AutoWorldRegister.world_types)
+    # only list imported worlds, which with lazy loading are the ones used by this multiworld
+    world_types = dict(dict.items(AutoWorld.AutoWorldRegister.world_types))
+    logger.info(f"Found {len(world_types)} World Types:")
+    longest_name = max(len(text) for text in world_types)
 
-    world_classes = AutoWorld.AutoWorldRegister.world_types.values()
+    world_classes = world_types.values()
 
     version_count = max(len(cls.world_version.as_simple_string()) for cls in world_classes)
     item_count = len(str(max(len(cls.item_names) for cls in world_classes)))
     location_count = len(str(max(len(cls.location_names) for cls in world_classes)))
 
-    for name, cls in AutoWorld.AutoWorldRegister.world_types.items():
+    for name, cls in world_types.items():
         if not cls.hidden and len(cls.item_names) > 0:
             logger.info(f" {name:{longest_name}}: "
                         f"v{cls.world_version.as_simple_string():{version_count}} | "
@@ -209,6 +210,8 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
 
     AutoWorld.call_all(multiworld, "finalize_multiworld")
     AutoWorld.call_all(multiworld, "pre_output")
+    # placements are final, share logical spheres between accessibility check, multidata and spoiler
+    multiworld.cache_location_spheres()
 
     # we're about to output using multithreading, so we're removing the global random state to prevent accidental use
     multiworld.random.passthrough = False
@@ -223,7 +226,8 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
     if args.spoiler_only:
         if args.spoiler > 1:
             logger.info('Calculating playthrough.')
-            multiworld.spoiler.create_playthrough(create_paths=args.spoiler > 2)
+            multiworld.spoiler.create_playthrough(create_paths=args.spoiler > 2,
+                                                 workers=get_settings().generator.playthrough_workers)
 
         multiworld.spoiler.to_file(output_path('%s_Spoiler.txt' % outfilebase))
         logger.info('Done. Skipped multidata modification. Total time: %s', time.perf_counter() - start)
@@ -353,10 +357,9 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
                 for key in ("slot_data", "er_hint_data"):
                     multidata[key] = convert_to_base_types(multidata[key])
 
-                serialized_multidata = zlib.compress(restricted_dumps(multidata), 9)
+                serialized_multidata = encode_multidata(multidata)
 
                 with open(os.path.join(temp_dir, f'{outfilebase}.archipelago'), 'wb') as f:
-                    f.write(bytes([3]))  # version of format
                     f.write(serialized_multidata)
 
             output_file_futures.append(pool.submit(write_multidata))
@@ -374,7 +377,8 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
 
         if args.spoiler > 1:
             logger.info('Calculating playthrough.')
-            multiworld.spoiler.create_playthrough(create_paths=args.spoiler > 2)
+            multiworld.spoiler.create_playthrough(create_paths=args.spoiler > 2,
+                                                 workers=get_settings().generator.playthrough_workers)
 
         if args.spoiler:
             multiworld.spoiler.to_file(os.path.join(temp_dir, '%s_Spoiler.txt' % outfilebase))
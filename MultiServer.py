@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import argparse
 import asyncio
+import bisect
 import collections
 import contextlib
 import copy
@@ -13,9 +14,11 @@ import itertools
 import logging
 import math
 import operator
+import os
 import pickle
 import random
 import shlex
+import struct
 import threading
 import time
 import typing
@@ -44,7 +47,8 @@ import NetUtils
 import Utils
 from Utils import version_tuple, restricted_loads, Version, async_start, get_intended_text
 from NetUtils import Endpoint, ClientStatus, NetworkItem, decode, encode, NetworkPlayer, Permission, NetworkSlot, \
-    SlotType, LocationStore, MultiData, Hint, HintStatus
+    SlotType, LocationStore, MultiData, Hint, HintStatus, decode_multidata, decode_message, wire_encoders, \
+    EncodedMessages, MappedGamePackage, games_package_to_dict
 from BaseClasses import ItemClassification
 
 
@@ -140,6 +144,299 @@ def get_saving_second(seed_name: str, interval: int = 60) -> int:
     return int(hashlib.sha256(seed_name.encode()).hexdigest(), 16) % interval
 
 
+class SaveJournal:
+    """
+    Append-only journal of changes to a save, kept next to the full save written by Context._save.
+    Each entry holds the parts of Context.get_save() that changed since the previous entry and the epoch of the full
+    save it applies to, so entries written before a later full save are never replayed onto it.
+    """
+    entry_header = struct.Struct("<I")
+    keyed_sections: typing.ClassVar[typing.FrozenSet[str]] = frozenset({
+        "received_items", "hints_used", "hints", "location_checks", "name_aliases", "client_game_state",
+        "group_collected", "stored_data",
+    })
+    """sections of get_save() that are dicts, of which only changed keys are written"""
+
+    path: str
+    compact_after: int
+    """entries after which the next save is a full save again"""
+    epoch: int
+    entries: int
+    last_save: typing.Dict[str, typing.Any]
+
+    def __init__(self, path: str, compact_after: int):
+        self.path = path
+        self.compact_after = compact_after
+        self.epoch = 0
+        self.entries = 0
+        self.last_save = {}
+
+    @property
+    def wants_compaction(self) -> bool:
+        return not self.epoch or self.entries >= self.compact_after
+
+    def reset(self, save: typing.Dict[str, typing.Any]) -> None:
+        """Starts a new, empty journal on top of the full save `save`, which has to contain this journal's epoch."""
+        self.last_save = {}
+        self.get_changes(save, set(save.get("stored_data", ())))
+        self.entries = 0
+        with open(self.path, "wb"):
+            pass
+
+    def get_changes(self, save: typing.Dict[str, typing.Any], stored_data_changed: typing.AbstractSet[str]) \
+            -> typing.Dict[str, typing.Any]:
+        """
+        Returns the changes of `save` compared to the previous call and remembers `save` for the next call.
+        stored_data values are compared by key only, as they may be modified in place.
+        """
+        changes: typing.Dict[str, typing.Any] = {}
+        for section, value in save.items():
+            if section not in self.keyed_sections:
+                if self.last_save.get(section) != value:
+                    changes[section] = value
+                    self.last_save[section] = copy.deepcopy(value)
+                continue
+            last = self.last_save.setdefault(section, {})
+            updated: typing.Dict[typing.Any, typing.Any] = {}
+            extended: typing.Dict[typing.Any, typing.List[typing.Any]] = {}
+            changed_keys = stored_data_changed if section == "stored_data" else value.keys()
+            for key in changed_keys:
+                if key not in value:
+                    continue
+                entry = value[key]
+                if section != "stored_data":
+                    old = last.get(key)
+                    if old == entry:
+                        continue
+                    if isinstance(old, list) and isinstance(entry, list) and entry[:len(old)] == old:
+                        # received items only grow
+                        extended[key] = entry[len(old):]
+                        last[key] = list(entry)
+                        continue
+                    last[key] = entry.copy() if isinstance(entry, (list, set, dict)) else entry
+                else:
+                    last[key] = None
+                updated[key] = entry
+            removed = [key for key in last if key not in value]
+            for key in removed:
+                del last[key]
+            if updated or extended or removed:
+                changes[section] = updated, extended, removed
+        return changes
+
+    def append(self, changes: typing.Dict[str, typing.Any]) -> None:
+        # Does not use Utils.restricted_dumps because we'd rather make a save than not make one
+        entry = zlib.compress(pickle.dumps((self.epoch, changes)))
+        with open(self.path, "ab") as f:
+            start = f.tell()
+            try:
+                f.write(self.entry_header.pack(len(entry)) + entry)
+                f.flush()
+                os.fsync(f.fileno())
+            except BaseException:
+                # a partial entry would stop replay from reaching any entry appended after it
+                f.truncate(start)
+                raise
+        self.entries += 1
+
+    @classmethod
+    def replay(cls, path: str, save: typing.Dict[str, typing.Any], logger: logging.Logger) -> int:
+        """Applies the entries in the journal at `path` that belong to `save` to it, returns how many were applied."""
+        epoch = save.get("journal_epoch", 0)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return 0
+        applied = 0
+        offset = 0
+        while offset < len(data):
+            try:
+                length, = cls.entry_header.unpack_from(data, offset)
+                entry_epoch, changes = restricted_loads(
+                    zlib.decompress(data[offset + cls.entry_header.size:offset + cls.entry_header.size + length]))
+            except Exception as e:
+                # the server was most likely stopped while writing this entry
+                logger.warning(f"Discarding incomplete save journal entry ({e}).")
+                break
+            offset += cls.entry_header.size + length
+            if entry_epoch != epoch:
+                continue
+            for section, change in changes.items():
+                if section not in cls.keyed_sections:
+                    save[section] = change
+                    continue
+                updated, extended, removed = change
+                target = save.setdefault(section, {})
+                target.update(updated)
+                for key, new_entries in extended.items():
+                    target[key] = target.get(key, []) + new_entries
+                for key in removed:
+                    target.pop(key, None)
+            applied += 1
+        return applied
+
+
+class MetricsHistogram:
+    """Counts observed durations in seconds into fixed buckets, compatible with Prometheus histograms."""
+    __slots__ = ("counts", "count", "total", "max")
+    buckets: typing.ClassVar[typing.Tuple[float, ...]] = (
+        0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    counts: typing.List[int]
+    """non-cumulative count per bucket, the last entry counts durations above the largest bucket"""
+    count: int
+    total: float
+    max: float
+
+    def __init__(self):
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def summary(self) -> str:
+        if not self.count:
+            return "never"
+        return f"{self.count}x, avg {self.total / self.count * 1000:.2f}ms, max {self.max * 1000:.2f}ms"
+
+
+class ServerMetrics:
+    """
+    Counters and timings of a server's hot paths, shown by the /metrics console command
+    and optionally served in Prometheus text format by serve_metrics.
+    Everything is updated from the event loop, except autosave timings, which come from the autosave thread.
+    """
+    prefix: typing.ClassVar[str] = "archipelago_server"
+
+    commands: typing.DefaultDict[str, MetricsHistogram]
+    """time spent in process_client_cmd, per client command"""
+    timings: typing.DefaultDict[str, MetricsHistogram]
+    """time spent in other named operations, like autosave and recheck_hints"""
+    bytes_in: typing.Counter[typing.Optional[team_slot]]
+    bytes_out: typing.Counter[typing.Optional[team_slot]]
+    """message lengths before compression per (team, slot), None for clients that have not connected to a slot"""
+    loop_lag: MetricsHistogram
+    """how late the event loop woke up, measured by monitor_event_loop_lag"""
+
+    def __init__(self):
+        self.commands = collections.defaultdict(MetricsHistogram)
+        self.timings = collections.defaultdict(MetricsHistogram)
+        self.bytes_in = collections.Counter()
+        self.bytes_out = collections.Counter()
+        self.loop_lag = MetricsHistogram()
+
+    @staticmethod
+    def client_key(endpoint: Endpoint) -> typing.Optional[team_slot]:
+        if getattr(endpoint, "auth", False):
+            return endpoint.team, endpoint.slot
+        return None
+
+    @contextlib.contextmanager
+    def time(self, name: str) -> typing.Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name].observe(time.perf_counter() - start)
+
+    def collect(self, labels: typing.Mapping[str, str] = {}) \
+            -> typing.Dict[str, typing.Tuple[str, str, typing.List[str]]]:
+        """Returns {metric name: (type, help, sample lines)}, with `labels` added to every sample."""
+        def format_labels(extra: typing.Mapping[str, str]) -> str:
+            merged = {**labels, **extra}
+            if not merged:
+                return ""
+            return "{" + ",".join(f'{key}="{value}"' for key, value in merged.items()) + "}"
+
+        def histogram_lines(name: str, histogram: MetricsHistogram, extra: typing.Mapping[str, str]) \
+                -> typing.List[str]:
+            lines = []
+            cumulative = 0
+            for bucket, count in zip((*histogram.buckets, "+Inf"), histogram.counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{format_labels({**extra, 'le': str(bucket)})} {cumulative}")
+            lines.append(f"{name}_sum{format_labels(extra)} {histogram.total}")
+            lines.append(f"{name}_count{format_labels(extra)} {histogram.count}")
+            return lines
+
+        def client_labels(key: typing.Optional[team_slot]) -> typing.Dict[str, str]:
+            return {"team": "", "slot": ""} if key is None else {"team": str(key[0]), "slot": str(key[1])}
+
+        families: typing.Dict[str, typing.Tuple[str, str, typing.List[str]]] = {}
+        name = f"{self.prefix}_command_seconds"
+        families[name] = "histogram", "Time spent processing client commands.", [
+            line for command, histogram in sorted(self.commands.items())
+            for line in histogram_lines(name, histogram, {"cmd": command})]
+        name = f"{self.prefix}_operation_seconds"
+        families[name] = "histogram", "Time spent in server operations, like autosaves.", [
+            line for operation, histogram in sorted(self.timings.items())
+            for line in histogram_lines(name, histogram, {"operation": operation})]
+        for direction, counter in (("in", self.bytes_in), ("out", self.bytes_out)):
+            name = f"{self.prefix}_{direction}_bytes_total"
+            families[name] = "counter", f"Length of {direction}going messages before compression.", [
+                f"{name}{format_labels(client_labels(key))} {value}"
+                for key, value in sorted(counter.items(), key=lambda item: item[0] or (-1, -1))]
+        if self.loop_lag.count:  # rooms sharing an event loop leave this to the hosting process
+            name = f"{self.prefix}_event_loop_lag_seconds"
+            families[name] = "histogram", "Delay of event loop wakeups.", histogram_lines(name, self.loop_lag, {})
+        return families
+
+    @staticmethod
+    def format_prometheus(*collected: typing.Dict[str, typing.Tuple[str, str, typing.List[str]]]) -> str:
+        """Merges the results of collect() calls into one Prometheus text format document."""
+        merged: typing.Dict[str, typing.Tuple[str, str, typing.List[str]]] = {}
+        for families in collected:
+            for name, (metric_type, help_text, lines) in families.items():
+                merged.setdefault(name, (metric_type, help_text, []))[2].extend(lines)
+        text = []
+        for name, (metric_type, help_text, lines) in merged.items():
+            text.append(f"# HELP {name} {help_text}")
+            text.append(f"# TYPE {name} {metric_type}")
+            text.extend(lines)
+        return "\n".join(text) + "\n"
+
+
+async def monitor_event_loop_lag(metrics: ServerMetrics, interval: float = 1.0) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        metrics.loop_lag.observe(max(0.0, loop.time() - start - interval))
+
+
+async def serve_metrics(render: typing.Callable[[], str], port: int, host: str = "127.0.0.1") -> asyncio.Server:
+    """Serves the result of `render` as Prometheus text format over plain HTTP on GET /metrics."""
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), 10)
+            while (await asyncio.wait_for(reader.readline(), 10)).strip():
+                pass  # headers are not needed
+            method, target, *_ = request_line.decode("latin-1").split()
+            if method == "GET" and target.split("?", 1)[0] == "/metrics":
+                status, body = "200 OK", render().encode("utf-8")
+            else:
+                status, body = "404 Not Found", b""
+            writer.write(f"HTTP/1.1 {status}\r\n"
+                         f"Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                         f"Content-Length: {len(body)}\r\n"
+                         f"Connection: close\r\n\r\n".encode("latin-1") + body)
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+
 class Client(Endpoint):
     __slots__ = (
         "__weakref__",
@@ -241,13 +538,15 @@ class Context:
     slot_info: typing.Dict[int, NetworkSlot]
     generator_version = Version(0, 0, 0)
     checksums: typing.Dict[str, str]
-    item_names: typing.Dict[str, typing.Dict[int, str]]
+    item_names: typing.Dict[str, typing.Mapping[int, str]]
     item_name_groups: typing.Dict[str, typing.Dict[str, typing.Set[str]]]
-    location_names: typing.Dict[str, typing.Dict[int, str]]
+    location_names: typing.Dict[str, typing.Mapping[int, str]]
     location_name_groups: typing.Dict[str, typing.Dict[str, typing.Set[str]]]
-    all_item_and_group_names: typing.Dict[str, typing.Set[str]]
-    all_location_and_group_names: typing.Dict[str, typing.Set[str]]
+    all_item_and_group_names: typing.Dict[str, typing.AbstractSet[str]]
+    all_location_and_group_names: typing.Dict[str, typing.AbstractSet[str]]
     non_hintable_names: typing.Dict[str, typing.AbstractSet[str]]
+    lazy_game_data: bool = False
+    """if set, only the game data of the games in the multidata is loaded, by _load"""
     spheres: typing.List[typing.Dict[int, typing.Set[int]]]
     """ each sphere is { player: { location_id, ... } } """
     logger: logging.Logger
@@ -278,6 +577,7 @@ class Context:
         self.server = None
         self.countdown_timer = 0
         self.received_items = {}
+        self.received_items_dirty: typing.Set[team_slot] = set()  # slots with items not yet sent by send_new_items
         self.start_inventory = {}
         self.name_aliases: typing.Dict[team_slot, str] = {}
         self.location_checks = collections.defaultdict(set)
@@ -285,6 +585,8 @@ class Context:
         self.location_check_points = location_check_points
         self.hints_used = collections.defaultdict(int)
         self.hints: typing.Dict[team_slot, typing.Set[Hint]] = collections.defaultdict(set)
+        # (team, finding_player, location) -> hints in self.hints that re_check may still change
+        self.unfound_hints: typing.Dict[typing.Tuple[int, int, int], typing.Set[Hint]] = {}
         self.release_mode: str = release_mode
         self.remaining_mode: str = remaining_mode
         self.collect_mode: str = collect_mode
@@ -304,6 +606,10 @@ class Context:
         self.auto_save_interval = 60  # in seconds
         self.auto_saver_thread: typing.Optional[threading.Thread] = None
         self.save_dirty = False
+        self.save_journal_entries = 0  # journal entries between full saves, 0 to only write full saves
+        self.save_journal: typing.Optional[SaveJournal] = None
+        self.stored_data_changed: typing.Set[str] = set()
+        self.metrics = ServerMetrics()
         self.tags = ['AP']
         self.games: typing.Dict[int, str] = {}
         self.minimum_client_versions: typing.Dict[int, Version] = {}
@@ -334,6 +640,11 @@ class Context:
     # Data package retrieval
     def _load_game_data(self):
         import worlds
+        if worlds.lazy_loading:
+            # only import the worlds of the games that are played once the multidata is loaded
+            self.gamespackage = {}
+            self.lazy_game_data = True
+            return
         self.gamespackage = worlds.network_data_package["games"]
 
         self.item_name_groups = {world_name: world.item_name_groups for world_name, world in
@@ -348,18 +659,38 @@ class Context:
             del game_package["item_name_groups"]
             del game_package["location_name_groups"]
 
+    def _load_games_data(self, games: typing.Iterable[str]):
+        """Loads the game data of specific games, if their world is installed, for lazy_game_data."""
+        import worlds
+        for game in games:
+            world = worlds.AutoWorldRegister.world_types.get(game)
+            if world is None:
+                continue  # needs a data package embedded in the multidata
+            self.gamespackage[game] = {key: value for key, value in worlds.network_data_package["games"][game].items()
+                                       if key not in ("item_name_groups", "location_name_groups")}
+            self.item_name_groups[game] = world.item_name_groups
+            self.location_name_groups[game] = world.location_name_groups
+            self.non_hintable_names[game] = world.hint_blacklist
+
     def _init_game_data(self):
         for game_name, game_package in self.gamespackage.items():
             if "checksum" in game_package:
                 self.checksums[game_name] = game_package["checksum"]
-            for item_name, item_id in game_package["item_name_to_id"].items():
-                self.item_names[game_name][item_id] = item_name
-            for location_name, location_id in game_package["location_name_to_id"].items():
-                self.location_names[game_name][location_id] = location_name
-            self.all_item_and_group_names[game_name] = \
-                set(game_package["item_name_to_id"]) | set(self.item_name_groups[game_name])
-            self.all_location_and_group_names[game_name] = \
-                set(game_package["location_name_to_id"]) | set(self.location_name_groups.get(game_name, []))
+            if isinstance(game_package, MappedGamePackage):
+                # look names up in the shared mapped file instead of copying them into this context
+                self.item_names[game_name] = collections.ChainMap(
+                    {}, game_package.item_id_to_name, self.item_names[game_name])
+                self.location_names[game_name] = collections.ChainMap(
+                    {}, game_package.location_id_to_name, self.location_names[game_name])
+            else:
+                for item_name, item_id in game_package["item_name_to_id"].items():
+                    self.item_names[game_name][item_id] = item_name
+                for location_name, location_id in game_package["location_name_to_id"].items():
+                    self.location_names[game_name][location_id] = location_name
+            self.all_item_and_group_names[game_name] = collections.ChainMap(
+                game_package["item_name_to_id"], self.item_name_groups[game_name]).keys()
+            self.all_location_and_group_names[game_name] = collections.ChainMap(
+                game_package["location_name_to_id"], self.location_name_groups.get(game_name, {})).keys()
 
         archipelago_item_names = self.item_names["Archipelago"]
         archipelago_location_names = self.location_names["Archipelago"]
@@ -378,7 +709,8 @@ class Context:
     async def send_msgs(self, endpoint: Endpoint, msgs: typing.Iterable[dict]) -> bool:
         if not endpoint.socket or not endpoint.socket.open:
             return False
-        msg = self.dumper(msgs)
+        msg = self.dumper(msgs) if endpoint.encoding == "json" else wire_encoders[endpoint.encoding](msgs)
+        self.metrics.bytes_out[self.metrics.client_key(endpoint)] += len(msg)
         try:
             await endpoint.socket.send(msg)
         except websockets.ConnectionClosed:
@@ -390,9 +722,12 @@ class Context:
                 self.logger.info(f"Outgoing message: {msg}")
             return True
 
-    async def send_encoded_msgs(self, endpoint: Endpoint, msg: str) -> bool:
+    async def send_encoded_msgs(self, endpoint: Endpoint, msg: str | EncodedMessages) -> bool:
         if not endpoint.socket or not endpoint.socket.open:
             return False
+        if isinstance(msg, EncodedMessages):
+            msg = msg.get(endpoint.encoding)
+        self.metrics.bytes_out[self.metrics.client_key(endpoint)] += len(msg)
         try:
             await endpoint.socket.send(msg)
         except websockets.ConnectionClosed:
@@ -404,11 +739,13 @@ class Context:
                 self.logger.info(f"Outgoing message: {msg}")
             return True
 
-    async def broadcast_send_encoded_msgs(self, endpoints: typing.Iterable[Endpoint], msg: str) -> bool:
+    async def broadcast_send_encoded_msgs(self, endpoints: typing.Iterable[Endpoint], msg: str | bytes) -> bool:
         sockets = []
+        bytes_out = self.metrics.bytes_out
         for endpoint in endpoints:
             if endpoint.socket and endpoint.socket.open:
                 sockets.append(endpoint.socket)
+                bytes_out[self.metrics.client_key(endpoint)] += len(msg)
         try:
             websockets.broadcast(sockets, msg)
         except RuntimeError:
@@ -419,15 +756,23 @@ class Context:
                 self.logger.info(f"Outgoing broadcast: {msg}")
             return True
 
+    def broadcast_encoded(self, endpoints: typing.Iterable[Endpoint], msgs: typing.List[dict]):
+        """Broadcast msgs to endpoints, encoding them once for each wire encoding in use."""
+        endpoints_by_encoding: typing.Dict[str, typing.List[Endpoint]] = {}
+        for endpoint in endpoints:
+            endpoints_by_encoding.setdefault(endpoint.encoding, []).append(endpoint)
+        for encoding, encoding_endpoints in endpoints_by_encoding.items():
+            data = self.dumper(msgs) if encoding == "json" else wire_encoders[encoding](msgs)
+            async_start(self.broadcast_send_encoded_msgs(encoding_endpoints, data))
+
     def broadcast_all(self, msgs: typing.List[dict]):
         msg_is_text = all(msg["cmd"] == "PrintJSON" for msg in msgs)
-        data = self.dumper(msgs)
         endpoints = (
             endpoint
             for endpoint in self.endpoints
             if endpoint.auth and not (msg_is_text and endpoint.no_text)
         )
-        async_start(self.broadcast_send_encoded_msgs(endpoints, data))
+        self.broadcast_encoded(endpoints, msgs)
 
     def broadcast_text_all(self, text: str, additional_arguments: dict = {}):
         self.logger.info("Notice (all): %s" % text)
@@ -435,17 +780,15 @@ class Context:
 
     def broadcast_team(self, team: int, msgs: typing.List[dict]):
         msg_is_text = all(msg["cmd"] == "PrintJSON" for msg in msgs)
-        data = self.dumper(msgs)
         endpoints = (
             endpoint
             for endpoint in itertools.chain.from_iterable(self.clients[team].values())
             if not (msg_is_text and endpoint.no_text)
         )
-        async_start(self.broadcast_send_encoded_msgs(endpoints, data))
+        self.broadcast_encoded(endpoints, msgs)
 
     def broadcast(self, endpoints: typing.Iterable[Client], msgs: typing.List[dict]):
-        msgs = self.dumper(msgs)
-        async_start(self.broadcast_send_encoded_msgs(endpoints, msgs))
+        self.broadcast_encoded(endpoints, msgs)
 
     async def disconnect(self, endpoint: Client):
         if endpoint in self.endpoints:
@@ -486,11 +829,8 @@ class Context:
         self.data_filename = multidatapath
 
     @staticmethod
-    def decompress(data: bytes) -> dict:
-        format_version = data[0]
-        if format_version > 3:
-            raise Utils.VersionException("Incompatible multidata.")
-        return restricted_loads(zlib.decompress(data[1:]))
+    def decompress(data: bytes) -> typing.MutableMapping[str, typing.Any]:
+        return decode_multidata(data)
 
     def _load(self, decoded_obj: MultiData, game_data_packages: typing.Dict[str, typing.Any],
               use_embedded_server_options: bool):
@@ -517,6 +857,8 @@ class Context:
         self.games = {slot: slot_info.game for slot, slot_info in self.slot_info.items()}
         self.groups = {slot: set(slot_info.group_members) for slot, slot_info in self.slot_info.items()
                        if slot_info.type == SlotType.group}
+        if self.lazy_game_data:
+            self._load_games_data({"Archipelago", *self.games.values()})
 
         self.clients = {0: {}}
         slot_info: NetworkSlot
@@ -536,9 +878,11 @@ class Context:
         self.random.seed(self.seed_name)
         self.connect_names = decoded_obj['connect_names']
         self.locations = LocationStore(decoded_obj.pop("locations"))  # pre-emptively free memory
+        self.locations.build_receiver_index()  # answer hints and collects without scanning all locations
+        # sectioned multidata decodes each slot's slot_data on first access, e.g. on Connect
         self.slot_data = decoded_obj['slot_data']
-        for slot, data in self.slot_data.items():
-            self.read_data[f"slot_data_{slot}"] = lambda data=data: data
+        for slot in self.slot_data:
+            self.read_data[f"slot_data_{slot}"] = lambda slot=slot: self.slot_data[slot]
         self.er_hint_data = {int(player): {int(address): name for address, name in loc_data.items()}
                              for player, loc_data in decoded_obj["er_hint_data"].items()}
 
@@ -548,6 +892,8 @@ class Context:
 
         for slot, hints in decoded_obj["precollected_hints"].items():
             self.hints[0, slot].update(hints)
+            for hint in hints:
+                self._index_hint(0, hint)
 
         # declare slots that aren't players as done
         for slot, slot_info in self.slot_info.items():
@@ -593,13 +939,34 @@ class Context:
         return False
 
     def _save(self, exit_save: bool = False) -> bool:
+        stored_data_changed, self.stored_data_changed = self.stored_data_changed, set()
+        journal = self.save_journal
+        epoch = journal.epoch if journal else 0
         try:
+            save = self.get_save()
+            if journal and not exit_save and not journal.wants_compaction:
+                changes = journal.get_changes(save, stored_data_changed)
+                if changes:
+                    journal.append(changes)
+                return True
+            if journal:
+                journal.epoch += 1
+                save["journal_epoch"] = journal.epoch
             # Does not use Utils.restricted_dumps because we'd rather make a save than not make one
-            encoded_save = pickle.dumps(self.get_save())
-            with open(self.save_filename, "wb") as f:
+            encoded_save = pickle.dumps(save)
+            with open(self.save_filename + ".tmp", "wb") as f:
                 f.write(zlib.compress(encoded_save))
+            os.replace(self.save_filename + ".tmp", self.save_filename)
+            if journal:
+                journal.reset(save)
         except Exception as e:
             self.logger.exception(e)
+            self.stored_data_changed |= stored_data_changed
+            if journal:
+                # write a full save next time, on top of the epoch of the last full save that is known to be written
+                journal.epoch = epoch
+                journal.entries = journal.compact_after
+                journal.last_save = {}
             return False
         else:
             return True
@@ -608,14 +975,22 @@ class Context:
         self.saving = enabled
         if self.saving:
             if not self.save_filename:
-                import os
                 name, ext = os.path.splitext(self.data_filename)
                 self.save_filename = name + '.apsave' if ext.lower() in ('.archipelago', '.zip') \
                     else self.data_filename + '_' + 'apsave'
+            journal_filename = self.save_filename + ".journal"
+            if self.save_journal_entries:
+                self.save_journal = SaveJournal(journal_filename, self.save_journal_entries)
             try:
                 with open(self.save_filename, 'rb') as f:
                     save_data = restricted_loads(zlib.decompress(f.read()))
-                    self.set_save(save_data)
+                # entries may be left over from a crash, or from a run with the journal enabled
+                replayed = SaveJournal.replay(journal_filename, save_data, self.logger)
+                if replayed:
+                    self.logger.info(f"Restored {replayed} changes from save journal.")
+                if self.save_journal:
+                    self.save_journal.epoch = save_data.get("journal_epoch", 0)
+                self.set_save(save_data)
             except FileNotFoundError:
                 self.logger.error('No save data found, starting a new game')
             except Exception as e:
@@ -637,7 +1012,8 @@ class Context:
                         time.sleep(max(1.0, next_wakeup))
                         if self.save_dirty:
                             self.logger.debug("Saving via thread.")
-                            self._save()
+                            with self.metrics.time("autosave"):
+                                self._save()
                     except OperationalError as e:
                         self.logger.exception(e)
                         self.logger.info(f"Saving failed. Retry in {self.auto_save_interval} seconds.")
@@ -690,6 +1066,9 @@ class Context:
         self.received_items = savedata["received_items"]
         self.hints_used.update(savedata["hints_used"])
         self.hints.update(savedata["hints"])
+        for (team, _), hints in savedata["hints"].items():
+            for hint in hints:
+                self._index_hint(team, hint)
 
         self.name_aliases.update(savedata["name_aliases"])
         self.client_game_state.update(savedata["client_game_state"])
@@ -732,28 +1111,37 @@ class Context:
         return 0
 
     def recheck_hints(self, team: typing.Optional[int] = None, slot: typing.Optional[int] = None,
-                      changed: typing.Optional[typing.Set[team_slot]] = None) -> None:
+                      changed: typing.Optional[typing.Set[team_slot]] = None,
+                      locations: typing.Optional[typing.Iterable[int]] = None) -> None:
         """Refreshes the hints for the specified team/slot. Providing 'None' for either team or slot
         will refresh all teams or all slots respectively. If a set is passed for 'changed', each (team,slot)
         pair that has at least one hint modified will be added to the set.
+        If 'locations' is passed, only hints for those locations of team and slot as finding player are refreshed,
+        which is what is needed after new location checks.
         """
-        for hint_team, hint_slot in self.hints:
-            if team != hint_team and team is not None:
-                continue  # Check specified team only, all if team is None
-            if slot != hint_slot and slot is not None:
-                continue  # Check specified slot only, all if slot is None
-            new_hints: typing.Set[Hint] = set()
-            for hint in self.hints[hint_team, hint_slot]:
-                new_hint = hint.re_check(self, hint_team)
-                new_hints.add(new_hint)
-                if hint == new_hint:
+        with self.metrics.time("recheck_hints"):
+            if locations is not None:
+                assert team is not None and slot is not None, "locations requires team and slot"
+                keys = [(team, slot, location) for location in locations
+                        if (team, slot, location) in self.unfound_hints]
+            else:
+                keys = [key for key in self.unfound_hints if team is None or key[0] == team]
+            for key in keys:
+                hint_team, finding_player, location = key
+                if location not in self.location_checks[hint_team, finding_player]:
                     continue
-                for player in self.slot_set(hint.receiving_player) | {hint.finding_player}:
-                    if changed is not None:
-                        changed.add((hint_team,player))
-                    if slot is not None and slot != player:
-                        self.replace_hint(hint_team, player, hint, new_hint)
-            self.hints[hint_team, hint_slot] = new_hints
+                for hint in list(self.unfound_hints.get(key, ())):
+                    receiving_players = self.slot_set(hint.receiving_player)
+                    if locations is None and slot is not None and slot != finding_player \
+                            and slot not in receiving_players:
+                        continue  # Check specified slot only, all if slot is None
+                    new_hint = hint.re_check(self, hint_team)
+                    self._unindex_hint(hint_team, hint)  # hint may no longer be in any set of hints
+                    if hint == new_hint:
+                        continue
+                    for player in receiving_players | {finding_player}:
+                        if self.replace_hint(hint_team, player, hint, new_hint) and changed is not None:
+                            changed.add((hint_team, player))
 
     def get_rechecked_hints(self, team: int, slot: int):
         self.recheck_hints(team, slot)
@@ -825,6 +1213,7 @@ class Context:
                 # we can check once if hint already exists
                 if hint not in self.hints[team, hint.finding_player]:
                     self.hints[team, hint.finding_player].add(hint)
+                    self._index_hint(team, hint)
                     new_hint_events.add(hint.finding_player)
                     for player in self.slot_set(hint.receiving_player):
                         self.hints[team, player].add(hint)
@@ -848,10 +1237,26 @@ class Context:
                 return hint
         return None
     
-    def replace_hint(self, team: int, slot: int, old_hint: Hint, new_hint: Hint) -> None:
+    def replace_hint(self, team: int, slot: int, old_hint: Hint, new_hint: Hint) -> bool:
         if old_hint in self.hints[team, slot]:
             self.hints[team, slot].remove(old_hint)
             self.hints[team, slot].add(new_hint)
+            self._unindex_hint(team, old_hint)
+            self._index_hint(team, new_hint)
+            return True
+        return False
+
+    def _index_hint(self, team: int, hint: Hint) -> None:
+        if not hint.found or hint.status != HintStatus.HINT_FOUND:
+            self.unfound_hints.setdefault((team, hint.finding_player, hint.location), set()).add(hint)
+
+    def _unindex_hint(self, team: int, hint: Hint) -> None:
+        key = team, hint.finding_player, hint.location
+        hints = self.unfound_hints.get(key)
+        if hints is not None:
+            hints.discard(hint)
+            if not hints:
+                del self.unfound_hints[key]
     
     # "events"
 
@@ -886,14 +1291,21 @@ class Context:
 
 
 def update_aliases(ctx: Context, team: int):
-    cmd = ctx.dumper([{"cmd": "RoomUpdate",
-                       "players": ctx.get_players_package()}])
+    msgs = [{"cmd": "RoomUpdate", "players": ctx.get_players_package()}]
+    cmd = EncodedMessages(msgs, ctx.dumper(msgs))
 
     for clients in ctx.clients[team].values():
         for client in clients:
             async_start(ctx.send_encoded_msgs(client, cmd))
 
 
+known_client_commands = frozenset({
+    "Connect", "ConnectUpdate", "Sync", "LocationChecks", "LocationScouts", "CreateHints", "UpdateHint",
+    "StatusUpdate", "Say", "GetDataPackage", "Bounce", "Get", "Set", "SetNotify",
+})
+"""commands handled by process_client_cmd, anything else is counted as "invalid" in ServerMetrics"""
+
+
 async def server(websocket: "ServerConnection", path: str = "/", ctx: Context = None) -> None:
     client = Client(websocket, ctx)
     ctx.endpoints.append(client)
@@ -904,11 +1316,16 @@ async def server(websocket: "ServerConnection", path: str = "/", ctx: Context =
         await on_client_connected(ctx, client)
         if ctx.log_network:
             ctx.logger.info("Sent Room Info")
+        metrics = ctx.metrics
         async for data in websocket:
             if ctx.log_network:
                 ctx.logger.info(f"Incoming message: {data}")
-            for msg in decode(data):
+            metrics.bytes_in[metrics.client_key(client)] += len(data)
+            for msg in decode_message(data):
+                start = time.perf_counter()
                 await process_client_cmd(ctx, client, msg)
+                cmd = msg.get("cmd") if isinstance(msg, dict) else None
+                metrics.commands[cmd if cmd in known_client_commands else "invalid"].observe(time.perf_counter() - start)
     except Exception as e:
         if not isinstance(e, websockets.WebSocketException):
             ctx.logger.exception(e)
@@ -1068,19 +1485,24 @@ def get_start_inventory(ctx: Context, player: int, remote_start_inventory: bool)
 
 
 def send_new_items(ctx: Context):
-    for team, clients in ctx.clients.items():
-        for slot, clients in clients.items():
-            for client in clients:
-                if client.no_items:
-                    continue
-                start_inventory = get_start_inventory(ctx, slot, client.remote_start_inventory)
-                items = get_received_items(ctx, team, slot, client.remote_items)
-                if len(start_inventory) + len(items) > client.send_index:
-                    first_new_item = max(0, client.send_index - len(start_inventory))
-                    async_start(ctx.send_msgs(client, [{
-                        "cmd": "ReceivedItems",
-                        "index": client.send_index,
-                        "items": start_inventory[client.send_index:] + items[first_new_item:]}]))
+    dirty_slots, ctx.received_items_dirty = ctx.received_items_dirty, set()
+    for team, slot in dirty_slots:
+        # clients of a slot that need the same items share one encoded message
+        pending_clients: typing.Dict[typing.Tuple[bool, bool, int], typing.List[Client]] = {}
+        for client in ctx.clients.get(team, {}).get(slot, ()):
+            if not client.no_items:
+                key = client.remote_items, client.remote_start_inventory, client.send_index
+                pending_clients.setdefault(key, []).append(client)
+        for (remote_items, remote_start_inventory, send_index), clients in pending_clients.items():
+            start_inventory = get_start_inventory(ctx, slot, remote_start_inventory)
+            items = get_received_items(ctx, team, slot, remote_items)
+            if len(start_inventory) + len(items) > send_index:
+                first_new_item = max(0, send_index - len(start_inventory))
+                ctx.broadcast(clients, [{
+                    "cmd": "ReceivedItems",
+                    "index": send_index,
+                    "items": start_inventory[send_index:] + items[first_new_item:]}])
+                for client in clients:
                     client.send_index = len(start_inventory) + len(items)
 
 
@@ -1129,6 +1551,7 @@ def send_items_to(ctx: Context, team: int, target_slot: int, *items: NetworkItem
             if item.player != target_slot:
                 get_received_items(ctx, team, target, False).append(item)
             get_received_items(ctx, team, target, True).append(item)
+        ctx.received_items_dirty.add((team, target))
 
 
 def register_location_checks(ctx: Context, team: int, slot: int, locations: typing.Iterable[int],
@@ -1173,7 +1596,7 @@ def register_location_checks(ctx: Context, team: int, slot: int, locations: typi
             "checked_locations": new_locations,  # send back new checks only
         }])
         updated_slots: typing.Set[tuple[int, int]] = set()
-        ctx.recheck_hints(team, slot, updated_slots)
+        ctx.recheck_hints(team, slot, updated_slots, new_locations)
         for hint_team, hint_slot in updated_slots:
             ctx.on_changed_hints(hint_team, hint_slot)
         ctx.save()
@@ -1675,6 +2098,7 @@ class ClientMessageProcessor(CommonCommandProcessor):
                 new_item = NetworkItem(names[item_name], -1, self.client.slot)
                 get_received_items(self.ctx, self.client.team, self.client.slot, False).append(new_item)
                 get_received_items(self.ctx, self.client.team, self.client.slot, True).append(new_item)
+                self.ctx.received_items_dirty.add((self.client.team, self.client.slot))
                 self.ctx.broadcast_text_all(
                     'Cheat console: sending "' + item_name + '" to ' + self.ctx.get_aliased_name(self.client.team,
                                                                                                  self.client.slot),
@@ -1917,6 +2341,8 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
             client.no_locations = bool(client.tags & _non_game_messages.keys())
             # set NoText for old PopTracker clients that predate the tag to save traffic
             client.no_text = "NoText" in client.tags or ("PopTracker" in client.tags and client.version < (0, 5, 1))
+            encoding = args.get("encoding", "json")
+            client.encoding = encoding if isinstance(encoding, str) and encoding in wire_encoders else "json"
             connected_packet = {
                 "cmd": "Connected",
                 "team": client.team, "slot": client.slot,
@@ -1925,6 +2351,7 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
                 "checked_locations": get_checked_checks(ctx, team, slot),
                 "slot_info": ctx.slot_info,
                 "hint_points": get_slot_points(ctx, team, slot),
+                "encoding": client.encoding,
             }
             reply = [connected_packet]
             start_inventory = get_start_inventory(ctx, slot, client.remote_start_inventory)
@@ -1942,15 +2369,15 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
     elif cmd == "GetDataPackage":
         exclusions = args.get("exclusions", [])
         if "games" in args:
-            games = {name: game_data for name, game_data in ctx.gamespackage.items()
-                     if name in set(args.get("games", []))}
+            games = games_package_to_dict({name: game_data for name, game_data in ctx.gamespackage.items()
+                                           if name in set(args.get("games", []))})
             await ctx.send_msgs(client, [{"cmd": "DataPackage",
                                           "data": {"games": games}}])
         # TODO: remove exclusions behaviour around 0.5.0
         elif exclusions:
             exclusions = set(exclusions)
-            games = {name: game_data for name, game_data in ctx.gamespackage.items()
-                     if name not in exclusions}
+            games = games_package_to_dict({name: game_data for name, game_data in ctx.gamespackage.items()
+                                           if name not in exclusions})
 
             package = {"games": games}
             await ctx.send_msgs(client, [{"cmd": "DataPackage",
@@ -1958,7 +2385,7 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
 
         else:
             await ctx.send_msgs(client, [{"cmd": "DataPackage",
-                                          "data": {"games": ctx.gamespackage}}])
+                                          "data": {"games": games_package_to_dict(ctx.gamespackage)}}])
 
     elif client.auth:
         if cmd == "ConnectUpdate":
@@ -2151,7 +2578,7 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
             tags = set(args.get("tags", []))
             slots = set(args.get("slots", []))
             args["cmd"] = "Bounced"
-            msg = ctx.dumper([args])
+            msg = EncodedMessages([args], ctx.dumper([args]))
 
             for bounceclient in ctx.endpoints:
                 if client.team == bounceclient.team and (ctx.games[bounceclient.slot] in games or
@@ -2187,6 +2614,7 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
                 func = modify_functions[operation["operation"]]
                 value = func(value, operation["value"])
             ctx.stored_data[args["key"]] = args["value"] = value
+            ctx.stored_data_changed.add(args["key"])
             targets = set(ctx.stored_data_notification_clients[args["key"]])
             if args.get("want_reply", False):
                 targets.add(client)
@@ -2258,7 +2686,8 @@ class ServerCommandProcessor(CommonCommandProcessor):
     def _cmd_exit(self) -> bool:
         """Shutdown the server"""
         try:
-            self.ctx.server.ws_server.close()
+            if self.ctx.server:  # rooms on a shared listener of a WebHost hoster have no server of their own
+                self.ctx.server.ws_server.close()
         finally:
             self.ctx.exit_event.set()
         return True
@@ -2556,6 +2985,23 @@ class ServerCommandProcessor(CommonCommandProcessor):
                         f"approximately totaling {Utils.format_SI_prefix(total, power=1024)}B")
         self.output("\n".join(texts))
 
+    def _cmd_metrics(self):
+        """Debug Tool: show per command processing times, traffic per slot, autosave timings and event loop lag."""
+        metrics = self.ctx.metrics
+        texts = ["Client commands:"]
+        for command, histogram in sorted(metrics.commands.items()):
+            texts.append(f"  {command}: {histogram.summary()}")
+        texts.append("Operations:")
+        for operation, histogram in sorted(metrics.timings.items()):
+            texts.append(f"  {operation}: {histogram.summary()}")
+        texts.append("Traffic before compression:")
+        for key in sorted(metrics.bytes_in.keys() | metrics.bytes_out.keys(), key=lambda key: key or (-1, -1)):
+            name = "Not connected to a slot" if key is None else self.ctx.get_aliased_name(*key)
+            texts.append(f"  {name}: in {Utils.format_SI_prefix(metrics.bytes_in[key], power=1024)}B, "
+                         f"out {Utils.format_SI_prefix(metrics.bytes_out[key], power=1024)}B")
+        texts.append(f"Event loop lag: {metrics.loop_lag.summary()}")
+        self.output("\n".join(texts))
+
 
 async def console(ctx: Context):
     import sys
@@ -2591,6 +3037,9 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument('--password', default=defaults["password"])
     parser.add_argument('--savefile', default=defaults["savefile"])
     parser.add_argument('--disable_save', default=defaults["disable_save"], action='store_true')
+    parser.add_argument('--save_journal_entries', default=defaults["save_journal_entries"], type=int,
+                        help="write autosaves as a journal of changes, with a full save after this many entries. "
+                             "0 to always write full saves.")
     parser.add_argument('--cert', help="Path to a SSL Certificate for encryption.")
     parser.add_argument('--cert_key', help="Path to SSL Certificate Key file")
     parser.add_argument('--loglevel', default=defaults["loglevel"],
@@ -2645,6 +3094,9 @@ def parse_args() -> argparse.Namespace:
     #0 -> recommended for tournaments to force a level playing field, only allow an exact version match
     """)
     parser.add_argument('--log_network', default=defaults["log_network"], action="store_true")
+    parser.add_argument('--metrics_port', default=defaults["metrics_port"], type=int,
+                        help="serve server metrics in Prometheus text format on http://127.0.0.1:<port>/metrics. "
+                             "0 to disable.")
     args = parser.parse_args()
     return args
 
@@ -2654,7 +3106,8 @@ async def auto_shutdown(ctx, to_cancel=None):
         await asyncio.wait_for(ctx.exit_event.wait(), ctx.auto_shutdown)
 
     def inactivity_shutdown():
-        ctx.server.ws_server.close()
+        if ctx.server:  # rooms on a shared listener of a WebHost hoster have no server of their own
+            ctx.server.ws_server.close()
         ctx.exit_event.set()
         if to_cancel:
             for task in to_cancel:
@@ -2721,6 +3174,7 @@ async def main(args: argparse.Namespace):
         logging.exception(f"Failed to read multiworld data ({e})")
         raise
 
+    ctx.save_journal_entries = args.save_journal_entries
     ctx.init_save(not args.disable_save)
 
     ssl_context = load_server_cert(args.cert, args.cert_key) if args.cert else None
@@ -2738,6 +3192,12 @@ async def main(args: argparse.Namespace):
 
     await ctx.server
     console_task = asyncio.create_task(console(ctx))
+    lag_task = asyncio.create_task(monitor_event_loop_lag(ctx.metrics))
+    metrics_server = None
+    if args.metrics_port:
+        metrics_server = await serve_metrics(lambda: ServerMetrics.format_prometheus(ctx.metrics.collect()),
+                                             args.metrics_port)
+        logging.info(f"Serving metrics at http://127.0.0.1:{args.metrics_port}/metrics")
     if ctx.auto_shutdown:
         ctx.shutdown_task = asyncio.create_task(auto_shutdown(ctx, [console_task]))
 
@@ -2762,6 +3222,9 @@ async def main(args: argparse.Namespace):
 
     await ctx.exit_event.wait()
     console_task.cancel()
+    lag_task.cancel()
+    if metrics_server:
+        metrics_server.close()
     if ctx.shutdown_task:
         await ctx.shutdown_task
 
@@ -2769,6 +3232,8 @@ async def main(args: argparse.Namespace):
 client_message_processor = ClientMessageProcessor
 
 if __name__ == '__main__':
+    # only import the worlds of the games being hosted, see worlds.lazy_loading
+    os.environ.setdefault("ARCHIPELAGO_LAZY_WORLDS", "1")
     try:
         asyncio.run(main(parse_args()))
     except asyncio.exceptions.CancelledError:
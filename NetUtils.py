@@ -1,15 +1,21 @@
 from __future__ import annotations
 
-from collections.abc import Mapping, Sequence
+from collections.abc import Mapping, MutableMapping, Sequence
+import bisect
+import functools
 import typing
 import enum
+import struct
 import warnings
+import zlib
 from json import JSONEncoder, JSONDecoder
 
+import msgpack
+
 if typing.TYPE_CHECKING:
     from websockets import WebSocketServerProtocol as ServerConnection
 
-from Utils import ByValue, Version
+from Utils import ByValue, Version, VersionException, restricted_dumps, restricted_loads
 
 
 class HintStatus(ByValue, enum.IntEnum):
@@ -174,12 +180,15 @@ decode = JSONDecoder(object_hook=_object_hook).decode
 
 
 class Endpoint:
-    __slots__ = ("socket",)
+    __slots__ = ("socket", "encoding")
 
     socket: "ServerConnection"
+    encoding: str
+    """wire encoding of messages sent to this endpoint, see wire_encoders"""
 
     def __init__(self, socket):
         self.socket = socket
+        self.encoding = "json"
 
 
 class HandlerMeta(type):
@@ -414,7 +423,130 @@ class Hint(typing.NamedTuple):
         return self.receiving_player == self.finding_player
 
 
+msgpack_ext_types: dict[int, type[tuple]] = {
+    1: NetworkItem,
+    2: NetworkPlayer,
+    3: NetworkSlot,
+    4: Hint,
+    5: Version,
+}
+"""msgpack extension type codes of NamedTuples, encoded as an array of their fields"""
+_msgpack_ext_codes = {cls: code for code, cls in msgpack_ext_types.items()}
+
+
+def _msgpack_default(obj: typing.Any) -> typing.Any:
+    code = _msgpack_ext_codes.get(type(obj))
+    if code is not None:
+        return msgpack.ExtType(code, _msgpack_packb(tuple(obj)))
+    if isinstance(obj, tuple) and hasattr(obj, "_fields"):
+        data = obj._asdict()
+        data["class"] = obj.__class__.__name__
+        return data
+    # strict types only packs exact base types natively, everything else is converted like JSONEncoder would
+    if isinstance(obj, (tuple, list, set, frozenset)):
+        return list(obj)
+    if isinstance(obj, dict):
+        return dict(obj)
+    if isinstance(obj, str):
+        return str(obj)
+    if isinstance(obj, int):
+        return int(obj)
+    if isinstance(obj, float):
+        return float(obj)
+    raise TypeError(f"Object of type {obj.__class__.__name__} is not msgpack serializable")
+
+
+def _json_key(key: typing.Any) -> str:
+    if isinstance(key, str):
+        return key
+    if key is None or isinstance(key, bool):
+        return {None: "null", True: "true", False: "false"}[key]
+    if isinstance(key, float):
+        return float.__repr__(key)
+    return int.__repr__(key)
+
+
+def _msgpack_object_hook(o: dict) -> typing.Any:
+    # JSON only has str keys, so msgpack messages decode to the same as their JSON counterparts
+    for key in o:
+        if type(key) is not str:
+            o = {_json_key(key): value for key, value in o.items()}
+            break
+    return _object_hook(o) if "class" in o else o
+
+
+def _msgpack_ext_hook(code: int, data: bytes) -> typing.Any:
+    cls = msgpack_ext_types.get(code)
+    if cls is None:
+        return msgpack.ExtType(code, data)
+    values = _msgpack_unpackb(data)
+    if cls is Version or cls.__name__ in allowlist:
+        return cls(*values)
+    # NamedTuples not in the allowlist decode as dict, same as JSON
+    data = dict(zip(cls._fields, values))
+    data["class"] = cls.__name__
+    return data
+
+
+_msgpack_packb = functools.partial(msgpack.packb, default=_msgpack_default, strict_types=True)
+_msgpack_unpackb = functools.partial(msgpack.unpackb, ext_hook=_msgpack_ext_hook, object_hook=_msgpack_object_hook,
+                                     strict_map_key=False)
+
+
+def encode_msgpack(obj: typing.Any) -> bytes | str:
+    """
+    Encodes obj as msgpack, falling back to JSON for content msgpack can't represent, like integers above 64 bits.
+    Receivers tell the encodings apart by websocket frame type, binary for msgpack and text for JSON.
+    """
+    try:
+        return _msgpack_packb(obj)
+    except (OverflowError, ValueError):
+        return encode(obj)
+
+
+def decode_msgpack(data: bytes) -> typing.Any:
+    return _msgpack_unpackb(data)
+
+
+def decode_message(data: str | bytes) -> typing.Any:
+    """Decodes a message received over websocket, which is msgpack if it is binary and JSON otherwise."""
+    if isinstance(data, bytes):
+        return decode_msgpack(data)
+    return decode(data)
+
+
+wire_encoders: dict[str, typing.Callable[[typing.Any], str | bytes]] = {
+    "json": encode,
+    "msgpack": encode_msgpack,
+}
+"""Encodings that can be negotiated in Connect, JSON is used unless another is requested."""
+
+
+class EncodedMessages:
+    """Messages sent to multiple endpoints, encoded once per wire encoding when first needed."""
+    __slots__ = ("msgs", "_encoded")
+
+    msgs: typing.Any
+    _encoded: dict[str, str | bytes]
+
+    def __init__(self, msgs: typing.Any, json: str | None = None) -> None:
+        self.msgs = msgs
+        self._encoded = {} if json is None else {"json": json}
+
+    def get(self, encoding: str) -> str | bytes:
+        try:
+            return self._encoded[encoding]
+        except KeyError:
+            data = self._encoded[encoding] = wire_encoders[encoding](self.msgs)
+            return data
+
+
 class _LocationStore(dict, typing.MutableMapping[int, typing.Dict[int, typing.Tuple[int, int, int]]]):
+    _receiver_index: typing.Optional[typing.Dict[int, typing.Dict[int, typing.List[typing.Tuple[int, int, int]]]]]
+    """receiving player -> item id -> [(finding player, location id, item flags), ...]"""
+    _receiver_locations: typing.Optional[typing.Dict[int, typing.Dict[int, typing.Set[int]]]]
+    """receiving player -> finding player -> location ids"""
+
     def __init__(self, values: typing.MutableMapping[int, typing.Dict[int, typing.Tuple[int, int, int]]]):
         super().__init__(values)
 
@@ -427,21 +559,38 @@ class _LocationStore(dict, typing.MutableMapping[int, typing.Dict[int, typing.Tu
         if len(self.get(0, {})):
             raise ValueError("Invalid player id 0 for location")
 
-    def find_item(self, slots: typing.Set[int], seeked_item_id: int
-                  ) -> typing.Generator[typing.Tuple[int, int, int, int, int], None, None]:
+        self._receiver_index = None
+        self._receiver_locations = None
+
+    def build_receiver_index(self) -> None:
+        """
+        Builds the index used by find_item and get_for_player, if it was not built yet.
+        Locations must not be modified afterwards.
+        """
+        if self._receiver_index is not None:
+            return
+        receiver_index: typing.Dict[int, typing.Dict[int, typing.List[typing.Tuple[int, int, int]]]] = {}
+        receiver_locations: typing.Dict[int, typing.Dict[int, typing.Set[int]]] = {}
         for finding_player, check_data in self.items():
             for location_id, (item_id, receiving_player, item_flags) in check_data.items():
-                if receiving_player in slots and item_id == seeked_item_id:
-                    yield finding_player, location_id, item_id, receiving_player, item_flags
+                receiver_index.setdefault(receiving_player, {}).setdefault(item_id, []).append(
+                    (finding_player, location_id, item_flags))
+                receiver_locations.setdefault(receiving_player, {}).setdefault(finding_player, set()).add(location_id)
+        self._receiver_index = receiver_index
+        self._receiver_locations = receiver_locations
+
+    def find_item(self, slots: typing.Set[int], seeked_item_id: int
+                  ) -> typing.Generator[typing.Tuple[int, int, int, int, int], None, None]:
+        self.build_receiver_index()
+        for receiving_player in slots:
+            for finding_player, location_id, item_flags in \
+                    self._receiver_index.get(receiving_player, {}).get(seeked_item_id, ()):
+                yield finding_player, location_id, seeked_item_id, receiving_player, item_flags
 
     def get_for_player(self, slot: int) -> typing.Dict[int, typing.Set[int]]:
-        import collections
-        all_locations: typing.Dict[int, typing.Set[int]] = collections.defaultdict(set)
-        for source_slot, location_data in self.items():
-            for location_id, values in location_data.items():
-                if values[1] == slot:
-                    all_locations[source_slot].add(location_id)
-        return all_locations
+        self.build_receiver_index()
+        return {source_slot: set(location_ids)
+                for source_slot, location_ids in self._receiver_locations.get(slot, {}).items()}
 
     def get_checked(self, state: typing.Dict[typing.Tuple[int, int], typing.Set[int]], team: int, slot: int
                     ) -> typing.List[int]:
@@ -510,6 +659,390 @@ class MultiData(typing.TypedDict):
     race_mode: int
 
 
+multidata_format_version = 4
+"""version of the .archipelago format written by encode_multidata, stored in its first byte"""
+_multidata_header = struct.Struct("<BI")
+_multidata_split_sections = frozenset({"slot_data"})
+"""sections that get compressed per slot, so one slot can be decoded without the others"""
+
+MultiDataIndex = typing.Dict[typing.Any, typing.Union[typing.Tuple[int, int], "MultiDataIndex"]]
+
+
+def encode_multidata(multidata: Mapping[str, typing.Any]) -> bytes:
+    """
+    Serializes multidata into the sectioned .archipelago format.
+    Layout: format version byte, length of the index, compressed index, then each section compressed on its own.
+    The index maps section names to (offset, length) of their chunk, or to a nested index for per slot sections.
+    """
+    chunks: typing.List[bytes] = []
+    offset = 0
+
+    def add_chunk(value: typing.Any) -> typing.Tuple[int, int]:
+        nonlocal offset
+        chunk = zlib.compress(restricted_dumps(value), 9)
+        chunks.append(chunk)
+        location = offset, len(chunk)
+        offset += len(chunk)
+        return location
+
+    index: MultiDataIndex = {}
+    for section, value in multidata.items():
+        if section in _multidata_split_sections:
+            index[section] = {key: add_chunk(sub_value) for key, sub_value in value.items()}
+        else:
+            index[section] = add_chunk(value)
+    encoded_index = zlib.compress(restricted_dumps(index), 9)
+    return b"".join((_multidata_header.pack(multidata_format_version, len(encoded_index)), encoded_index, *chunks))
+
+
+def decode_multidata(data: bytes) -> MutableMapping[str, typing.Any]:
+    """
+    Deserializes an .archipelago file's content.
+    Sectioned files are decoded lazily, see MultiDataSections, older formats are decoded completely.
+    """
+    format_version = data[0]
+    if format_version > multidata_format_version:
+        raise VersionException("Incompatible multidata.")
+    if format_version < 4:
+        return restricted_loads(zlib.decompress(data[1:]))
+    _, index_length = _multidata_header.unpack_from(data)
+    index_end = _multidata_header.size + index_length
+    index = restricted_loads(zlib.decompress(data[_multidata_header.size:index_end]))
+    return MultiDataSections(memoryview(data)[index_end:], index)
+
+
+class MultiDataSections(MutableMapping[typing.Any, typing.Any]):
+    """
+    Mapping over the sections of a sectioned .archipelago file,
+    which decompresses and unpickles each section when it is first accessed.
+    """
+    __slots__ = ("_data", "_index", "_decoded")
+    _data: memoryview
+    _index: MultiDataIndex
+    _decoded: typing.Dict[typing.Any, typing.Any]
+
+    def __init__(self, data: memoryview, index: MultiDataIndex) -> None:
+        self._data = data
+        self._index = index
+        self._decoded = {}
+
+    def __getitem__(self, key: typing.Any) -> typing.Any:
+        if key in self._decoded:
+            return self._decoded[key]
+        location = self._index[key]
+        if isinstance(location, dict):
+            value = MultiDataSections(self._data, location)
+        else:
+            offset, length = location
+            value = restricted_loads(zlib.decompress(self._data[offset:offset + length]))
+        self._decoded[key] = value
+        return value
+
+    def __setitem__(self, key: typing.Any, value: typing.Any) -> None:
+        self._decoded[key] = value
+
+    def __delitem__(self, key: typing.Any) -> None:
+        if key not in self:
+            raise KeyError(key)
+        self._decoded.pop(key, None)
+        self._index.pop(key, None)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._decoded or key in self._index
+
+    def __iter__(self) -> typing.Iterator[typing.Any]:
+        yield from self._index
+        for key in self._decoded:
+            if key not in self._index:
+                yield key
+
+    def __len__(self) -> int:
+        return len(self._index) + sum(key not in self._index for key in self._decoded)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({list(self)})"
+
+
+data_package_format_version = 1
+"""version of the memory-mappable data package format written by write_mapped_data_package"""
+_data_package_header = struct.Struct("<4sIQ")
+_data_package_magic = b"APDP"
+
+
+def _align(offset: int) -> int:
+    return -offset % 8
+
+
+def write_mapped_data_package(path: str, games: Mapping[str, Mapping[str, typing.Any]]) -> None:
+    """
+    Writes the id and name lookups of the data package games into an immutable file that can be memory mapped.
+    Layout: magic, format version, length of the index, the json index, then one table each for the items and locations
+    of each game. A table consists of the ids sorted, the name index of each id, the id of each name, the offsets of the
+    names and the utf-8 names sorted by their encoding, so both directions can be looked up by binary search.
+    The file is written to a temporary path first, so readers never see an incomplete file.
+    """
+    import json
+    import os
+    chunks: typing.List[bytes] = []
+    offset = 0
+
+    def add_table(name_to_id: Mapping[str, int]) -> typing.List[int]:
+        nonlocal offset
+        id_to_name = {code: name for name, code in name_to_id.items()}
+        names = sorted(name.encode("utf-8") for name in name_to_id)
+        name_index = {name.decode("utf-8"): index for index, name in enumerate(names)}
+        ids = sorted(id_to_name)
+        name_offsets = [0]
+        for name in names:
+            name_offsets.append(name_offsets[-1] + len(name))
+        table = b"".join((
+            struct.pack(f"<{len(ids)}q", *ids),
+            struct.pack(f"<{len(ids)}I", *(name_index[id_to_name[code]] for code in ids)),
+            bytes(_align(len(ids) * 12)),
+            struct.pack(f"<{len(names)}q", *(name_to_id[name.decode("utf-8")] for name in names)),
+            struct.pack(f"<{len(names) + 1}I", *name_offsets),
+            *names,
+        ))
+        table += bytes(_align(len(table)))
+        chunks.append(table)
+        location = [offset, len(ids), len(names)]
+        offset += len(table)
+        return location
+
+    index: typing.Dict[str, typing.Dict[str, typing.Any]] = {}
+    for game, game_package in games.items():
+        index[game] = {
+            "checksum": game_package.get("checksum"),
+            "item_name_to_id": add_table(game_package["item_name_to_id"]),
+            "location_name_to_id": add_table(game_package["location_name_to_id"]),
+        }
+    encoded_index = json.dumps(index, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    encoded_index += b" " * _align(_data_package_header.size + len(encoded_index))
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(_data_package_header.pack(_data_package_magic, data_package_format_version, len(encoded_index)))
+        f.write(encoded_index)
+        f.writelines(chunks)
+    os.replace(temp_path, path)
+
+
+_mapped_data_packages: typing.Dict[str, MappedDataPackage] = {}
+
+
+def load_mapped_data_package(path: str) -> MappedDataPackage:
+    """Memory maps a file written by write_mapped_data_package. Each file is only mapped once per process."""
+    mapped = _mapped_data_packages.get(path)
+    if mapped is None:
+        mapped = _mapped_data_packages[path] = MappedDataPackage(path)
+    return mapped
+
+
+class MappedDataPackage(Mapping[str, "MappedGamePackage"]):
+    """
+    Read-only games package backed by a memory mapped file, see write_mapped_data_package.
+    All processes mapping the same file share its pages, and pickling it only pickles the path.
+    """
+    __slots__ = ("path", "_data", "_index", "_games")
+    path: str
+    _data: memoryview
+    _index: typing.Dict[str, typing.Dict[str, typing.Any]]
+    _games: typing.Dict[str, MappedGamePackage]
+
+    def __init__(self, path: str) -> None:
+        import json
+        import mmap
+        self.path = path
+        with open(path, "rb") as f:
+            self._data = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        magic, format_version, index_length = _data_package_header.unpack_from(self._data)
+        if magic != _data_package_magic:
+            raise ValueError(f"{path} is not a data package file.")
+        if format_version != data_package_format_version:
+            raise VersionException(f"Incompatible data package file {path}.")
+        index_end = _data_package_header.size + index_length
+        self._index = json.loads(bytes(self._data[_data_package_header.size:index_end]))
+        self._data = self._data[index_end:]
+        self._games = {}
+
+    def __getitem__(self, game: str) -> MappedGamePackage:
+        game_package = self._games.get(game)
+        if game_package is None:
+            index = self._index[game]
+            game_package = self._games[game] = MappedGamePackage(
+                self, game, index["checksum"],
+                _MappedNameTable(self._data, *index["item_name_to_id"]),
+                _MappedNameTable(self._data, *index["location_name_to_id"]))
+        return game_package
+
+    def __contains__(self, game: object) -> bool:
+        return game in self._index
+
+    def __iter__(self) -> typing.Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __reduce__(self) -> typing.Tuple[typing.Callable[[str], MappedDataPackage], typing.Tuple[str]]:
+        return load_mapped_data_package, (self.path,)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.path!r})"
+
+
+class _MappedNameTable:
+    """One id and name table of a mapped data package file."""
+    __slots__ = ("ids", "id_names", "name_ids", "name_offsets", "names")
+    ids: memoryview
+    id_names: memoryview
+    name_ids: memoryview
+    name_offsets: memoryview
+    names: memoryview
+
+    def __init__(self, data: memoryview, offset: int, id_count: int, name_count: int) -> None:
+        self.ids = data[offset:offset + id_count * 8].cast("q")
+        offset += id_count * 8
+        self.id_names = data[offset:offset + id_count * 4].cast("I")
+        offset += id_count * 4
+        offset += _align(offset)
+        self.name_ids = data[offset:offset + name_count * 8].cast("q")
+        offset += name_count * 8
+        self.name_offsets = data[offset:offset + (name_count + 1) * 4].cast("I")
+        offset += (name_count + 1) * 4
+        self.names = data[offset:offset + self.name_offsets[-1]]
+
+    def name(self, index: int) -> str:
+        return str(self.names[self.name_offsets[index]:self.name_offsets[index + 1]], "utf-8")
+
+    def find_name(self, name: str) -> int:
+        """Returns the index of name in the sorted names, or -1 if it isn't in the table."""
+        encoded = name.encode("utf-8")
+        names, name_offsets = self.names, self.name_offsets
+        low, high = 0, len(self.name_ids)
+        while low < high:
+            middle = (low + high) // 2
+            if names[name_offsets[middle]:name_offsets[middle + 1]].tobytes() < encoded:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self.name_ids) and names[name_offsets[low]:name_offsets[low + 1]] == encoded:
+            return low
+        return -1
+
+
+class MappedNameToId(Mapping[str, int]):
+    """name -> id lookup of a mapped data package, iterating names in the order of their utf-8 encoding"""
+    __slots__ = ("_table",)
+    _table: _MappedNameTable
+
+    def __init__(self, table: _MappedNameTable) -> None:
+        self._table = table
+
+    def __getitem__(self, name: str) -> int:
+        index = self._table.find_name(name) if isinstance(name, str) else -1
+        if index < 0:
+            raise KeyError(name)
+        return self._table.name_ids[index]
+
+    def __iter__(self) -> typing.Iterator[str]:
+        return map(self._table.name, range(len(self._table.name_ids)))
+
+    def __len__(self) -> int:
+        return len(self._table.name_ids)
+
+    @property
+    def inverse(self) -> MappedIdToName:
+        """id -> name lookup of the same table"""
+        return MappedIdToName(self._table)
+
+    def to_dict(self) -> typing.Dict[str, int]:
+        return dict(zip(self, self._table.name_ids))
+
+
+class MappedIdToName(Mapping[int, str]):
+    """id -> name lookup of a mapped data package, iterating ids in ascending order"""
+    __slots__ = ("_table",)
+    _table: _MappedNameTable
+
+    def __init__(self, table: _MappedNameTable) -> None:
+        self._table = table
+
+    def __getitem__(self, code: int) -> str:
+        ids = self._table.ids
+        index = bisect.bisect_left(ids, code) if isinstance(code, int) else len(ids)
+        if index == len(ids) or ids[index] != code:
+            raise KeyError(code)
+        return self._table.name(self._table.id_names[index])
+
+    def __iter__(self) -> typing.Iterator[int]:
+        return iter(self._table.ids)
+
+    def __len__(self) -> int:
+        return len(self._table.ids)
+
+
+class MappedGamePackage(Mapping[str, typing.Any]):
+    """
+    A game of a MappedDataPackage, with "checksum", "item_name_to_id" and "location_name_to_id" like a GamesPackage,
+    and the reverse lookups as attributes.
+    """
+    __slots__ = ("data_package", "game", "checksum", "item_name_to_id", "location_name_to_id",
+                 "item_id_to_name", "location_id_to_name")
+    data_package: MappedDataPackage
+    game: str
+    checksum: str | None
+    item_name_to_id: MappedNameToId
+    location_name_to_id: MappedNameToId
+    item_id_to_name: MappedIdToName
+    location_id_to_name: MappedIdToName
+
+    _keys = ("item_name_to_id", "location_name_to_id", "checksum")
+
+    def __init__(self, data_package: MappedDataPackage, game: str, checksum: str | None,
+                 items: _MappedNameTable, locations: _MappedNameTable) -> None:
+        self.data_package = data_package
+        self.game = game
+        self.checksum = checksum
+        self.item_name_to_id = MappedNameToId(items)
+        self.location_name_to_id = MappedNameToId(locations)
+        self.item_id_to_name = self.item_name_to_id.inverse
+        self.location_id_to_name = self.location_name_to_id.inverse
+
+    def __getitem__(self, key: str) -> typing.Any:
+        if key not in self._keys or (key == "checksum" and self.checksum is None):
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self) -> typing.Iterator[str]:
+        return (key for key in self._keys if key in self)
+
+    def __len__(self) -> int:
+        return len(self._keys) - (self.checksum is None)
+
+    def __reduce__(self) -> typing.Tuple[typing.Callable[..., MappedGamePackage], typing.Tuple[str, ...]]:
+        return _load_mapped_game_package, (self.data_package.path, self.game)
+
+    def to_dict(self) -> GamesPackage:
+        """Copies the lookups into a GamesPackage, to be sent to clients."""
+        game_package: GamesPackage = {
+            "item_name_to_id": self.item_name_to_id.to_dict(),
+            "location_name_to_id": self.location_name_to_id.to_dict(),
+        }
+        if self.checksum is not None:
+            game_package["checksum"] = self.checksum
+        return game_package
+
+
+def _load_mapped_game_package(path: str, game: str) -> MappedGamePackage:
+    return load_mapped_data_package(path)[game]
+
+
+def games_package_to_dict(games: Mapping[str, Mapping[str, typing.Any]]) -> typing.Dict[str, GamesPackage]:
+    """Returns games for sending, with mapped games copied into dicts."""
+    return {game: game_package.to_dict() if isinstance(game_package, MappedGamePackage) else game_package
+            for game, game_package in games.items()}
+
+
 if typing.TYPE_CHECKING:  # type-check with pure python implementation until we have a typing stub
     LocationStore = _LocationStore
 else:
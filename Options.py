@@ -167,6 +167,10 @@ class Option(typing.Generic[T], metaclass=AssembleOptions):
     # can be weighted between selections
     supports_weighting = True
 
+    # Generate may reuse an instance created and verified from an identical container value for other players.
+    # Needs to be False if from_any or verify roll randomness or depend on the player, like logging their name.
+    cacheable = True
+
     rich_text_doc: typing.Optional[bool] = None
     """Whether the WebHost should render the Option's docstring as rich text.
 
@@ -1078,6 +1082,7 @@ PlandoTextsFromAnyType = typing.Union[
 class PlandoTexts(Option[typing.List[PlandoText]], VerifyKeys):
     default = ()
     supports_weighting = False
+    cacheable = False
     display_name = "Plando Texts"
 
     visibility = Visibility.template | Visibility.complex_ui | Visibility.spoiler
@@ -1204,6 +1209,7 @@ class PlandoConnections(Option[typing.List[PlandoConnection]], metaclass=Connect
 
     default = ()
     supports_weighting = False
+    cacheable = False
 
     entrances: typing.ClassVar[typing.AbstractSet[str]]
     exits: typing.ClassVar[typing.AbstractSet[str]]
@@ -1585,6 +1591,7 @@ class PlandoItems(Option[typing.List[PlandoItem]]):
     """Generic items plando."""
     default = ()
     supports_weighting = False
+    cacheable = False
     display_name = "Plando Items"
     visibility = Visibility.template | Visibility.spoiler
 
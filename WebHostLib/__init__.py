@@ -38,6 +38,11 @@ app.config["MAX_FORM_MEMORY_SIZE"] = 2 * 1024 * 1024  # 2 MB, needed for large o
 app.config["SELFHOST"] = True  # application process is in charge of running the websites
 app.config["GENERATORS"] = 8  # maximum concurrent world gens
 app.config["HOSTERS"] = 8  # maximum concurrent room hosters
+# if set, room hosters serve Prometheus metrics on localhost at this port plus their index. 0 to disable.
+app.config["METRICS_PORT"] = 0
+# if set, room hosters accept connections for all their rooms on this port plus their index,
+# routed by the room id in the path, as in host:port/<room id>. 0 gives every room its own port.
+app.config["HOSTER_SHARED_PORT"] = 0
 app.config["SELFLAUNCH"] = True  # application process is in charge of launching Rooms.
 app.config["SELFLAUNCHCERT"] = None  # can point to a SSL Certificate to encrypt Room websocket connections
 app.config["SELFLAUNCHKEY"] = None  # can point to a SSL Certificate Key to encrypt Room websocket connections
@@ -46,6 +51,13 @@ app.config["SELFGEN"] = True  # application process is in charge of scheduling G
 app.config["JOB_THRESHOLD"] = 1
 # after what time in seconds should generation be aborted, freeing the queue slot. Can be set to None to disable.
 app.config["JOB_TIME"] = 600
+# generations estimated to cost at most this much use the small jobs lane. Cost is the amount of worlds,
+# each weighted by GENERATION_GAME_COSTS
+app.config["SMALL_JOB_COST"] = 4
+# how many of the GENERATORS only take small jobs, so those are not stuck behind large ones
+app.config["SMALL_JOB_GENERATORS"] = 1
+# relative generation cost of a world per game, games not listed cost 1
+app.config["GENERATION_GAME_COSTS"] = {}
 # maximum time in seconds since last activity for a room to be hosted
 app.config["MAX_ROOM_TIMEOUT"] = 259200
 # memory limit for generator processes in bytes
@@ -91,6 +103,17 @@ class B64UUIDConverter(BaseConverter):
 # short UUID
 app.url_map.converters["suuid"] = B64UUIDConverter
 app.jinja_env.filters["suuid"] = to_url
+
+
+def get_room_address(room: typing.Any) -> str:
+    """Returns the address clients connect to for a running room."""
+    address = f"{app.config['HOST_ADDRESS']}:{room.last_port}"
+    if app.config["HOSTER_SHARED_PORT"]:
+        address += f"/{to_url(room.id)}"
+    return address
+
+
+app.jinja_env.globals["get_room_address"] = get_room_address
 app.jinja_env.filters["title_sorted"] = title_sorted
 
 
@@ -1,16 +1,22 @@
 from __future__ import annotations
 
+import itertools
 import json
 import logging
 import multiprocessing
+import sys
+import time
 import typing
+from dataclasses import dataclass
 from datetime import timedelta
+from multiprocessing.connection import Connection
 from threading import Event, Thread
 from typing import Any
 from uuid import UUID
 
-from pony.orm import db_session, select, commit, PrimaryKey, desc
+from pony.orm import db_session, select, commit, desc
 
+import Utils
 from Utils import restricted_loads, utcnow
 from .locker import Locker, AlreadyRunningException
 
@@ -36,45 +42,229 @@ def handle_generation_failure(result: BaseException):
         logging.exception(e)
 
 
-def _mp_gen_game(
-    gen_options: dict,
-    meta: dict[str, Any] | None = None,
-    owner=None,
-    sid=None,
-    timeout: int|None = None,
-) -> PrimaryKey | None:
-    from setproctitle import setproctitle
+def estimate_generation_cost(gen_options: dict[str, dict[str, Any]], game_costs: dict[str, float]) -> float:
+    """Estimate how expensive a generation is, as its player count weighted by the relative cost of their games."""
+    return sum(game_costs.get(options.get("game"), 1.0) for options in gen_options.values())
 
-    setproctitle(f"Generator ({sid})")
-    try:
-        return gen_game(gen_options, meta=meta, owner=owner, sid=sid, timeout=timeout)
-    finally:
-        setproctitle(f"Generator (idle)")
+
+def _reset_peak_rss() -> None:
+    try:  # resets VmHWM of this process on linux
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+    except OSError:
+        pass
 
 
-def launch_generator(pool: multiprocessing.pool.Pool, generation: Generation, timeout: int|None) -> None:
+def _get_peak_rss() -> int | None:
+    """Returns the peak resident memory of this process in bytes, since the last reset where supported."""
     try:
-        meta = json.loads(generation.meta)
-        options = restricted_loads(generation.options)
-        logging.info(f"Generating {generation.id} for {len(options)} players")
-        pool.apply_async(
-            _mp_gen_game,
-            (options,),
-            {
-                "meta": meta,
-                "sid": generation.id,
-                "owner": generation.owner,
-                "timeout": timeout,
-            },
-            handle_generation_success,
-            handle_generation_failure,
-        )
-    except Exception as e:
-        generation.state = STATE_ERROR
-        commit()
-        logging.exception(e)
-    else:
-        generation.state = STATE_STARTED
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ModuleNotFoundError:
+        return None  # unix only module
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def _run_generator(config: dict[str, Any], connection: Connection, max_jobs: int) -> None:
+    """Generator process main loop, running up to max_jobs generations sent over connection before exiting."""
+    from setproctitle import setproctitle
+
+    init_generator(config)
+    for _ in range(max_jobs):
+        try:
+            gen_options, meta, sid, owner = connection.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+        setproctitle(f"Generator ({sid})")
+        _reset_peak_rss()
+        start = time.perf_counter()
+        seed_id: UUID | None = None
+        error: str | None = None
+        try:
+            # the timeout is enforced by the scheduler killing this process
+            seed_id = gen_game(gen_options, meta=meta, owner=owner, sid=sid, timeout=None)
+        except (KeyboardInterrupt, SystemExit):
+            return
+        except BaseException as e:
+            handle_generation_failure(e)
+            error = format_exception(e)
+        else:
+            handle_generation_success(seed_id)
+        connection.send((seed_id, error, time.perf_counter() - start, _get_peak_rss()))
+        setproctitle("Generator (idle)")
+
+
+@dataclass
+class GenerationJob:
+    id: UUID
+    cost: float
+    queued_at: float
+    started_at: float = 0.0
+
+
+class GeneratorWorker:
+    """A generator process running one job at a time. Killing it is the only way to cancel its job."""
+    name_prefix: typing.ClassVar[str] = "Generator-"
+    max_jobs: typing.ClassVar[int] = 10  # jobs before the process gets replaced, to free leaked memory
+    _counter: typing.ClassVar[itertools.count] = itertools.count(1)
+
+    def __init__(self, config: dict[str, Any], small_jobs_only: bool) -> None:
+        self.small_jobs_only = small_jobs_only
+        self.connection, child_connection = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=_run_generator, args=(config, child_connection, self.max_jobs),
+                                               name=f"{self.name_prefix}{next(self._counter)}", daemon=True)
+        self.process.start()
+        child_connection.close()
+        self.job: GenerationJob | None = None
+        self.jobs_started = 0
+
+    @property
+    def lane(self) -> str:
+        return "small" if self.small_jobs_only else "general"
+
+    @property
+    def retired(self) -> bool:
+        """Worker ran all its jobs or died and has to be replaced."""
+        return not self.job and (self.jobs_started >= self.max_jobs or not self.process.is_alive())
+
+    def start(self, job: GenerationJob, generation: Generation) -> None:
+        self.connection.send((restricted_loads(generation.options), json.loads(generation.meta),
+                              generation.id, generation.owner))
+        job.started_at = time.monotonic()
+        self.job = job
+        self.jobs_started += 1
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+
+class GenerationScheduler:
+    """
+    Schedules queued Generations onto generator processes.
+    Cheap jobs have a lane of generators reserved for them, so they are not stuck behind large ones,
+    and jobs exceeding the allowed time are cancelled by killing their generator.
+    """
+
+    def __init__(self, config: dict[str, Any]) -> None:
+        self.config = config
+        self.job_time: int | None = config["JOB_TIME"]
+        self.small_job_cost: float = config["SMALL_JOB_COST"]
+        self.game_costs: dict[str, float] = config["GENERATION_GAME_COSTS"]
+        # keep at least one generator for jobs of any size
+        self.small_generators = min(config["SMALL_JOB_GENERATORS"], config["GENERATORS"] - 1)
+        self.workers: list[GeneratorWorker] = []
+        self.queue: dict[UUID, GenerationJob] = {}
+
+    def start(self) -> None:
+        self.workers = [GeneratorWorker(self.config, index < self.small_generators)
+                        for index in range(self.config["GENERATORS"])]
+
+    def stop(self) -> None:
+        for worker in self.workers:
+            worker.kill()
+        self.workers.clear()
+
+    def select_job(self, small_jobs_only: bool) -> GenerationJob | None:
+        """Returns the job that has been queued the longest, that fits a worker of the lane."""
+        jobs = (job for job in self.queue.values() if not small_jobs_only or job.cost <= self.small_job_cost)
+        return min(jobs, key=lambda job: job.queued_at, default=None)
+
+    def finish(self, worker: GeneratorWorker, seed_id: UUID | None, error: str | None, duration: float,
+               peak_rss: int | None) -> None:
+        """Record the stats of the finished job of worker into the meta of its Generation, or its Seed on success."""
+        job = worker.job
+        worker.job = None
+        stats = {"duration": round(duration, 3), "peak_rss": peak_rss, "cost": job.cost, "lane": worker.lane,
+                 "wait": round(job.started_at - job.queued_at, 3)}
+        logging.info(f"Generation {job.id} {'failed' if error else 'finished'} after {duration:.2f}s"
+                     + (f", peak memory {Utils.format_SI_prefix(peak_rss, 1024)}B" if peak_rss else ""))
+        with db_session:
+            generation = Generation.get(id=job.id)
+            if generation:
+                meta = json.loads(generation.meta)
+                meta["job"] = stats
+                if error is not None:
+                    generation.state = STATE_ERROR
+                    meta.setdefault("error", error)
+                generation.meta = json.dumps(meta)
+            elif seed_id:  # successful Generations get deleted when their Seed is uploaded
+                seed = Seed.get(id=seed_id)
+                if seed:
+                    meta = json.loads(seed.meta)
+                    meta["job"] = stats
+                    seed.meta = json.dumps(meta)
+
+    def poll_workers(self) -> None:
+        now = time.monotonic()
+        for index, worker in enumerate(self.workers):
+            job = worker.job
+            if job:
+                duration = now - job.started_at
+                try:
+                    if worker.connection.poll():
+                        self.finish(worker, *worker.connection.recv())
+                    elif not worker.process.is_alive():
+                        logging.error(f"Generator for {job.id} exited with code {worker.process.exitcode}")
+                        self.finish(worker, None, "Generation process exited unexpectedly, "
+                                                  "likely from running out of memory.", duration, None)
+                    elif self.job_time is not None and duration > self.job_time:
+                        logging.info(f"Cancelling generation {job.id} after {duration:.0f}s")
+                        worker.kill()
+                        self.finish(worker, None, "Allowed time for Generation exceeded, "
+                                                  "please consider generating locally instead.", duration, None)
+                except (EOFError, OSError) as e:
+                    logging.exception(e)
+                    self.finish(worker, None, format_exception(e), duration, None)
+            if worker.retired:
+                worker.kill()
+                self.workers[index] = GeneratorWorker(self.config, worker.small_jobs_only)
+
+    def poll_queue(self) -> None:
+        with db_session:
+            # for update locks the database row(s) during transaction, preventing writes from elsewhere
+            queued = select(generation for generation in Generation
+                            if generation.state == STATE_QUEUED).for_update()[:]
+            queued_ids = {generation.id for generation in queued}
+            for job_id in self.queue.keys() - queued_ids:
+                del self.queue[job_id]
+            for generation in queued:
+                if generation.id not in self.queue:
+                    try:
+                        cost = estimate_generation_cost(restricted_loads(generation.options), self.game_costs)
+                    except Exception as e:
+                        logging.exception(e)
+                        meta = json.loads(generation.meta)
+                        meta["error"] = format_exception(e)
+                        generation.meta = json.dumps(meta)
+                        generation.state = STATE_ERROR
+                        continue
+                    self.queue[generation.id] = GenerationJob(generation.id, cost, time.monotonic())
+
+            for worker in self.workers:
+                if worker.job or not self.queue:
+                    continue
+                job = self.select_job(worker.small_jobs_only)
+                if not job:
+                    continue
+                generation = Generation[job.id]
+                logging.info(f"Generating {job.id} with cost {job.cost} on {worker.process.name}")
+                try:
+                    worker.start(job, generation)
+                except Exception as e:
+                    logging.exception(e)
+                    generation.state = STATE_ERROR
+                else:
+                    generation.state = STATE_STARTED
+                del self.queue[job.id]
 
 
 def init_generator(config: dict[str, Any]) -> None:
@@ -148,32 +338,29 @@ def autogen(config: dict):
         try:
             with Locker("autogen"):
 
-                with multiprocessing.Pool(config["GENERATORS"], initializer=init_generator,
-                                          initargs=(config,), maxtasksperchild=10) as generator_pool:
-                    job_time = config["JOB_TIME"]
-                    with db_session:
-                        to_start = select(generation for generation in Generation if generation.state == STATE_STARTED)
+                with db_session:
+                    to_start = select(generation for generation in Generation if generation.state == STATE_STARTED)
 
-                        if to_start:
-                            logging.info("Resuming generation")
-                            for generation in to_start:
-                                sid = Seed.get(id=generation.id)
-                                if sid:
-                                    generation.delete()
-                                else:
-                                    launch_generator(generator_pool, generation, timeout=job_time)
+                    if to_start:
+                        logging.info("Resuming generation")
+                        for generation in to_start:
+                            sid = Seed.get(id=generation.id)
+                            if sid:
+                                generation.delete()
+                            else:
+                                generation.state = STATE_QUEUED
 
-                            commit()
-                        select(generation for generation in Generation if generation.state == STATE_ERROR).delete()
+                        commit()
+                    select(generation for generation in Generation if generation.state == STATE_ERROR).delete()
 
+                scheduler = GenerationScheduler(config)
+                scheduler.start()
+                try:
                     while not stop_event.wait(0.1):
-                        with db_session:
-                            # for update locks the database row(s) during transaction, preventing writes from elsewhere
-                            to_start = select(
-                                generation for generation in Generation
-                                if generation.state == STATE_QUEUED).for_update()
-                            for generation in to_start:
-                                launch_generator(generator_pool, generation, timeout=job_time)
+                        scheduler.poll_workers()
+                        scheduler.poll_queue()
+                finally:
+                    scheduler.stop()
         except AlreadyRunningException:
             logging.info("Autogen reports as already running, not starting another.")
 
@@ -188,6 +375,8 @@ class MultiworldInstance():
         self.cert = config["SELFLAUNCHCERT"]
         self.key = config["SELFLAUNCHKEY"]
         self.host = config["HOST_ADDRESS"]
+        self.metrics_port = config["METRICS_PORT"] + id if config["METRICS_PORT"] else 0
+        self.shared_port = config["HOSTER_SHARED_PORT"] + id if config["HOSTER_SHARED_PORT"] else 0
         self.rooms_to_start = multiprocessing.Queue()
         self.rooms_shutting_down = multiprocessing.Queue()
         self.name = f"MultiHoster{id}"
@@ -199,7 +388,8 @@ class MultiworldInstance():
         process = multiprocessing.Process(group=None, target=run_server_process,
                                           args=(self.name, self.ponyconfig, get_static_server_data(),
                                                 self.cert, self.key, self.host,
-                                                self.rooms_to_start, self.rooms_shutting_down),
+                                                self.rooms_to_start, self.rooms_shutting_down, self.metrics_port,
+                                                self.shared_port),
                                           name=self.name)
         process.start()
         self.process = process
@@ -228,4 +418,4 @@ class MultiworldInstance():
 
 from .models import Room, Generation, STATE_QUEUED, STATE_STARTED, STATE_ERROR, db, Seed, Slot
 from .customserver import run_server_process, get_static_server_data
-from .generate import gen_game
+from .generate import format_exception, gen_game
@@ -9,7 +9,7 @@ from markupsafe import Markup
 from WebHostLib import app
 from WebHostLib.upload import allowed_options, allowed_options_extensions, banned_file
 
-from Generate import roll_settings, PlandoOptions
+from Generate import OptionCache, roll_settings, PlandoOptions
 from Utils import parse_yamls
 
 
@@ -90,6 +90,7 @@ def roll_options(options: dict[str, dict | str],
     plando_options = PlandoOptions.from_set(set(plando_options))
     results: dict[str, str | bool] = {}
     rolled_results: dict[str, dict] = {}
+    option_cache: OptionCache = {}
     for filename, text in options.items():
         try:
             if type(text) is dict:
@@ -102,12 +103,14 @@ def roll_options(options: dict[str, dict | str],
             try:
                 if len(yaml_datas) == 1:
                     rolled_results[filename] = roll_settings(yaml_datas[0],
-                                                             plando_options=plando_options)
+                                                             plando_options=plando_options,
+                                                             option_cache=option_cache)
                 else:
                     for i, yaml_data in enumerate(yaml_datas):
                         if yaml_data is not None:
                             rolled_results[f"{filename}/{i + 1}"] = roll_settings(yaml_data,
-                                                                                  plando_options=plando_options)
+                                                                                  plando_options=plando_options,
+                                                                                  option_cache=option_cache)
             except Exception as e:
                 if e.__cause__:
                     results[filename] = f"Failed to generate options in {filename}: {e} - {e.__cause__}"
@@ -13,15 +13,19 @@ import threading
 import time
 import typing
 import sys
+import urllib.parse
+import weakref
+from http import HTTPStatus
 
 import websockets
 from pony.orm import commit, db_session, select
+from pony.orm.dbapiprovider import OperationalError
 
 import Utils
 
 from MultiServer import (
     Context, server, auto_shutdown, ServerCommandProcessor, ClientMessageProcessor, load_server_cert,
-    server_per_message_deflate_factory,
+    server_per_message_deflate_factory, ServerMetrics, monitor_event_loop_lag, serve_metrics,
 )
 from Utils import restricted_loads, cache_argsless
 from .locker import Locker
@@ -60,8 +64,59 @@ class DBCommandProcessor(ServerCommandProcessor):
         self.ctx.logger.info(text)
 
 
+class AutoSaver(threading.Thread):
+    """
+    Saves the dirty rooms of a hoster process in turn from a single thread, spreading the saves evenly over the
+    autosave interval, instead of each room running its own autosave thread.
+    """
+    interval: float
+    contexts: weakref.WeakSet[WebHostContext]
+
+    def __init__(self, interval: float = 60):
+        super().__init__(name="AutoSaver", daemon=True)
+        self.interval = interval
+        self.contexts = weakref.WeakSet()
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+
+    def add(self, ctx: WebHostContext) -> None:
+        with self.lock:
+            self.contexts.add(ctx)
+
+    def run(self) -> None:
+        while not self.stop_event.is_set():
+            with self.lock:
+                contexts = list(self.contexts)
+            if not contexts:
+                self.stop_event.wait(self.interval)
+                continue
+            delay = self.interval / len(contexts)
+            while contexts:
+                if self.stop_event.wait(delay):
+                    return
+                self.save(contexts.pop())  # pop, so rooms that shut down are not kept alive by this thread
+
+    def save(self, ctx: WebHostContext) -> None:
+        if ctx.exit_event.is_set():
+            with self.lock:
+                self.contexts.discard(ctx)
+            return
+        if ctx.save_dirty:
+            ctx.logger.debug("Saving via shared thread.")
+            try:
+                with ctx.metrics.time("autosave"):
+                    ctx._save()
+            except OperationalError as e:
+                ctx.logger.exception(e)
+                ctx.logger.info(f"Saving failed. Retry in {self.interval} seconds.")
+            else:
+                ctx.save_dirty = False
+
+
 class WebHostContext(Context):
     room_id: int
+    auto_saver: typing.Optional[AutoSaver] = None
+    """if set, saves this room instead of a thread of its own"""
 
     def __init__(self, static_server_data: dict, logger: logging.Logger):
         # static server data is used during _load_game_data to load required data,
@@ -126,7 +181,6 @@ class WebHostContext(Context):
         self.gamespackage = {"Archipelago": static_gamespackage.get("Archipelago", {})}  # this may be modified by _load
         self.item_name_groups = {"Archipelago": static_item_name_groups.get("Archipelago", {})}
         self.location_name_groups = {"Archipelago": static_location_name_groups.get("Archipelago", {})}
-        missing_checksum = False
 
         for game in list(multidata.get("datapackage", {})):
             game_data = multidata["datapackage"][game]
@@ -142,14 +196,13 @@ class WebHostContext(Context):
                         continue
                     else:
                         self.logger.warning(f"Did not find game_data_package for {game}: {game_data['checksum']}")
-            else:
-                missing_checksum = True  # Game rolled on old AP and will load data package from multidata
+            # _load uses the data package embedded in multidata, for games rolled on old AP without checksum too
             self.gamespackage[game] = static_gamespackage.get(game, {})
             self.item_name_groups[game] = static_item_name_groups.get(game, {})
             self.location_name_groups[game] = static_location_name_groups.get(game, {})
 
-        if not game_data_packages and not missing_checksum:
-            # all static -> use the static dicts directly
+        if not multidata.get("datapackage"):
+            # all static -> use the static data directly, it is not modified by _load without embedded data packages
             self.gamespackage = static_gamespackage
             self.item_name_groups = static_item_name_groups
             self.location_name_groups = static_location_name_groups
@@ -165,6 +218,13 @@ class WebHostContext(Context):
             self._start_async_saving(atexit_save=False)
         asyncio.create_task(self.listen_to_db_commands())
 
+    def _start_async_saving(self, atexit_save: bool = True):
+        if self.auto_saver:
+            # the hoster saves its rooms when shutting down, so atexit_save is not needed
+            self.auto_saver.add(self)
+        else:
+            super()._start_async_saving(atexit_save)
+
     @db_session
     def _save(self, exit_save: bool = False) -> bool:
         room = Room.get(id=self.room_id)
@@ -185,22 +245,37 @@ def get_random_port():
     return random.randint(49152, 65535)
 
 
+def get_room_id_from_path(path: str) -> typing.Optional[typing.Any]:
+    """Returns the room id from the path of a connection to a shared port, like /<room id as in the room url>."""
+    from . import to_python
+    try:
+        return to_python(urllib.parse.urlsplit(path).path.strip("/"))
+    except ValueError:
+        return None
+
+
 @cache_argsless
 def get_static_server_data() -> dict:
     import worlds
-    data = {
-        "non_hintable_names": {
-            world_name: world.hint_blacklist
-            for world_name, world in worlds.AutoWorldRegister.world_types.items()
-        },
-        "gamespackage": {
+    try:
+        # memory mapped, so room processes share the name lookups instead of each holding a copy
+        gamespackage = worlds.get_mapped_data_package()
+    except OSError as e:
+        logging.warning(f"Could not map data package, falling back to copying it into each process: {e}")
+        gamespackage = {
             world_name: {
                 key: value
                 for key, value in game_package.items()
                 if key not in ("item_name_groups", "location_name_groups")
             }
             for world_name, game_package in worlds.network_data_package["games"].items()
+        }
+    data = {
+        "non_hintable_names": {
+            world_name: world.hint_blacklist
+            for world_name, world in worlds.AutoWorldRegister.world_types.items()
         },
+        "gamespackage": gamespackage,
         "item_name_groups": {
             world_name: world.item_name_groups
             for world_name, world in worlds.AutoWorldRegister.world_types.items()
@@ -247,7 +322,8 @@ def tear_down_logging(room_id):
 
 def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
                        cert_file: typing.Optional[str], cert_key_file: typing.Optional[str],
-                       host: str, rooms_to_run: multiprocessing.Queue, rooms_shutting_down: multiprocessing.Queue):
+                       host: str, rooms_to_run: multiprocessing.Queue, rooms_shutting_down: multiprocessing.Queue,
+                       metrics_port: int = 0, shared_port: int = 0):
     from setproctitle import setproctitle
 
     setproctitle(name)
@@ -283,7 +359,11 @@ def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
             nonlocal load_date, ssl_context
             today = datetime.date.today()
             if load_date != today:
-                ssl_context = load_server_cert(cert_file, cert_key_file)
+                if shared_port:
+                    # the shared listener keeps its context, new connections use the reloaded certificate
+                    ssl_context.load_cert_chain(cert_file, cert_key_file if cert_key_file else cert_file)
+                else:
+                    ssl_context = load_server_cert(cert_file, cert_key_file)
                 load_date = today
             return ssl_context
 
@@ -291,46 +371,88 @@ def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
     gc.collect()  # free intermediate objects used during setup
 
     loop = asyncio.get_event_loop()
+    # all rooms of this process share one event loop, so its lag is measured once for the process
+    process_metrics = ServerMetrics()
+    room_contexts: typing.Dict[typing.Any, WebHostContext] = {}
+    auto_saver = AutoSaver()
+    auto_saver.start()
+
+    def render_metrics() -> str:
+        return ServerMetrics.format_prometheus(
+            process_metrics.collect(),
+            *(ctx.metrics.collect({"room": str(room_id)}) for room_id, ctx in list(room_contexts.items())))
+
+    from . import to_url
+
+    def get_room_context(path: str) -> typing.Optional[WebHostContext]:
+        ctx = room_contexts.get(get_room_id_from_path(path))
+        if ctx and not ctx.exit_event.is_set():
+            return ctx
+        return None
+
+    def reject_unknown_room(path: str, request_headers) -> typing.Optional[typing.Tuple[HTTPStatus, list, bytes]]:
+        if get_room_context(path):
+            return None
+        return HTTPStatus.NOT_FOUND, [], b"No room is running at this path.\n"
+
+    async def route_connection(websocket) -> None:
+        ctx = get_room_context(websocket.path)
+        if ctx is None:  # room shut down during the handshake
+            await websocket.close(1001)
+            return
+        await server(websocket, websocket.path, ctx=ctx)
+
+    async def serve_room(ctx: WebHostContext) -> None:
+        try:
+            ctx.server = websockets.serve(
+                functools.partial(server, ctx=ctx),
+                ctx.host,
+                ctx.port,
+                ssl=get_ssl_context(),
+                extensions=[server_per_message_deflate_factory],
+            )
+            await ctx.server
+        except OSError:  # likely port in use
+            ctx.server = websockets.serve(
+                functools.partial(server, ctx=ctx), ctx.host, 0, ssl=get_ssl_context())
+
+            await ctx.server
+        port = 0
+        for wssocket in ctx.server.ws_server.sockets:
+            socketname = wssocket.getsockname()
+            if wssocket.family == socket.AF_INET6:
+                # Prefer IPv4, as most users seem to not have working ipv6 support
+                if not port:
+                    port = socketname[1]
+            elif wssocket.family == socket.AF_INET:
+                port = socketname[1]
+        if port:
+            ctx.logger.info(f'Hosting game at {host}:{port}')
+            with db_session:
+                room = Room.get(id=ctx.room_id)
+                room.last_port = port
+            del room
+        else:
+            ctx.logger.exception("Could not determine port. Likely hosting failure.")
 
     async def start_room(room_id):
         with Locker(f"RoomLocker {room_id}"):
             try:
                 logger = set_up_logging(room_id)
                 ctx = WebHostContext(static_server_data, logger)
+                ctx.auto_saver = auto_saver
                 ctx.load(room_id)
                 ctx.init_save()
+                room_contexts[room_id] = ctx
                 assert ctx.server is None
-                try:
-                    ctx.server = websockets.serve(
-                        functools.partial(server, ctx=ctx),
-                        ctx.host,
-                        ctx.port,
-                        ssl=get_ssl_context(),
-                        extensions=[server_per_message_deflate_factory],
-                    )
-                    await ctx.server
-                except OSError:  # likely port in use
-                    ctx.server = websockets.serve(
-                        functools.partial(server, ctx=ctx), ctx.host, 0, ssl=get_ssl_context())
-
-                    await ctx.server
-                port = 0
-                for wssocket in ctx.server.ws_server.sockets:
-                    socketname = wssocket.getsockname()
-                    if wssocket.family == socket.AF_INET6:
-                        # Prefer IPv4, as most users seem to not have working ipv6 support
-                        if not port:
-                            port = socketname[1]
-                    elif wssocket.family == socket.AF_INET:
-                        port = socketname[1]
-                if port:
-                    ctx.logger.info(f'Hosting game at {host}:{port}')
+                if shared_port:
+                    get_ssl_context()  # refresh the certificate of the shared listener
+                    ctx.port = shared_port
                     with db_session:
-                        room = Room.get(id=ctx.room_id)
-                        room.last_port = port
-                    del room
+                        Room.get(id=ctx.room_id).last_port = shared_port
+                    ctx.logger.info(f"Hosting game at {host}:{shared_port}/{to_url(room_id)}")
                 else:
-                    ctx.logger.exception("Could not determine port. Likely hosting failure.")
+                    await serve_room(ctx)
                 with db_session:
                     ctx.auto_shutdown = Room.get(id=room_id).timeout
                 if ctx.saving:
@@ -359,10 +481,14 @@ def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
                     ctx.save_dirty = False  # make sure the saving thread does not write to DB after final wakeup
                     ctx.exit_event.set()  # make sure the saving thread stops at some point
                     # NOTE: async saving should probably be an async task and could be merged with shutdown_task
+                    room_contexts.pop(room_id, None)
 
                     if ctx.server and hasattr(ctx.server, "ws_server"):
                         ctx.server.ws_server.close()
                         await ctx.server.ws_server.wait_closed()
+                    elif shared_port:
+                        for endpoint in list(ctx.endpoints):
+                            await endpoint.socket.close()
 
                     with db_session:
                         # ensure the Room does not spin up again on its own, minute of safety buffer
@@ -396,12 +522,23 @@ def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
                 logging.info(f"Starting room {next_room} on {name}.")
                 del task  # delete reference to task object
 
+    lag_task = loop.create_task(monitor_event_loop_lag(process_metrics))
+    if metrics_port:
+        loop.run_until_complete(serve_metrics(render_metrics, metrics_port))
+        logging.info(f"Serving metrics of {name} at http://127.0.0.1:{metrics_port}/metrics")
+    if shared_port:
+        # one listener for all rooms of this process, connections are routed by the room id in their path
+        loop.run_until_complete(websockets.serve(
+            route_connection, "", shared_port, ssl=get_ssl_context(),
+            extensions=[server_per_message_deflate_factory], process_request=reject_unknown_room))
+        logging.info(f"Hosting rooms of {name} on port {shared_port}")
     starter = Starter()
     starter.daemon = True
     starter.start()
     try:
         loop.run_forever()
     finally:
+        lag_task.cancel()
         # save all tasks that want to be saved during shutdown
         for task in asyncio.all_tasks(loop):
             save: typing.Optional[typing.Callable[[], typing.Any]] = getattr(task, "save", None)
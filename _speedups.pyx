@@ -1,6 +1,5 @@
 #cython: language_level=3
 #distutils: language = c
-#distutils: depends = intset.h
 
 """
 Provides faster implementation of some core parts.
@@ -14,6 +13,7 @@ from cpython cimport PyObject
 from typing import Any, Dict, Iterable, Iterator, Generator, Sequence, Tuple, TypeVar, Union, Set, List, TYPE_CHECKING
 from cymem.cymem cimport Pool
 from libc.stdint cimport int64_t, uint32_t
+from libc.stdlib cimport qsort
 from collections import defaultdict
 
 cdef extern from *:
@@ -31,28 +31,6 @@ ctypedef int64_t ap_id_t
 cdef ap_player_t MAX_PLAYER_ID = 1000000  # limit the size of indexing array
 cdef size_t INVALID_SIZE = <size_t>(-1)  # this is all 0xff... adding 1 results in 0, but it's not negative
 
-# configure INTSET for player
-cdef extern from *:
-    """
-    #define INTSET_NAME ap_player_set
-    #define INTSET_TYPE uint32_t  // has to match ap_player_t
-    """
-
-# create INTSET for player
-cdef extern from "intset.h":
-    """
-    #undef INTSET_NAME
-    #undef INTSET_TYPE
-    """
-    ctypedef struct ap_player_set:
-        pass
-
-    ap_player_set* ap_player_set_new(size_t bucket_count) nogil
-    void ap_player_set_free(ap_player_set* set) nogil
-    bint ap_player_set_add(ap_player_set* set, ap_player_t val) nogil
-    bint ap_player_set_contains(ap_player_set* set, ap_player_t val) nogil
-
-
 cdef struct LocationEntry:
     # layout is so that
     # 64bit player: location+sender and item+receiver 128bit comparisons, if supported
@@ -69,6 +47,25 @@ cdef struct IndexEntry:
     size_t count
 
 
+cdef struct ReceiverEntry:
+    ap_id_t item
+    ap_player_t receiver
+    size_t entry  # index into LocationStore.entries
+
+
+cdef int compare_receiver_entries(const void* a, const void* b) noexcept nogil:
+    # order by receiver, then item, then entry, which keeps entries for the same item sorted by sender and location
+    cdef const ReceiverEntry* x = <const ReceiverEntry*>a
+    cdef const ReceiverEntry* y = <const ReceiverEntry*>b
+    if x.receiver != y.receiver:
+        return -1 if x.receiver < y.receiver else 1
+    if x.item != y.item:
+        return -1 if x.item < y.item else 1
+    if x.entry != y.entry:
+        return -1 if x.entry < y.entry else 1
+    return 0
+
+
 if TYPE_CHECKING:
     State = Dict[Tuple[int, int], Set[int]]
 else:
@@ -96,6 +93,10 @@ cdef class LocationStore:
     cdef list _items  # ~64KB/1000 players, speed up items (56 per tuple + 8 per list entry)
     cdef list _proxies  # ~92KB/1000 players, speed up self[player] (56 per struct + 28 per len + 8 per list entry)
     cdef PyObject** _raw_proxies  # 8K/1000 players, faster access to _proxies, but does not keep a ref
+    # lazily built by build_receiver_index for find_item and get_for_player
+    cdef ReceiverEntry* receiver_entries  # 2.4MB/100k items
+    cdef IndexEntry* receiver_index  # NULL until built, indexed by receiver, covering receiver_entries
+    cdef size_t receiver_index_size
 
     def get_size(self):
         from sys import getsizeof
@@ -106,6 +107,8 @@ cdef class LocationStore:
         size += sum(sizeof(item) for item in self._items)
         size += sum(sizeof(proxy) for proxy in self._proxies)
         size += sizeof(self._raw_proxies[0]) * self.sender_index_size
+        if self.receiver_index:
+            size += sizeof(ReceiverEntry) * self.entry_count + sizeof(IndexEntry) * self.receiver_index_size
         return size
 
     def __init__(self, locations_dict: Dict[int, Dict[int, Sequence[int]]]) -> None:
@@ -215,47 +218,82 @@ cdef class LocationStore:
         return self._items
 
     # specialized accessors
+    def build_receiver_index(self) -> None:
+        """Builds the index used by find_item and get_for_player, if it was not built yet."""
+        if self.receiver_index:
+            return
+        cdef size_t i
+        cdef ap_player_t receiver
+        cdef size_t max_receiver = 0
+        for i in range(self.entry_count):
+            max_receiver = max(max_receiver, self.entries[i].receiver)
+        cdef IndexEntry* receiver_index = <IndexEntry*>self._mem.alloc(max_receiver + 1, sizeof(IndexEntry))
+        if self.entry_count:
+            self.receiver_entries = <ReceiverEntry*>self._mem.alloc(self.entry_count, sizeof(ReceiverEntry))
+            for i in range(self.entry_count):
+                self.receiver_entries[i].item = self.entries[i].item
+                self.receiver_entries[i].receiver = self.entries[i].receiver
+                self.receiver_entries[i].entry = i
+            qsort(self.receiver_entries, self.entry_count, sizeof(ReceiverEntry), compare_receiver_entries)
+            for i in range(self.entry_count):
+                receiver = self.receiver_entries[i].receiver
+                if not receiver_index[receiver].count:
+                    receiver_index[receiver].start = i
+                receiver_index[receiver].count += 1
+        self.receiver_index_size = max_receiver + 1
+        self.receiver_index = receiver_index
+
+    cdef size_t _find_receiver_item(self, ap_player_t receiver, ap_id_t item) nogil:
+        # returns the position of the first receiver entry for receiver and item, or INVALID_SIZE
+        cdef size_t l = self.receiver_index[receiver].start
+        cdef size_t e = l + self.receiver_index[receiver].count
+        cdef size_t r = e
+        cdef size_t m
+        while l < r:
+            m = (l + r) // 2
+            if self.receiver_entries[m].item < item:
+                l = m + 1
+            else:
+                r = m
+        if l < e and self.receiver_entries[l].item == item:
+            return l
+        return INVALID_SIZE
+
     def find_item(self, slots: Set[int], seeked_item_id: int) -> Generator[Tuple[int, int, int, int, int], None, None]:
         cdef ap_id_t item = seeked_item_id
         cdef ap_player_t receiver
-        cdef ap_player_set* receivers
-        cdef size_t slot_count = len(slots)
-        if slot_count == 1:
-            # specialized implementation for single slot
-            receiver = list(slots)[0]
-            with nogil:
-                for entry in self.entries[:self.entry_count]:
-                    if entry.item == item and entry.receiver == receiver:
-                        with gil:
-                            yield entry.sender, entry.location, entry.item, entry.receiver, entry.flags
-        elif slot_count:
-            # generic implementation with lookup in set
-            receivers = ap_player_set_new(min(1023, slot_count))  # limit top level struct to 16KB
-            if not receivers:
-                raise MemoryError()
-            try:
-                for receiver in slots:
-                    if not ap_player_set_add(receivers, receiver):
-                        raise MemoryError()
-                with nogil:
-                    for entry in self.entries[:self.entry_count]:
-                        if entry.item == item and ap_player_set_contains(receivers, entry.receiver):
-                            with gil:
-                                yield entry.sender, entry.location, entry.item, entry.receiver, entry.flags
-            finally:
-                ap_player_set_free(receivers)
+        cdef size_t i
+        cdef LocationEntry* entry
+        self.build_receiver_index()
+        for slot in slots:
+            if slot < 1 or slot >= self.receiver_index_size:
+                continue
+            receiver = slot
+            i = self._find_receiver_item(receiver, item)
+            if i == INVALID_SIZE:
+                continue
+            while i < self.entry_count and self.receiver_entries[i].receiver == receiver \
+                    and self.receiver_entries[i].item == item:
+                entry = self.entries + self.receiver_entries[i].entry
+                yield entry.sender, entry.location, entry.item, entry.receiver, entry.flags
+                i += 1
 
     def get_for_player(self, slot: int) -> Dict[int, Set[int]]:
-        cdef ap_player_t receiver = slot
+        cdef ap_player_t receiver
+        cdef size_t i
+        cdef LocationEntry* entry
         all_locations: Dict[int, Set[int]] = {}
-        with nogil:
-            for entry in self.entries[:self.entry_count]:
-                if entry.receiver == receiver:
-                    with gil:
-                        sender: int = entry.sender
-                        if sender not in all_locations:
-                            all_locations[sender] = set()
-                        all_locations[sender].add(entry.location)
+        self.build_receiver_index()
+        if slot < 1 or slot >= self.receiver_index_size:
+            return all_locations
+        receiver = slot
+        cdef size_t start = self.receiver_index[receiver].start
+        for i in range(start, start + self.receiver_index[receiver].count):
+            entry = self.entries + self.receiver_entries[i].entry
+            sender: int = entry.sender
+            if sender not in all_locations:
+                all_locations[sender] = set()
+            all_locations[sender].add(entry.location)
         return all_locations
 
     def get_checked(self, state: State, team: int, slot: int) -> List[int]:
@@ -20,7 +20,7 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 ]]
 
-local SCRIPT_VERSION = 1
+local SCRIPT_VERSION = 2
 
 -- Set to log incoming requests
 -- Will cause lag due to large console output
@@ -37,6 +37,16 @@ field `type`. The value of `type` determines what other fields may exist.
 To get the script version, instead of JSON, send "VERSION" to get the script
 version directly (e.g. "2").
 
+Multiple lists of requests can be sent in one message as an object with an `id`
+and the lists as `requests`. Each list is executed as if it was its own
+message, and the responses are sent back as `responses` along with the same
+`id`. Clients may send further messages before receiving a response; every
+message that has been fully received is processed in the same frame.
+
+Request: `{"id": 1, "requests": [[{"type": "PING"}], [{"type": "HASH"}]]}`
+
+Response: `{"id": 1, "responses": [[{"type": "PONG"}], [{"type": "HASH_RESPONSE", "value": "F7D18982"}]]}`
+
 #### Ex. 1
 
 Request: `[{"type": "PING"}]`
@@ -309,6 +319,9 @@ local current_time = 0
 
 local locked = false
 
+-- Part of a message that has not been fully received yet
+local partial_message = nil
+
 local rom_hash = nil
 
 function queue_push (self, value)
@@ -487,9 +500,36 @@ function process_request (req)
     end
 end
 
+function process_request_list (data)
+    local res = {}
+    local failed_guard_response = nil
+    for i, req in ipairs(data) do
+        if failed_guard_response ~= nil then
+            res[i] = failed_guard_response
+        else
+            -- An error is more likely to cause an NLua exception than to return an error here
+            local status, response = pcall(process_request, req)
+            if status then
+                res[i] = response
+
+                -- If the GUARD validation failed, skip the remaining commands
+                if response["type"] == "GUARD_RESPONSE" and not response["value"] then
+                    failed_guard_response = response
+                end
+            else
+                if type(response) ~= "string" then response = "Unknown error" end
+                res[i] = {type = "ERROR", err = response}
+            end
+        end
+    end
+    return res
+end
+
 -- Receive data from AP client and send message back
+-- Returns true if a message was processed
 function send_receive ()
-    local message, err = client_socket:receive()
+    local message, err, partial = client_socket:receive("*l", partial_message)
+    partial_message = nil
 
     -- Handle errors
     if err == "closed" then
@@ -497,15 +537,18 @@ function send_receive ()
             print("Connection to client closed")
         end
         current_state = STATE_NOT_CONNECTED
-        return
+        return false
     elseif err == "timeout" then
+        if partial ~= nil and partial ~= "" then
+            partial_message = partial
+        end
         unlock()
-        return
+        return false
     elseif err ~= nil then
         print(err)
         current_state = STATE_NOT_CONNECTED
         unlock()
-        return
+        return false
     end
 
     -- Reset timeout timer
@@ -519,31 +562,18 @@ function send_receive ()
     if message == "VERSION" then
         client_socket:send(tostring(SCRIPT_VERSION).."\n")
     else
-        local res = {}
         local data = json.decode(message)
-        local failed_guard_response = nil
-        for i, req in ipairs(data) do
-            if failed_guard_response ~= nil then
-                res[i] = failed_guard_response
-            else
-                -- An error is more likely to cause an NLua exception than to return an error here
-                local status, response = pcall(process_request, req)
-                if status then
-                    res[i] = response
-
-                    -- If the GUARD validation failed, skip the remaining commands
-                    if response["type"] == "GUARD_RESPONSE" and not response["value"] then
-                        failed_guard_response = response
-                    end
-                else
-                    if type(response) ~= "string" then response = "Unknown error" end
-                    res[i] = {type = "ERROR", err = response}
-                end
+        if data["requests"] ~= nil then
+            local responses = {}
+            for i, request_list in ipairs(data["requests"]) do
+                responses[i] = process_request_list(request_list)
             end
+            client_socket:send(json.encode({id = data["id"], responses = responses}).."\n")
+        else
+            client_socket:send(json.encode(process_request_list(data)).."\n")
         end
-
-        client_socket:send(json.encode(res).."\n")
     end
+    return true
 end
 
 function initialize_server ()
@@ -609,9 +639,11 @@ function main ()
                 end
             end
         else
+            -- Process every message that has arrived, or keep waiting for more while locked
+            local received
             repeat
-                send_receive()
-            until not locked
+                received = send_receive()
+            until not locked and not received
 
             if timeout_timer <= 0 then
                 print("Client timed out")
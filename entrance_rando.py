@@ -5,7 +5,7 @@ import time
 from collections import deque
 from collections.abc import Callable, Iterable
 
-from BaseClasses import CollectionState, Entrance, Region, EntranceType
+from BaseClasses import CollectionState, Entrance, Location, Region, EntranceType
 from Options import Accessibility
 from worlds.AutoWorld import World
 
@@ -180,12 +180,19 @@ class ERPlacementState:
     """A lookup table of all unconnected ER targets"""
     coupled: bool
     """Whether entrance randomization is operating in coupled mode"""
-
-    def __init__(self, world: World, entrance_lookup: EntranceLookup, coupled: bool):
+    incremental: bool
+    """Whether reachability is updated incrementally after each placement, see randomize_entrances"""
+    _swept_regions: set[Region]
+    """In incremental mode, the reachable regions whose locations were added to the sweep"""
+    _waiting_locations: list[Location]
+    """In incremental mode, the uncollected advancement locations of swept regions"""
+
+    def __init__(self, world: World, entrance_lookup: EntranceLookup, coupled: bool, incremental: bool = False):
         self.placements = []
         self.pairings = []
         self.world = world
         self.coupled = coupled
+        self.incremental = incremental
         self.entrance_lookup = entrance_lookup
 
         # Construct an 'all state', similar to MultiWorld.get_all_state(), but only for the world which is having its
@@ -199,6 +206,10 @@ class ERPlacementState:
             world.collect(single_player_all_state, item)
         single_player_all_state.sweep_for_advancements(world.get_locations())
         self.collection_state = single_player_all_state
+        self._swept_regions = set()
+        self._waiting_locations = []
+        if incremental:
+            self._sweep()
 
     @property
     def placed_regions(self) -> set[Region]:
@@ -228,8 +239,73 @@ class ERPlacementState:
         self.pairings.append((source_exit.name, target_entrance.name))
         self.entrance_lookup.remove(target_entrance)
 
+    def update_reachability(self, placed_exits: list[Entrance] | None = None) -> None:
+        """
+        Updates the regions and advancements reachable by the collection state after connections were made.
+
+        :param placed_exits: The exits connected since the last update. In incremental mode, the search only continues
+                             from them and only the locations of newly reached regions are swept. None to search
+                             everything again, for when anything else changed.
+        """
+        state = self.collection_state
+        player = self.world.player
+        if not self.incremental:
+            state.update_reachable_regions(player)
+            state.sweep_for_advancements(self.world.get_locations())
+            return
+        if placed_exits is None:
+            state.update_reachable_regions(player)
+            self._swept_regions = set()
+            self._waiting_locations = []
+        else:
+            blocked_connections = state.blocked_connections[player]
+            state.update_reachable_regions(player, [exit_ for exit_ in placed_exits if exit_ in blocked_connections])
+        self._sweep()
+
+    def _sweep(self, new_regions: list[Region] | None = None,
+               collected: list[tuple[Location, bool]] | None = None) -> None:
+        """
+        Collects the reachable advancements of the world, like sweep_for_advancements, but only checks the locations
+        that were unreachable in the last sweep and those of regions reached since.
+
+        :param new_regions: Gets the newly swept regions appended.
+        :param collected: Gets the collected locations appended, with whether collecting their item changed the state.
+        """
+        state = self.collection_state
+        player = self.world.player
+        reachable_regions = state.reachable_regions[player]
+        while True:
+            if state.stale[player]:
+                state.update_reachable_regions(player)
+            if len(reachable_regions) != len(self._swept_regions):
+                regions = reachable_regions - self._swept_regions
+                self._swept_regions |= regions
+                if new_regions is not None:
+                    new_regions.extend(regions)
+                # rebound instead of mutated, so speculative connections can restore the previous list
+                self._waiting_locations = self._waiting_locations + [
+                    location for region in regions for location in region.locations
+                    if location.advancement and location not in state.advancements]
+            reachable_locations: list[Location] = []
+            waiting_locations: list[Location] = []
+            for location in self._waiting_locations:
+                if location.can_reach(state):
+                    reachable_locations.append(location)
+                else:
+                    waiting_locations.append(location)
+            if not reachable_locations:
+                return
+            self._waiting_locations = waiting_locations
+            for location in reachable_locations:
+                state.advancements.add(location)
+                changed = state.collect(location.item, True, location)
+                if collected is not None:
+                    collected.append((location, changed))
+
     def test_speculative_connection(self, source_exit: Entrance, target_entrance: Entrance,
                                     usable_exits: set[Entrance]) -> bool:
+        if self.incremental:
+            return self._test_speculative_connection_in_place(source_exit, target_entrance, usable_exits)
         copied_state = self.collection_state.copy()
         # simulated connection. A real connection is unsafe because the region graph is shallow-copied and would
         # propagate back to the real multiworld.
@@ -238,8 +314,57 @@ class ERPlacementState:
         copied_state.blocked_connections[self.world.player].update(target_entrance.connected_region.exits)
         copied_state.update_reachable_regions(self.world.player)
         copied_state.sweep_for_advancements(self.world.get_locations())
+        return self._opens_new_exits(copied_state, source_exit, target_entrance, usable_exits)
+
+    def _test_speculative_connection_in_place(self, source_exit: Entrance, target_entrance: Entrance,
+                                              usable_exits: set[Entrance]) -> bool:
+        """
+        Simulates the connection on the real collection state instead of a copy, keeping an undo log of the changes to
+        revert them afterwards. Collected items are undone with World.remove.
+        """
+        state = self.collection_state
+        player = self.world.player
+        if state.stale[player]:
+            self._sweep()
+        reachable_regions = state.reachable_regions[player]
+        blocked_connections = state.blocked_connections[player]
+        target_region = target_entrance.connected_region
+        # the blocked connections are the frontier of the search, so they are small enough to restore from a copy
+        previous_blocked_connections = blocked_connections.copy()
+        previous_stale = state.stale.copy()
+        previous_waiting_locations = self._waiting_locations
+        path_length = len(state.path)
+        new_regions: list[Region] = []
+        collected: list[tuple[Location, bool]] = []
+        try:
+            reachable_regions.add(target_region)
+            blocked_connections.remove(source_exit)
+            blocked_connections.update(target_region.exits)
+            indirect_connections = self.world.multiworld.indirect_connections.get(target_region, set())
+            state.update_reachable_regions(player, [*target_region.exits,
+                                                    *indirect_connections.intersection(blocked_connections)])
+            self._sweep(new_regions, collected)
+            return self._opens_new_exits(state, source_exit, target_entrance, usable_exits)
+        finally:
+            for location, changed in reversed(collected):
+                state.advancements.remove(location)
+                state.locations_checked.discard(location)
+                if changed:
+                    self.world.multiworld.worlds[location.item.player].remove(state, location.item)
+            reachable_regions.difference_update(new_regions)
+            self._swept_regions.difference_update(new_regions)
+            self._waiting_locations = previous_waiting_locations
+            blocked_connections.clear()
+            blocked_connections.update(previous_blocked_connections)
+            # regions and entrances newly in the path were added to the end
+            for spot in list(itertools.islice(reversed(state.path), len(state.path) - path_length)):
+                del state.path[spot]
+            state.stale.update(previous_stale)
+
+    def _opens_new_exits(self, state: CollectionState, source_exit: Entrance, target_entrance: Entrance,
+                         usable_exits: set[Entrance]) -> bool:
         # test that at there are newly reachable randomized exits that are ACTUALLY reachable
-        available_randomized_exits = copied_state.blocked_connections[self.world.player]
+        available_randomized_exits = state.blocked_connections[self.world.player]
         for _exit in available_randomized_exits:
             if _exit.connected_region:
                 continue
@@ -252,7 +377,7 @@ class ERPlacementState:
             # technically this should be is_valid_source_transition, but that may rely on side effects from
             # on_connect, which have not happened here (because we didn't do a real connection, and if we did, we would
             # not want them to persist). can_reach is a close enough approximation most of the time.
-            if _exit.can_reach(copied_state):
+            if _exit.can_reach(state):
                 return True
         return False
 
@@ -356,7 +481,8 @@ def randomize_entrances(
         preserve_group_order: bool = False,
         er_targets: list[Entrance] | None = None,
         exits: list[Entrance] | None = None,
-        on_connect: Callable[[ERPlacementState, list[Entrance], list[Entrance]], bool | None] | None = None
+        on_connect: Callable[[ERPlacementState, list[Entrance], list[Entrance]], bool | None] | None = None,
+        incremental: bool = False
 ) -> ERPlacementState:
     """
     Randomizes Entrances for a single world in the multiworld.
@@ -379,6 +505,12 @@ def randomize_entrances(
                        3. The entrances they were connected to.
                        If you use on_connect to make additional placements, you are expected to return True to inform
                        GER that an additional sweep is needed.
+    :param incremental: Whether to only search onwards from each new connection and sweep the locations of newly
+                        reached regions, instead of searching all blocked connections and sweeping all locations, and
+                        to test speculative connections on the real collection state with an undo log instead of on a
+                        copy. Produces the same result faster for worlds with many randomized entrances, as long as
+                        your World.remove undoes World.collect and entrance rules only depend on items and registered
+                        indirect conditions.
     """
     if not world.explicit_indirect_conditions:
         raise EntranceRandomizationError("Entrance randomization requires explicit indirect conditions in order "
@@ -404,7 +536,8 @@ def randomize_entrances(
     er_state = ERPlacementState(
         world,
         EntranceLookup(world.random, coupled, exits_set, er_targets),
-        coupled
+        coupled,
+        incremental
     )
     # place the menu region and connected start region(s)
     er_state.collection_state.update_reachable_regions(world.player)
@@ -412,13 +545,14 @@ def randomize_entrances(
     def do_placement(source_exit: Entrance, target_entrance: Entrance) -> None:
         placed_exits, paired_entrances = er_state.connect(source_exit, target_entrance)
         # propagate new connections
-        er_state.collection_state.update_reachable_regions(world.player)
-        er_state.collection_state.sweep_for_advancements(world.get_locations())
+        er_state.update_reachability(placed_exits)
         if on_connect:
             change = on_connect(er_state, placed_exits, paired_entrances)
             if change:
                 er_state.collection_state.update_reachable_regions(world.player)
                 er_state.collection_state.sweep_for_advancements()
+                if incremental:
+                    er_state.update_reachability()
 
     def needs_speculative_sweep(dead_end: bool, require_new_exits: bool, placeable_exits: list[Entrance]) -> bool:
         # speculative sweep is expensive. We currently only do it as a last resort, if we might cap off the graph
@@ -3,7 +3,7 @@ from typing import ClassVar, cast
 
 from typing_extensions import override
 
-from BaseClasses import CollectionState, Item, MultiWorld, Region
+from BaseClasses import CollectionState, Item, Location, MultiWorld, Region
 from worlds.AutoWorld import LogicMixin, World
 
 from .rules import Rule
@@ -24,6 +24,10 @@ class CachedRuleBuilderWorld(World):
     rule_entrance_dependencies: dict[str, set[int]]
     """A mapping of entrance name to set of rule ids"""
 
+    rule_sweep_dependencies: dict[int, tuple[Rule.Resolved, frozenset[str], frozenset[str]]]
+    """A mapping of rule id to the rule and the item and region names it depends on,
+    only for rules that do not depend on anything else"""
+
     item_mapping: ClassVar[dict[str, str]] = {}
     """A mapping of actual item name to logical item name.
     Useful when there are multiple versions of a collected item but the logic only uses one. For example:
@@ -32,24 +36,46 @@ class CachedRuleBuilderWorld(World):
     rule_caching_enabled: ClassVar[bool] = True
     """Flag to inform rules that the caching system for this world is enabled. It should not be overridden."""
 
+    sweep_dependencies = True
+
     def __init__(self, multiworld: MultiWorld, player: int) -> None:
         super().__init__(multiworld, player)
         self.rule_item_dependencies = defaultdict(set)
         self.rule_region_dependencies = defaultdict(set)
         self.rule_location_dependencies = defaultdict(set)
         self.rule_entrance_dependencies = defaultdict(set)
+        self.rule_sweep_dependencies = {}
 
     @override
     def register_rule_dependencies(self, resolved_rule: Rule.Resolved) -> None:
-        for item_name, rule_ids in resolved_rule.item_dependencies().items():
+        item_dependencies = resolved_rule.item_dependencies()
+        region_dependencies = resolved_rule.region_dependencies()
+        location_dependencies = resolved_rule.location_dependencies()
+        entrance_dependencies = resolved_rule.entrance_dependencies()
+        for item_name, rule_ids in item_dependencies.items():
             self.rule_item_dependencies[item_name] |= rule_ids
-        for region_name, rule_ids in resolved_rule.region_dependencies().items():
+        for region_name, rule_ids in region_dependencies.items():
             self.rule_region_dependencies[region_name] |= rule_ids
-        for location_name, rule_ids in resolved_rule.location_dependencies().items():
+        for location_name, rule_ids in location_dependencies.items():
             self.rule_location_dependencies[location_name] |= rule_ids
-        for entrance_name, rule_ids in resolved_rule.entrance_dependencies().items():
+        for entrance_name, rule_ids in entrance_dependencies.items():
             self.rule_entrance_dependencies[entrance_name] |= rule_ids
 
+        if not resolved_rule.force_recalculate and not location_dependencies and not entrance_dependencies:
+            item_names = {item_name for item_name, logical_name in self.item_mapping.items()
+                          if logical_name in item_dependencies}
+            item_names.update(item_dependencies)
+            self.rule_sweep_dependencies[id(resolved_rule)] = (
+                resolved_rule, frozenset(item_names), frozenset(region_dependencies)
+            )
+
+    @override
+    def get_sweep_dependencies(self, location: Location) -> tuple[frozenset[str], frozenset[str]] | None:
+        dependencies = self.rule_sweep_dependencies.get(id(location.access_rule))
+        if dependencies is None or dependencies[0] is not location.access_rule:
+            return None
+        return dependencies[1], dependencies[2]
+
     def register_rule_builder_dependencies(self) -> None:
         """Register all rules that depend on locations or entrances with their dependencies"""
         for location_name, rule_ids in self.rule_location_dependencies.items():
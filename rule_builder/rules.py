@@ -32,6 +32,14 @@ def _create_hash_fn(resolved_rule_cls: "CustomRuleRegister") -> Callable[..., in
     return hash_impl
 
 
+def _item_indices(world: "World", item_names: Iterable[str]) -> tuple[int, ...] | None:
+    """Returns the indices of the given items into state.prog_items counts, or None if any of them is not registered"""
+    item_name_to_index = world.item_name_to_index
+    if not all(item_name in item_name_to_index for item_name in item_names):
+        return None
+    return tuple(item_name_to_index[item_name] for item_name in item_names)
+
+
 @dataclass_transform(frozen_default=True, field_specifiers=(dataclasses.field, dataclasses.Field))
 class CustomRuleRegister(type):
     """A metaclass to contain world custom rules and automatically convert resolved rules to frozen dataclasses"""
@@ -792,6 +800,7 @@ class HasAll(Rule[TWorld], game="Archipelago"):
             return Has(self.item_names[0]).resolve(world)
         return self.Resolved(
             self.item_names,
+            item_indices=_item_indices(world, self.item_names),
             player=world.player,
             caching_enabled=getattr(world, "rule_caching_enabled", False),
         )
@@ -812,9 +821,18 @@ class HasAll(Rule[TWorld], game="Archipelago"):
 
     class Resolved(Rule.Resolved):
         item_names: tuple[str, ...]
+        item_indices: tuple[int, ...] | None = None
+        """Precompiled item indices matching item_names, if all of them are registered items"""
 
         @override
         def _evaluate(self, state: CollectionState) -> bool:
+            if self.item_indices is not None:
+                # implementation based on state.has_all_indices
+                counts = state.prog_items[self.player].counts
+                for index in self.item_indices:
+                    if not counts[index]:
+                        return False
+                return True
             # implementation based on state.has_all
             player_prog_items = state.prog_items[self.player]
             for item in self.item_names:
@@ -910,6 +928,7 @@ class HasAny(Rule[TWorld], game="Archipelago"):
             return Has(self.item_names[0]).resolve(world)
         return self.Resolved(
             self.item_names,
+            item_indices=_item_indices(world, self.item_names),
             player=world.player,
             caching_enabled=getattr(world, "rule_caching_enabled", False),
         )
@@ -930,9 +949,18 @@ class HasAny(Rule[TWorld], game="Archipelago"):
 
     class Resolved(Rule.Resolved):
         item_names: tuple[str, ...]
+        item_indices: tuple[int, ...] | None = None
+        """Precompiled item indices matching item_names, if all of them are registered items"""
 
         @override
         def _evaluate(self, state: CollectionState) -> bool:
+            if self.item_indices is not None:
+                # implementation based on state.has_any_indices
+                counts = state.prog_items[self.player].counts
+                for index in self.item_indices:
+                    if counts[index]:
+                        return True
+                return False
             # implementation based on state.has_any
             player_prog_items = state.prog_items[self.player]
             for item in self.item_names:
@@ -1531,6 +1559,7 @@ class HasGroup(Rule[TWorld], game="Archipelago"):
             self.item_name_group,
             item_names,
             count=resolve_field(self.count, world, int),
+            item_indices=_item_indices(world, item_names),
             player=world.player,
             caching_enabled=getattr(world, "rule_caching_enabled", False),
         )
@@ -1545,11 +1574,21 @@ class HasGroup(Rule[TWorld], game="Archipelago"):
         item_name_group: str
         item_names: tuple[str, ...]
         count: int = 1
+        item_indices: tuple[int, ...] | None = None
+        """Precompiled item indices matching item_names, if all of them are registered items"""
 
         @override
         def _evaluate(self, state: CollectionState) -> bool:
-            # implementation based on state.has_group
             found = 0
+            if self.item_indices is not None:
+                # implementation based on state.has_from_indices
+                counts = state.prog_items[self.player].counts
+                for index in self.item_indices:
+                    found += counts[index]
+                    if found >= self.count:
+                        return True
+                return False
+            # implementation based on state.has_group
             player_prog_items = state.prog_items[self.player]
             for item_name in self.item_names:
                 found += player_prog_items[item_name]
@@ -1605,6 +1644,7 @@ class HasGroupUnique(Rule[TWorld], game="Archipelago"):
             self.item_name_group,
             item_names,
             count=resolve_field(self.count, world, int),
+            item_indices=_item_indices(world, item_names),
             player=world.player,
             caching_enabled=getattr(world, "rule_caching_enabled", False),
         )
@@ -1619,11 +1659,21 @@ class HasGroupUnique(Rule[TWorld], game="Archipelago"):
         item_name_group: str
         item_names: tuple[str, ...]
         count: int = 1
+        item_indices: tuple[int, ...] | None = None
+        """Precompiled item indices matching item_names, if all of them are registered items"""
 
         @override
         def _evaluate(self, state: CollectionState) -> bool:
-            # implementation based on state.has_group_unique
             found = 0
+            if self.item_indices is not None:
+                # implementation based on state.has_from_indices_unique
+                counts = state.prog_items[self.player].counts
+                for index in self.item_indices:
+                    found += counts[index] > 0
+                    if found >= self.count:
+                        return True
+                return False
+            # implementation based on state.has_group_unique
             player_prog_items = state.prog_items[self.player]
             for item_name in self.item_names:
                 found += player_prog_items[item_name] > 0
@@ -36,12 +36,8 @@ def _update_cache() -> None:
         return
 
     try:
-        from worlds.AutoWorld import AutoWorldRegister
-        for world in AutoWorldRegister.world_types.values():
-            annotation = world.__annotations__.get("settings", None)
-            if annotation is None or annotation == "ClassVar[Optional['Group']]":
-                continue
-            _world_settings_name_cache[world.settings_key] = f"{world.__module__}.{world.__name__}"
+        from worlds import get_world_settings_names
+        _world_settings_name_cache.update(get_world_settings_names())
     finally:
         _world_settings_name_cache_updated = True
 
@@ -532,6 +528,12 @@ class ServerOptions(Group):
         Allows for clients to log on and manage the server.  If this is null, no remote administration is possible.
         """
 
+    class SaveJournalEntries(int):
+        """
+        Write autosaves as an append-only journal of changes, instead of rewriting the whole save each time.
+        A full save is written again after this many journal entries. 0 to always write full saves.
+        """
+
     class DisableItemCheat(Bool):
         """Disallow !getitem"""
 
@@ -609,12 +611,19 @@ class ServerOptions(Group):
         OFF = 0
         ON = 1
 
+    class MetricsPort(int):
+        """
+        Serve server metrics in Prometheus text format on http://127.0.0.1:<port>/metrics. 0 to disable.
+        The same metrics can be viewed with the /metrics server console command.
+        """
+
     host: str | None = None
     port: int = 38281
     password: str | None = None
     multidata: str | None = None
     savefile: str | None = None
     disable_save: bool = False
+    save_journal_entries: SaveJournalEntries = SaveJournalEntries(0)
     loglevel: str = "info"
     logtime: bool = False
     server_password: ServerPassword | None = None
@@ -628,6 +637,7 @@ class ServerOptions(Group):
     auto_shutdown: AutoShutdown = AutoShutdown(0)
     compatibility: Compatibility = Compatibility(2)
     log_network: LogNetwork = LogNetwork(0)
+    metrics_port: MetricsPort = MetricsPort(0)
 
 
 class GeneratorOptions(Group):
@@ -679,6 +689,12 @@ class GeneratorOptions(Group):
         OFF = 0
         ON = 1
 
+    class PlaythroughWorkers(int):
+        """
+        Amount of processes used to find the items required for the spoiler playthrough, 0 to find them serially.
+        Only used on platforms that can fork processes.
+        """
+
     class PanicMethod(str):
         """
         What to do if the current item placements appear unsolvable.
@@ -696,6 +712,7 @@ class GeneratorOptions(Group):
     race: Race = Race(0)
     plando_options: PlandoOptions = PlandoOptions("bosses, connections, texts")
     panic_method: PanicMethod = PanicMethod("swap")
+    playthrough_workers: PlaythroughWorkers = PlaythroughWorkers(0)
     loglevel: str = "info"
     logtime: bool = False
 
@@ -0,0 +1,94 @@
+def run_item_counts_benchmark() -> None:
+    """
+    Run a benchmark comparing item checks by name against checks by precompiled item index,
+    for an empty_state and an all_state of each world.
+    """
+    import argparse
+    import logging
+    import gc
+    import typing
+
+    from time_it import TimeIt
+
+    from Utils import init_logging
+    from BaseClasses import MultiWorld, CollectionState
+    from worlds import AutoWorld
+    from worlds.AutoWorld import call_all
+
+    init_logging("Benchmark Runner")
+    logger = logging.getLogger("Benchmark")
+
+    class BenchmarkRunner:
+        gen_steps: typing.Tuple[str, ...] = (
+            "generate_early",
+            "create_regions",
+            "create_items",
+            "set_rules",
+        )
+
+        rule_iterations: int = 100_000
+        items_per_rule: int = 5
+
+        def compare(self, game: str, state: CollectionState, state_name: str, item_names: typing.Tuple[str, ...],
+                    group_name: str) -> None:
+            world = state.multiworld.worlds[1]
+            item_indices = tuple(world.item_name_to_index[item_name] for item_name in item_names)
+            group_names = tuple(world.item_name_groups[group_name])
+            group_indices = world.item_name_group_indices[group_name]
+            checks: typing.List[typing.Tuple[str, typing.Callable[[], typing.Any]]] = [
+                ("has_all", lambda: state.has_all(item_names, 1)),
+                ("has_all_indices", lambda: state.has_all_indices(item_indices, 1)),
+                ("has_any", lambda: state.has_any(item_names, 1)),
+                ("has_any_indices", lambda: state.has_any_indices(item_indices, 1)),
+                ("has_from_list", lambda: state.has_from_list(group_names, 1, len(group_names))),
+                ("has_from_indices", lambda: state.has_from_indices(group_indices, 1, len(group_names))),
+                ("has_group", lambda: state.has_group(group_name, 1, len(group_names))),
+            ]
+            for name, check in checks:
+                gc.freeze()
+                with TimeIt(f"{game} {self.rule_iterations} runs of {name}({state_name})", logger):
+                    for _ in range(self.rule_iterations):
+                        check()
+                gc.unfreeze()
+
+        def main(self) -> None:
+            for game in sorted(AutoWorld.AutoWorldRegister.world_types):
+                world_type = AutoWorld.AutoWorldRegister.world_types[game]
+                if world_type.hidden or not world_type.item_name_to_index:
+                    continue
+                try:
+                    multiworld = MultiWorld(1)
+                    multiworld.game[1] = game
+                    multiworld.player_name = {1: "Tester"}
+                    multiworld.set_seed(0)
+                    args = argparse.Namespace()
+                    for name, option in world_type.options_dataclass.type_hints.items():
+                        setattr(args, name, {
+                            1: option.from_any(getattr(option, "default"))
+                        })
+                    multiworld.set_options(args)
+                    multiworld.state = CollectionState(multiworld)
+                    for step in self.gen_steps:
+                        call_all(multiworld, step)
+
+                    progression = sorted({item.name for item in multiworld.itempool
+                                          if item.advancement and item.name in world_type.item_name_to_index})
+                    if not progression:
+                        continue
+                    item_names = tuple(progression[::max(1, len(progression) // self.items_per_rule)])
+                    group_name = max(world_type.item_name_group_indices,
+                                     key=lambda group: len(world_type.item_name_group_indices[group]))
+
+                    self.compare(game, multiworld.state, "empty_state", item_names, group_name)
+                    self.compare(game, multiworld.get_all_state(False), "all_state", item_names, group_name)
+                except Exception as e:
+                    logger.exception(e)
+
+    runner = BenchmarkRunner()
+    runner.main()
+
+
+if __name__ == "__main__":
+    from path_change import change_home
+    change_home()
+    run_item_counts_benchmark()
@@ -0,0 +1,80 @@
+import importlib.util
+import os
+import sys
+import tempfile
+import unittest
+import zipfile
+from unittest import mock
+
+from worlds import APWorldCache, APWorldImporter
+
+manifest = {"game": "Cached Game", "world_version": "1.0.0", "compatible_version": 7, "version": 7}
+
+
+class TestAPWorldCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+        self.path = os.path.join(self.directory.name, "cached_world.apworld")
+        self.write_apworld("value = 1")
+        patcher = mock.patch("worlds.cache_path", lambda *path: os.path.join(self.directory.name, "cache", *path))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self) -> None:
+        for name in ("cached_world", "cached_world.sub"):
+            sys.modules.pop(name, None)
+        self.directory.cleanup()
+
+    def write_apworld(self, sub_source: str) -> None:
+        with zipfile.ZipFile(self.path, "w") as zf:
+            zf.writestr("cached_world/__init__.py", "from . import sub\n")
+            zf.writestr("cached_world/sub.py", sub_source)
+        os.utime(self.path, ns=(0, os.stat(self.path).st_mtime_ns + 1))
+
+    def import_world(self) -> APWorldImporter:
+        for name in ("cached_world", "cached_world.sub"):
+            sys.modules.pop(name, None)
+        importer = APWorldImporter(self.path, APWorldCache(self.path))
+        if importer.cache.read_manifest() is None:
+            importer.cache.write_manifest(manifest)
+        spec = importer.find_spec("cached_world")
+        module = importlib.util.module_from_spec(spec)
+        sys.modules["cached_world"] = module
+        with mock.patch("sys.path_hooks", [lambda entry: APWorldImporter(entry, importer.cache)]), \
+                mock.patch("sys.path_importer_cache", {}):
+            spec.loader.exec_module(module)
+        return importer
+
+    def test_cached(self) -> None:
+        """Ensure manifest and modules are read from the cache while the apworld is unchanged."""
+        importer = self.import_world()
+        self.assertEqual(sys.modules["cached_world"].sub.value, 1)
+        self.assertEqual(sys.modules["cached_world"].sub.__file__,
+                         os.path.join(self.path, "cached_world", "sub.py"))
+        self.assertEqual(sorted(os.listdir(importer.cache.directory)),
+                         ["cached_world.pyc", "cached_world.sub.pyc", "manifest.json"])
+
+        self.assertEqual(APWorldCache(self.path).read_manifest(), manifest)
+        with mock.patch("worlds._get_module_code", side_effect=AssertionError("compiled")):
+            self.import_world()
+        self.assertEqual(sys.modules["cached_world"].sub.value, 1)
+
+    def test_changed(self) -> None:
+        """Ensure nothing cached is used once the apworld changes."""
+        self.import_world()
+        self.write_apworld("value = 2")
+        self.assertIsNone(APWorldCache(self.path).read_manifest())
+        importer = self.import_world()
+        self.assertEqual(sys.modules["cached_world"].sub.value, 2)
+        self.assertEqual(sorted(os.listdir(importer.cache.directory)),
+                         ["cached_world.pyc", "cached_world.sub.pyc", "manifest.json"])
+
+    def test_without_get_module_code(self) -> None:
+        """Ensure apworlds still load and get cached if zipimport's private _get_module_code is gone."""
+        with mock.patch("worlds._get_module_code", None):
+            importer = self.import_world()
+        self.assertEqual(sys.modules["cached_world"].sub.value, 1)
+        self.assertEqual(sys.modules["cached_world"].sub.__file__,
+                         os.path.join(self.path, "cached_world", "sub.py"))
+        self.assertEqual(sorted(os.listdir(importer.cache.directory)),
+                         ["cached_world.pyc", "cached_world.sub.pyc", "manifest.json"])
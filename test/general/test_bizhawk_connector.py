@@ -0,0 +1,120 @@
+import asyncio
+import json
+import unittest
+from unittest import mock
+
+from worlds._bizhawk import (BizHawkContext, ConnectionStatus, NotConnectedError, RequestFailedError, disconnect,
+                             get_hash, guarded_read, ping, read, send_requests)
+
+
+class FakeConnector:
+    """Answers requests like connector_bizhawk_generic.lua, recording the messages it received."""
+
+    def __init__(self) -> None:
+        self.messages: list[object] = []
+        self.writers: list[asyncio.StreamWriter] = []
+        self.respond = asyncio.Event()
+        self.respond.set()
+
+    @staticmethod
+    def process_request_list(req_list: list[dict]) -> list[dict]:
+        res = []
+        for req in req_list:
+            if res and res[-1]["type"] == "GUARD_RESPONSE" and not res[-1]["value"]:
+                res.append(res[-1])
+            elif req["type"] == "PING":
+                res.append({"type": "PONG"})
+            elif req["type"] == "HASH":
+                res.append({"type": "HASH_RESPONSE", "value": "F7D18982"})
+            elif req["type"] == "GUARD":
+                res.append({"type": "GUARD_RESPONSE", "value": req["address"] == 0, "address": req["address"]})
+            elif req["type"] == "READ":
+                res.append({"type": "READ_RESPONSE", "value": "AAAA"})
+        return res
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.writers.append(writer)
+        while line := await reader.readline():
+            await self.respond.wait()
+            message = json.loads(line)
+            self.messages.append(message)
+            responses = [self.process_request_list(req_list) for req_list in message["requests"]]
+            writer.write(json.dumps({"id": message["id"], "responses": responses}).encode() + b"\n")
+            await writer.drain()
+        writer.close()
+
+
+class TestBizHawkConnector(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.connector = FakeConnector()
+        self.server = await asyncio.start_server(self.connector.handle, "127.0.0.1", 0)
+        self.ctx = BizHawkContext()
+        self.ctx.streams = await asyncio.open_connection("127.0.0.1", self.server.sockets[0].getsockname()[1])
+        self.ctx.connection_status = ConnectionStatus.TENTATIVE
+
+    async def asyncTearDown(self) -> None:
+        disconnect(self.ctx)
+        for writer in self.connector.writers:
+            writer.close()
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def test_batching(self) -> None:
+        """Ensure concurrent requests share one message, while keeping their guards separate."""
+        _, rom_hash, guarded, unguarded = await asyncio.gather(
+            ping(self.ctx), get_hash(self.ctx),
+            guarded_read(self.ctx, [(0, 3, "ROM")], [(1, [0], "ROM")]),
+            read(self.ctx, [(0, 3, "ROM")]))
+        self.assertEqual(rom_hash, "F7D18982")
+        self.assertIsNone(guarded)
+        self.assertEqual(unguarded, [b"\0\0\0"])
+        self.assertEqual(len(self.connector.messages), 1)
+        self.assertEqual(len(self.connector.messages[0]["requests"]), 4)
+        self.assertEqual(self.ctx.connection_status, ConnectionStatus.CONNECTED)
+
+        await ping(self.ctx)
+        self.assertEqual(len(self.connector.messages), 2)
+
+    async def test_pipelining(self) -> None:
+        """Ensure messages can be sent before previous ones are answered, and get their own responses."""
+        self.connector.respond.clear()
+        first = asyncio.create_task(send_requests(self.ctx, [{"type": "PING"}]))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(send_requests(self.ctx, [{"type": "HASH"}]))
+        await asyncio.sleep(0.1)
+        self.assertFalse(first.done())
+        self.connector.respond.set()
+        self.assertEqual(await second, [{"type": "HASH_RESPONSE", "value": "F7D18982"}])
+        self.assertEqual(await first, [{"type": "PONG"}])
+        self.assertEqual([message["id"] for message in self.connector.messages], [1, 2])
+
+    async def test_disconnect(self) -> None:
+        """Ensure requests waiting for a response fail when the connection is closed."""
+        self.connector.respond.clear()
+        task = asyncio.create_task(ping(self.ctx))
+        await asyncio.sleep(0.1)
+        disconnect(self.ctx)
+        with self.assertRaises(NotConnectedError):
+            await task
+        with self.assertRaises(NotConnectedError):
+            await ping(self.ctx)
+
+    async def test_connection_closed(self) -> None:
+        """Ensure the connector closing the connection fails waiting requests."""
+        self.connector.respond.clear()
+        task = asyncio.create_task(ping(self.ctx))
+        await asyncio.sleep(0.1)
+        self.connector.writers[0].close()
+        with self.assertRaises(RequestFailedError):
+            await task
+        self.assertEqual(self.ctx.connection_status, ConnectionStatus.NOT_CONNECTED)
+
+    async def test_connection_error(self) -> None:
+        """Ensure other connection errors while reading fail waiting requests and let later requests read again."""
+        self.connector.respond.clear()
+        with mock.patch.object(self.ctx.streams[0], "readline", side_effect=BrokenPipeError("broken pipe")):
+            with self.assertRaises(RequestFailedError):
+                # fails right away instead of waiting for the request to time out
+                await asyncio.wait_for(ping(self.ctx), 1)
+        self.assertIsNone(self.ctx._reader_task)
+        self.assertEqual(self.ctx.connection_status, ConnectionStatus.NOT_CONNECTED)
@@ -287,6 +287,43 @@ class TestRandomizeEntrances(unittest.TestCase):
             self.assertEqual(e1.parent_region.name, e1.parent_region.name)
             self.assertEqual(e1.connected_region.name, e2.connected_region.name)
 
+    def test_incremental(self):
+        """tests that incremental mode produces the same output and reachability as the full updates"""
+        results = []
+        for incremental in (False, True):
+            multiworld = generate_test_multiworld()
+            generate_disconnected_region_grid(multiworld, 5, 1)
+            event_location = multiworld.get_region("region7", 1).locations[0]
+            event_location.place_locked_item(generate_items(1, 1, True)[0])
+            set_rule(multiworld.get_entrance("region3_bottom", 1), lambda state: state.has("player1_progitem0", 1))
+
+            result = randomize_entrances(multiworld.worlds[1], True, directionally_matched_group_lookup,
+                                         incremental=incremental)
+            self.assertIn(event_location, result.collection_state.advancements)
+            results.append((result.pairings, {region.name for region in result.placed_regions}))
+        self.assertEqual(results[0], results[1])
+
+    def test_incremental_speculative_connection(self):
+        """tests that a speculative connection in incremental mode leaves the collection state unchanged"""
+        multiworld = generate_test_multiworld()
+        generate_disconnected_region_grid(multiworld, 2, 1)
+        event_location = multiworld.get_region("region1", 1).locations[0]
+        event_location.place_locked_item(generate_items(1, 1, True)[0])
+        exits = [ex for region in multiworld.get_regions(1) for ex in region.exits if not ex.connected_region]
+        er_targets = [entrance for region in multiworld.get_regions(1)
+                      for entrance in region.entrances if not entrance.parent_region]
+        er_state = ERPlacementState(multiworld.worlds[1], EntranceLookup(multiworld.worlds[1].random, True,
+                                                                         set(exits), er_targets), True, True)
+        state = er_state.collection_state
+        before = (set(state.reachable_regions[1]), set(state.blocked_connections[1]), dict(state.path),
+                  set(state.advancements), state.prog_items[1].copy())
+
+        source_exit = multiworld.get_entrance("region0_right", 1)
+        target_entrance = next(entrance for entrance in er_targets if entrance.name == "region1_left")
+        self.assertTrue(er_state.test_speculative_connection(source_exit, target_entrance, set(exits)))
+        self.assertEqual(before, (state.reachable_regions[1], state.blocked_connections[1], state.path,
+                                  state.advancements, state.prog_items[1]))
+
     def test_all_entrances_placed(self):
         """tests that all entrances and exits were placed, all regions are connected, and no dangling edges exist"""
         multiworld = generate_test_multiworld()
@@ -366,6 +366,25 @@ class TestFillRestrictive(unittest.TestCase):
         fill_restrictive(multiworld, multiworld.state,
                          locations, player1.prog_items)
 
+    def test_multiplayer_chained_progress(self):
+        """Test that long chains of progression across worlds are filled, sweeping from cached exploration states"""
+        multiworld = generate_test_multiworld(2)
+        players = [generate_player_data(multiworld, player_id, 2, 20) for player_id in (1, 2)]
+        for player in players:
+            region = player.menu
+            for item in player.prog_items[:-1]:
+                region = player.generate_region(region, 2, lambda state, name=item.name, player_id=player.id:
+                                                state.has(name, player_id))
+            multiworld.completion_condition[player.id] = lambda state, items=player.prog_items, player_id=player.id: \
+                state.has_all(names(items), player_id)
+
+        locations = multiworld.get_unfilled_locations()
+        item_pool = players[0].prog_items + players[1].prog_items
+        fill_restrictive(multiworld, multiworld.state, locations, item_pool)
+
+        self.assertEqual([], item_pool)
+        self.assertTrue(multiworld.can_beat_game(multiworld.state))
+
     def test_swap_to_earlier_location_with_item_rule(self):
         """Test that item swap happens and works as intended"""
         # test for PR#1109
@@ -25,3 +25,14 @@ class TestNameGroups(TestCase):
             with self.subTest(game=game_name):
                 for name, group in world_type.location_name_groups.items():
                     self.assertTrue(group, f"Location name group \"{name}\" of \"{game_name}\" is empty")
+
+    def test_item_name_group_indices(self) -> None:
+        """
+        Test that precompiled item name group indices match the item name groups they were built from.
+        """
+        for game_name, world_type in AutoWorldRegister.world_types.items():
+            with self.subTest(game=game_name):
+                index_to_name = {index: name for name, index in world_type.item_name_to_index.items()}
+                for name, indices in world_type.item_name_group_indices.items():
+                    self.assertEqual({index_to_name[index] for index in indices}, world_type.item_name_groups[name],
+                                     f"Item name group \"{name}\" of \"{game_name}\" changed after registration")
@@ -0,0 +1,51 @@
+import unittest
+from unittest import mock
+
+from Utils import Version
+from worlds import WorldIndexGame, WorldTypes
+
+
+def index_game(settings: str | None = None) -> WorldIndexGame:
+    return {"world_version": "1.2.3", "checksum": "abc", "settings_key": "game_options", "settings": settings}
+
+
+class TestWorldTypes(unittest.TestCase):
+    def setUp(self) -> None:
+        self.world_types = WorldTypes()
+        self.world_type = mock.Mock(settings_key="loaded_options", __annotations__={})
+        self.world_types["Loaded"] = self.world_type
+        self.source = mock.Mock()
+        self.world_types.add_lazy(self.source, {"Lazy": index_game("worlds.lazy.LazyWorld"), "Loaded": index_game()})
+
+    def test_lazy(self) -> None:
+        """Ensure indexed games are known without importing them, and imported on access."""
+        self.assertIn("Lazy", self.world_types)
+        self.assertEqual(list(self.world_types), ["Loaded", "Lazy"])
+        self.assertEqual(len(self.world_types), 2)
+        self.assertEqual(self.world_types.get_settings_names(), {"game_options": "worlds.lazy.LazyWorld"})
+        self.source.load.assert_not_called()
+
+        lazy_type = mock.Mock()
+        self.source.load.side_effect = lambda: self.world_types.__setitem__("Lazy", lazy_type)
+        self.assertIs(self.world_types["Lazy"], lazy_type)
+        self.assertEqual(lazy_type.world_version, Version(1, 2, 3))
+        self.assertIs(self.world_types["Lazy"], lazy_type)
+        self.source.load.assert_called_once_with()
+        # the index entry of a game that was already imported is ignored
+        self.assertNotEqual(self.world_type.world_version, Version(1, 2, 3))
+
+    def test_failed(self) -> None:
+        """Ensure a game that fails to import is dropped."""
+        self.source.load.return_value = False
+        self.assertIsNone(self.world_types.get("Lazy"))
+        self.assertNotIn("Lazy", self.world_types)
+        self.assertEqual(dict(self.world_types.items()), {"Loaded": self.world_type})
+        with self.assertRaises(KeyError):
+            self.world_types["Missing"]
+
+    def test_items(self) -> None:
+        """Ensure getting all values imports every game."""
+        lazy_type = mock.Mock()
+        self.source.load.side_effect = lambda: self.world_types.__setitem__("Lazy", lazy_type)
+        self.assertEqual(list(self.world_types.values()), [self.world_type, lazy_type])
+        self.assertEqual(self.world_types.copy(), {"Loaded": self.world_type, "Lazy": lazy_type})
@@ -1,6 +1,12 @@
-﻿import unittest
+﻿import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
 from worlds.AutoWorld import AutoWorldRegister
-from worlds.Files import AutoPatchRegister
+from worlds.Files import (APPatchExtension, APProcedurePatch, APTokenMixin, APTokenTypes, AutoPatchExtensionRegister,
+                          AutoPatchRegister)
 
 
 class TestPatches(unittest.TestCase):
@@ -9,3 +15,89 @@ class TestPatches(unittest.TestCase):
             with self.subTest(game=game_name):
                 self.assertIn(game_name, AutoWorldRegister.world_types.keys(),
                               f"Patch '{game_name}' does not match the name of any world.")
+
+
+class TokenPatch(APProcedurePatch, APTokenMixin):
+    procedure = [("apply_tokens", ["token_data.bin"]), ("check_bytes", []), ("apply_tokens", ["token_data.bin"]),
+                 ("calc_snes_crc", [])]
+    hash = None
+    source: bytes
+
+    @classmethod
+    def get_source_data(cls) -> bytes:
+        return cls.source
+
+
+class TestTokens(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = random.Random(0)
+        self.rom = rng.randbytes(0x10000)
+        self.patch = TokenPatch(player=1, player_name="Player1")
+        for offset in (0x10, 0x10, 0x11, 0x8000, 0x10):
+            for token_type in (APTokenTypes.XOR_8, APTokenTypes.AND_8, APTokenTypes.OR_8):
+                self.patch.write_token(token_type, offset, rng.randrange(0x100))
+        self.patch.write_token(APTokenTypes.WRITE, 0x100, b"written")
+        self.patch.write_token(APTokenTypes.XOR_8, 0x100, 0xFF)
+        self.patch.write_token(APTokenTypes.COPY, 0x200, (0x20, 0x1F0))
+        self.patch.write_token(APTokenTypes.RLE, 0x300, (0x40, 0xAB))
+        self.patch.write_token(APTokenTypes.XOR_8, 0xFFFF, 0x01)
+        self.patch.write_file("token_data.bin", self.patch.get_token_binary())
+
+    def apply_one_by_one(self, rom: bytes) -> bytes:
+        rom_data = bytearray(rom)
+        for token_type, offset, data in self.patch._tokens:
+            if token_type == APTokenTypes.AND_8:
+                rom_data[offset] &= data
+            elif token_type == APTokenTypes.OR_8:
+                rom_data[offset] |= data
+            elif token_type == APTokenTypes.XOR_8:
+                rom_data[offset] ^= data
+            elif token_type == APTokenTypes.COPY:
+                rom_data[offset:offset + data[0]] = rom_data[data[1]:data[1] + data[0]]
+            elif token_type == APTokenTypes.RLE:
+                rom_data[offset:offset + data[0]] = bytes([data[1]] * data[0])
+            else:
+                rom_data[offset:offset + len(data)] = data
+        return bytes(rom_data)
+
+    def test_apply_tokens(self) -> None:
+        """Ensure tokens apply in order, returning bytes for bytes and changing a bytearray in place."""
+        expected = self.apply_one_by_one(self.rom)
+        patched = APPatchExtension.apply_tokens(self.patch, self.rom, "token_data.bin")
+        self.assertIsInstance(patched, bytes)
+        self.assertEqual(patched, expected)
+        buffer = bytearray(self.rom)
+        self.assertIs(APPatchExtension.apply_tokens(self.patch, buffer, "token_data.bin"), buffer)
+        self.assertEqual(buffer, expected)
+
+    def test_procedure(self) -> None:
+        """Ensure a procedure keeps its buffer only for in place steps, and others still get bytes."""
+        seen = []
+        returned = []
+
+        class CheckBytes(APPatchExtension):
+            @staticmethod
+            def check_bytes(caller: APProcedurePatch, rom: bytes) -> bytearray:
+                seen.append(type(rom))
+                returned.append(bytearray(rom))
+                return returned[-1]
+
+        expected = bytearray(self.apply_one_by_one(self.apply_one_by_one(self.rom)))
+        crc = (sum(expected[:0x7FDC]) + sum(expected[0x7FE0:]) + 0x01FE) & 0xFFFF
+        expected[0x7FDC:0x7FE0] = [crc & 0xFF ^ 0xFF, crc >> 8 ^ 0xFF, crc & 0xFF, crc >> 8]
+
+        with tempfile.TemporaryDirectory() as directory, \
+                mock.patch.object(TokenPatch, "source", bytearray(self.rom), create=True), \
+                mock.patch.dict(AutoPatchExtensionRegister.extension_types, {"Token Game": CheckBytes}):
+            self.patch.path = os.path.join(directory, "patch.zip")
+            self.patch.write()
+            self.patch.game = "Token Game"
+            target = os.path.join(directory, "patched.sfc")
+            self.patch.patch(target)
+            with open(target, "rb") as patched:
+                self.assertEqual(patched.read(), expected)
+        self.assertEqual(seen, [bytes])
+        # neither the cached source data nor data returned by other extensions is changed in place
+        self.assertEqual(TokenPatch.source_data, self.rom)
+        self.assertEqual(returned, [self.apply_one_by_one(self.rom)])
+        del TokenPatch.source_data
@@ -1,5 +1,13 @@
+import logging
+import os
+import random
 import unittest
+from tempfile import TemporaryDirectory
+from unittest import mock
+
 import Generate
+import Options
+from BaseClasses import PlandoOptions
 
 
 class TestPlayerOptions(unittest.TestCase):
@@ -57,3 +65,75 @@ class TestPlayerOptions(unittest.TestCase):
         self.assertEqual(new_weights["dict_2"]["a"], 0)
         self.assertEqual(new_weights["dict_2"]["b"], -3)
         self.assertIn("a", new_weights["dict_2"])
+
+    def test_option_cache(self):
+        """Ensure options from identical weights get reused without changing the rolls or sharing instances."""
+        weights = {
+            "name": "Tester",
+            "game": "APQuest",
+            "APQuest": {
+                "local_items": ["Sword"],
+                "start_inventory": {"Sword": 1},
+                "progression_balancing": {"random": 1, 50: 1},
+            },
+        }
+
+        option_cache: Generate.OptionCache = {}
+
+        def roll() -> dict:
+            random.seed(1)
+            settings = vars(Generate.roll_settings(weights, PlandoOptions.bosses, option_cache))
+            return {key: getattr(value, "value", value) for key, value in settings.items()}
+
+        uncached = roll()
+        random_state = random.getstate()
+        self.assertTrue(option_cache)
+        self.assertEqual(roll(), uncached)
+        self.assertEqual(random.getstate(), random_state)
+
+        random.seed(1)
+        first = Generate.roll_settings(weights, PlandoOptions.bosses, option_cache)
+        second = Generate.roll_settings(weights, PlandoOptions.bosses, option_cache)
+        self.assertIsNot(first.local_items, second.local_items)
+        first.local_items.value.add("Shield")
+        self.assertEqual(second.local_items.value, {"Sword"})
+
+    def test_option_cache_uncacheable(self):
+        """Ensure options that are not cacheable are created and verified for every player."""
+        option_cache: Generate.OptionCache = {}
+        for name in ("Tester1", "Tester2"):
+            weights = {"name": name, "game": "APQuest",
+                       "APQuest": {"plando_items": [{"item": "Sword", "location": "Top Left Room Chest"}]}}
+            with self.assertLogs(level=logging.WARNING) as logs:
+                settings = Generate.roll_settings(weights, PlandoOptions.bosses, option_cache)
+            self.assertIn(f"WARNING:root:The plando items module is turned off, so items for {name} will be ignored.",
+                          logs.output)
+            self.assertEqual(settings.plando_items.value, [])
+        self.assertNotIn(Options.PlandoItems, {key[0] for key in option_cache})
+
+    def test_read_player_weights(self):
+        """Ensure identical files get parsed once, but get their own documents, and errors are returned per file."""
+        with TemporaryDirectory() as directory:
+            contents = {"a.yaml": "name: A\n---\nname: B\n", "b.yaml": "name: A\n---\nname: B\n",
+                        "c.yaml": "name: C\n", "d.yaml": "name: [D\n"}
+            paths = []
+            for filename, content in contents.items():
+                paths.append(os.path.join(directory, filename))
+                with open(paths[-1], "w") as f:
+                    f.write(content)
+            paths.append(os.path.join(directory, "missing.yaml"))
+
+            for threshold in (Generate.parallel_parse_threshold, 1):
+                with self.subTest(threshold=threshold), \
+                        mock.patch.object(Generate, "parallel_parse_threshold", threshold):
+                    results = Generate.read_player_weights(paths)
+                    self.assertEqual(results[paths[0]], ({"name": "A"}, {"name": "B"}))
+                    self.assertEqual(results[paths[1]], results[paths[0]])
+                    self.assertIsNot(results[paths[1]][0], results[paths[0]][0])
+                    self.assertEqual(results[paths[2]], ({"name": "C"},))
+                    self.assertIsInstance(results[paths[3]], Exception)
+                    self.assertIsInstance(results[paths[4]], Exception)
+
+            with mock.patch.object(Generate, "parse_weights_yamls", wraps=Generate.parse_weights_yamls) as parse:
+                Generate.read_player_weights(paths)
+            self.assertEqual(parse.call_count, 3)
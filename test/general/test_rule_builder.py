@@ -508,6 +508,31 @@ class TestCaching(CachedRuleBuilderTestCase):
         self.assertNotIn(id(entrance.access_rule), self.state.rule_builder_cache[1])
         self.assertTrue(entrance.can_reach(self.state))
 
+    def test_sweep_dependencies(self) -> None:
+        self.assertEqual(self.world.get_sweep_dependencies(self.world.get_location("Location 4")),
+                         ({"Item 2", "Item 3"}, set()))
+        self.assertEqual(self.world.get_sweep_dependencies(self.world.get_location("Location 2")),
+                         ({"Item 2"}, {"Region 2"}))
+        # rules depending on locations or entrances are re-tested every time
+        self.assertIsNone(self.world.get_sweep_dependencies(self.world.get_location("Location 5")))
+        self.assertIsNone(self.world.get_sweep_dependencies(self.world.get_location("Location 6")))
+
+    def test_sweep(self) -> None:
+        placements = {
+            "Location 1": "Item 1",  # access to region 2
+            "Location 3": "Item 2",
+            "Location 2": "Item 3",  # access to region 3
+            "Location 4": "Item 4",
+            "Location 5": "Item 5",
+            "Location 6": "Item 6",
+        }
+        for location_name, item_name in placements.items():
+            self.multiworld.push_item(self.world.get_location(location_name), self.world.create_item(item_name), False)
+
+        self.state.sweep_for_advancements()
+        for item_name in placements.values():
+            self.assertTrue(self.state.has(item_name, self.player), item_name)
+
 
 class TestCacheDisabled(RuleBuilderTestCase):
     multiworld: MultiWorld  # pyright: ignore[reportUninitializedInstanceVariable]
@@ -0,0 +1,75 @@
+import multiprocessing
+import unittest
+
+from Fill import FillError, swap_location_item
+from test.general import generate_items, generate_locations, generate_test_multiworld
+from worlds.generic.Rules import set_rule
+
+
+class TestLocationSpheres(unittest.TestCase):
+    def setUp(self) -> None:
+        self.multiworld = generate_test_multiworld()
+        menu = self.multiworld.get_region("Menu", 1)
+        self.event = generate_locations(1, 1, menu, None, "_event")[0]
+        self.locations = generate_locations(3, 1, menu, 1)
+        event_item = generate_items(1, 1, True)[0]
+        key_item = generate_items(1, 1, True, 1)[0]
+        key_item.name = "Key"
+        filler = generate_items(2, 1, False, 2)
+
+        set_rule(self.locations[0], lambda state: state.has(event_item.name, 1))
+        set_rule(self.locations[1], lambda state: state.has("Key", 1))
+        for location, item in zip([self.event, *self.locations], [event_item, key_item, *filler]):
+            self.multiworld.push_item(location, item, False)
+
+    def test_spheres(self) -> None:
+        """Ensure cached spheres match the spheres computed while iterating."""
+        event, (key, locked, free) = self.event, self.locations
+        expected = [{event, free}, {key}, {locked}]
+        expected_sendable = [{key, free}, {locked}]
+        self.assertEqual(list(self.multiworld.get_spheres()), expected)
+        self.assertEqual(list(self.multiworld.get_sendable_spheres()), expected_sendable)
+        self.assertTrue(self.multiworld.fulfills_accessibility())
+
+        self.multiworld.cache_location_spheres()
+        self.assertEqual(list(self.multiworld.get_spheres()), expected)
+        self.assertEqual(list(self.multiworld.get_sendable_spheres()), expected_sendable)
+        self.assertTrue(self.multiworld.fulfills_accessibility())
+        spheres = self.multiworld.get_location_spheres(True)
+        self.assertIs(self.multiworld.get_location_spheres(True), spheres)
+        self.assertEqual(spheres.sphere_index, {event: 0, key: 0, free: 0, locked: 1})
+
+    def test_invalidated(self) -> None:
+        """Ensure changing placements drops cached spheres."""
+        key, locked, free = self.locations
+        self.multiworld.cache_location_spheres()
+        spheres = self.multiworld.get_location_spheres()
+        swap_location_item(key, locked)
+        self.assertIsNot(self.multiworld.get_location_spheres(), spheres)
+        self.assertEqual(list(self.multiworld.get_sendable_spheres()), [{key, free}, set(), {locked}])
+        with self.assertRaises(FillError):
+            self.multiworld.fulfills_accessibility()
+
+        spheres = self.multiworld.get_location_spheres()
+        key_item = locked.item
+        self.multiworld.push_item(locked, generate_items(1, 1, False, 2)[0], False)
+        self.multiworld.push_item(free, key_item, False)
+        self.assertIsNot(self.multiworld.get_location_spheres(), spheres)
+        self.assertTrue(self.multiworld.fulfills_accessibility())
+
+    def test_playthrough_workers(self) -> None:
+        """Ensure checking required locations in forked workers doesn't change the playthrough."""
+        if "fork" not in multiprocessing.get_all_start_methods():
+            self.skipTest("processes can't be forked")
+        key, locked, free = self.locations
+        unrequired_item = generate_items(1, 1, True, 2)[0]
+        unrequired_item.name = "Unrequired"
+        self.multiworld.push_item(free, unrequired_item, False)
+        self.multiworld.completion_condition[1] = lambda state: state.can_reach(locked)
+        playthroughs = []
+        for workers in (0, 2):
+            self.multiworld.spoiler.create_playthrough(workers=workers)
+            playthroughs.append(self.multiworld.spoiler.playthrough)
+        self.assertEqual(playthroughs[0], playthroughs[1])
+        self.assertEqual(playthroughs[0], {"0": [], "1": {self.event.name: self.event.item.name},
+                                           "2": {key.name: key.item.name}})
@@ -1,7 +1,11 @@
+import pickle
 import unittest
+from collections import Counter
+from unittest import mock
 
+from BaseClasses import CollectionState, Item, ItemClassification, ItemCounter, Location
 from worlds.AutoWorld import AutoWorldRegister, call_all
-from . import setup_solo_multiworld
+from . import generate_test_multiworld, setup_solo_multiworld
 
 
 class TestBase(unittest.TestCase):
@@ -27,3 +31,80 @@ class TestBase(unittest.TestCase):
                     with self.subTest("Step", step=step):
                         call_all(multiworld, step)
                         self.assertTrue(multiworld.get_all_state(False, allow_partial_entrances=True))
+
+
+class TestItemCounter(unittest.TestCase):
+    def test_counts_follow_names(self) -> None:
+        """Ensure item counts by index stay in sync with counts by name, however the counter is modified."""
+        index = {"Item A": 0, "Item B": 1}
+        counter = ItemCounter(index, {"Item A": 2, "Event": 1})
+        self.assertEqual(counter.counts, [2, 0])
+
+        counter["Item B"] += 3
+        counter["Event"] += 1
+        self.assertEqual(counter.counts, [2, 3])
+        self.assertEqual(counter, Counter({"Item A": 2, "Item B": 3, "Event": 2}))
+
+        copy = counter.copy()
+        del counter["Item A"]
+        counter.update({"Item B": 1})
+        self.assertEqual(counter.counts, [0, 4])
+        self.assertEqual(copy.counts, [2, 3])
+
+        counter.subtract({"Item B": 4})
+        self.assertEqual(counter.counts, [0, 0])
+        self.assertEqual(pickle.loads(pickle.dumps(copy)).counts, [2, 3])
+        copy.clear()
+        self.assertEqual(copy.counts, [0, 0])
+
+    def test_state_has_indices(self) -> None:
+        """Ensure the index variants of has_all/has_any match their name variants."""
+        multiworld = generate_test_multiworld()
+        state = multiworld.state
+        state.prog_items[1] = ItemCounter({"Item A": 0, "Item B": 1})
+        state.add_item("Item A", 1)
+        self.assertTrue(state.has_all_indices((0,), 1))
+        self.assertFalse(state.has_all_indices((0, 1), 1))
+        self.assertTrue(state.has_any_indices((0, 1), 1))
+        self.assertFalse(state.has_from_indices((0, 1), 1, 2))
+        state.add_item("Item B", 1)
+        self.assertTrue(state.has_from_indices_unique((0, 1), 1, 2))
+        state.remove_item("Item A", 1)
+        self.assertFalse(state.has_all_indices((0, 1), 1))
+
+
+class TestSweepDependencies(unittest.TestCase):
+    def setUp(self) -> None:
+        self.multiworld = generate_test_multiworld(2)
+        self.menus = [self.multiworld.get_region("Menu", player) for player in (1, 2)]
+
+    def place(self, player: int, item_name: str, item_player: int) -> Location:
+        location = Location(player, f"Location {item_name}", None, self.menus[player - 1])
+        self.menus[player - 1].locations.append(location)
+        location.place_locked_item(Item(item_name, ItemClassification.progression, None, item_player))
+        return location
+
+    def test_counted_name(self) -> None:
+        """Ensure waiting locations wake for the name an item is counted as, like a progressive item's."""
+        self.place(1, "Progressive Sword", 1)
+        self.place(1, "Prize", 1).access_rule = lambda state: state.has("Sword", 1)
+        world = self.multiworld.worlds[1]
+
+        def collect_item(state: CollectionState, item: Item, remove: bool = False) -> str:
+            return "Sword" if item.name == "Progressive Sword" else item.name
+
+        with mock.patch.object(world, "sweep_dependencies", True, create=True), \
+                mock.patch.object(world, "get_sweep_dependencies", lambda location: ({"Sword"}, ()), create=True), \
+                mock.patch.object(world, "collect_item", collect_item, create=True):
+            self.multiworld.state.sweep_for_advancements()
+        self.assertTrue(self.multiworld.state.has("Prize", 1))
+
+    def test_other_world_dependency(self) -> None:
+        """Ensure waiting locations are re-tested when confirming the sweep is finished, for logic on other worlds."""
+        self.place(2, "Key", 2)
+        self.place(1, "Prize", 1).access_rule = lambda state: state.has("Key", 2)
+        world = self.multiworld.worlds[1]
+        with mock.patch.object(world, "sweep_dependencies", True, create=True), \
+                mock.patch.object(world, "get_sweep_dependencies", lambda location: ((), ()), create=True):
+            self.multiworld.state.sweep_for_advancements()
+        self.assertTrue(self.multiworld.state.has("Prize", 1))
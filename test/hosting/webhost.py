@@ -122,7 +122,7 @@ def start_room(app_client: "FlaskClient", room_id: str, timeout: float = 30) ->
             continue
 
         assert response.status_code == 200, f"Starting room for {room_id} failed: status {response.status_code}"
-        match = re.search(r"/connect ([\w:.\-]+)", response.text)
+        match = re.search(r"/connect ([\w:.\-/]+)", response.text)
         if match:
             return match[1]
         timeout -= poll_interval
@@ -263,7 +263,7 @@ def _stop_webhost_mp(name_filter: str, graceful: bool = True) -> None:
 
 def stop_autogen(graceful: bool = True) -> None:
     # FIXME: this name filter is jank, but there seems to be no way to add a custom prefix for a Pool
-    _stop_webhost_mp("SpawnPoolWorker-", graceful)
+    _stop_webhost_mp("Generator-", graceful)
 
 def stop_autohost(graceful: bool = True) -> None:
     _stop_webhost_mp("MultiHoster", graceful)
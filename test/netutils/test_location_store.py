@@ -117,6 +117,14 @@ class Base:
             self.assertEqual(self.store.get_for_player(1), {1: {13}, 2: {22, 23}})
             self.assertEqual(self.store.get_for_player(9999), {})
 
+        def test_receiver_index(self) -> None:
+            self.store.build_receiver_index()
+            self.store.build_receiver_index()  # building again is a no-op
+            self.assertEqual(sorted(self.store.find_item({1, 2}, 12)), [(2, 22, 12, 1, 0)])
+            # results must not share state with the index
+            self.store.get_for_player(1)[2].add(99)
+            self.assertEqual(self.store.get_for_player(1), {1: {13}, 2: {22, 23}})
+
         def test_get_checked(self) -> None:
             self.assertEqual(self.store.get_checked(full_state, 0, 1), [11, 12, 13])
             self.assertEqual(self.store.get_checked(one_state, 0, 1), [12])
@@ -0,0 +1,59 @@
+# Tests for the memory mapped data package format in NetUtils
+import os
+import pickle
+import tempfile
+import unittest
+
+from NetUtils import MappedGamePackage, games_package_to_dict, load_mapped_data_package, write_mapped_data_package
+
+sample_games = {
+    "Game": {
+        "item_name_to_id": {"Sword": 3, "Shield": 1, "Bow": -1, "Ünicode ✓": 2**53},
+        "location_name_to_id": {"Chest": 10, "Boss": 11},
+        "checksum": "abc",
+    },
+    "Empty": {
+        "item_name_to_id": {},
+        "location_name_to_id": {},
+    },
+}
+
+
+class TestMappedDataPackage(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+        self.path = os.path.join(self.directory.name, "test.apdp")
+        write_mapped_data_package(self.path, sample_games)
+        self.mapped = load_mapped_data_package(self.path)
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_lookups(self) -> None:
+        """Ensure both lookup directions match the source data package."""
+        self.assertEqual(list(self.mapped), list(sample_games))
+        for game, game_package in sample_games.items():
+            mapped_game = self.mapped[game]
+            self.assertEqual(dict(mapped_game.item_name_to_id), game_package["item_name_to_id"])
+            self.assertEqual(dict(mapped_game.location_name_to_id), game_package["location_name_to_id"])
+            self.assertEqual(dict(mapped_game.item_id_to_name),
+                             {code: name for name, code in game_package["item_name_to_id"].items()})
+            self.assertEqual(games_package_to_dict({game: mapped_game})[game], game_package)
+        game = self.mapped["Game"]
+        self.assertEqual(game["checksum"], "abc")
+        self.assertNotIn("checksum", self.mapped["Empty"])
+        self.assertEqual(game.item_id_to_name[2**53], "Ünicode ✓")
+        self.assertNotIn(2, game.item_id_to_name)
+        self.assertNotIn("Spear", game.item_name_to_id)
+        self.assertNotIn(3, game.item_name_to_id)
+        with self.assertRaises(KeyError):
+            game.location_id_to_name[12]
+
+    def test_shared(self) -> None:
+        """Ensure the file is only mapped once per process and pickles by path."""
+        self.assertIs(load_mapped_data_package(self.path), self.mapped)
+        self.assertIs(pickle.loads(pickle.dumps(self.mapped)), self.mapped)
+        game = pickle.loads(pickle.dumps(self.mapped["Game"]))
+        self.assertIsInstance(game, MappedGamePackage)
+        self.assertIs(game, self.mapped["Game"])
+        self.assertLess(len(pickle.dumps(self.mapped)), 200)
@@ -0,0 +1,43 @@
+# Tests for the msgpack wire encoding in NetUtils
+import unittest
+
+from NetUtils import EncodedMessages, Hint, HintStatus, NetworkItem, NetworkPlayer, NetworkSlot, SlotType, decode, \
+    decode_message, encode, encode_msgpack
+from Utils import Version
+
+sample_msgs = [
+    {"cmd": "RoomInfo", "version": Version(0, 6, 2), "tags": {"AP"}, "password": False},
+    {"cmd": "Connected", "team": 0, "slot": 1, "players": [NetworkPlayer(0, 1, "Alias", "Name")],
+     "slot_info": {1: NetworkSlot("Name", "Clique", SlotType.player), 2: NetworkSlot("Group", "Clique",
+                                                                                      SlotType.group, (1,))},
+     "slot_data": {"int_keys": {1: "one", 1.5: "one and a half", None: "none"}, "bool_keys": {True: "yes"}}},
+    {"cmd": "ReceivedItems", "index": 0, "items": [NetworkItem(1, 2, 3, 4), NetworkItem(5, 6, 7)]},
+    {"cmd": "SetReply", "key": "_read_hints_0_1", "value": [Hint(1, 2, 3, 4, False, "", 0, HintStatus.HINT_PRIORITY)]},
+    {"cmd": "PrintJSON", "data": [{"text": "ü", "type": "player_id"}], "item": NetworkItem(1, 2, 3, 1)},
+]
+
+
+class TestMsgpack(unittest.TestCase):
+    def test_same_as_json(self) -> None:
+        """Ensure messages decode to the same content from msgpack as from JSON."""
+        for msg in sample_msgs:
+            with self.subTest(cmd=msg["cmd"]):
+                data = encode_msgpack([msg])
+                self.assertIsInstance(data, bytes)
+                self.assertEqual(decode_message(data), decode(encode([msg])))
+        self.assertIsInstance(decode_message(encode_msgpack(sample_msgs))[2]["items"][0], NetworkItem)
+
+    def test_json_fallback(self) -> None:
+        """Ensure content msgpack can't represent gets sent as JSON instead."""
+        msgs = [{"cmd": "SetReply", "key": "big", "value": 1 << 70}]
+        data = encode_msgpack(msgs)
+        self.assertIsInstance(data, str)
+        self.assertEqual(decode_message(data), msgs)
+
+    def test_encoded_messages(self) -> None:
+        """Ensure messages get encoded once per encoding."""
+        messages = EncodedMessages(sample_msgs, "json")
+        self.assertEqual(messages.get("json"), "json")
+        data = messages.get("msgpack")
+        self.assertIsInstance(data, bytes)
+        self.assertIs(messages.get("msgpack"), data)
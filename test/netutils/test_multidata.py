@@ -0,0 +1,57 @@
+# Tests for the sectioned .archipelago format in NetUtils
+import pickle
+import unittest
+import zlib
+from pathlib import Path
+
+from NetUtils import MultiDataSections, decode_multidata, encode_multidata, multidata_format_version
+
+sample_data = {
+    "seed_name": "12345",
+    "slot_data": {1: {"goal": 1}, 2: {"goal": 2}},
+    "locations": {1: {11: (21, 2, 7)}, 2: {21: (11, 1, 0)}},
+    "spheres": [{1: {11}}, {2: {21}}],
+}
+
+
+class TestMultiData(unittest.TestCase):
+    def test_round_trip(self) -> None:
+        """Ensure encoded multidata decodes to the same content."""
+        data = encode_multidata(sample_data)
+        self.assertEqual(data[0], multidata_format_version)
+        decoded = decode_multidata(data)
+        self.assertIsInstance(decoded, MultiDataSections)
+        self.assertEqual(list(decoded), list(sample_data))
+        self.assertEqual({key: decoded[key] for key in decoded}, {**sample_data, "slot_data": decoded["slot_data"]})
+        self.assertEqual(dict(decoded["slot_data"]), sample_data["slot_data"])
+
+    def test_lazy_sections(self) -> None:
+        """Ensure sections are only decoded when accessed."""
+        decoded = decode_multidata(encode_multidata(sample_data))
+        self.assertEqual(decoded["slot_data"][2], {"goal": 2})
+        self.assertEqual(list(decoded._decoded), ["slot_data"])
+        self.assertEqual(list(decoded["slot_data"]._decoded), [2])
+
+    def test_modify(self) -> None:
+        """Ensure decoded multidata can be modified and encoded again."""
+        decoded = decode_multidata(encode_multidata(sample_data))
+        self.assertEqual(decoded.pop("locations"), sample_data["locations"])
+        self.assertNotIn("locations", decoded)
+        decoded["slot_data"][3] = {"goal": 3}
+        decoded["race_mode"] = 1
+        self.assertEqual(len(decoded), 4)
+        reencoded = decode_multidata(encode_multidata(decoded))
+        self.assertEqual(list(reencoded), ["seed_name", "slot_data", "spheres", "race_mode"])
+        self.assertEqual(reencoded["slot_data"][3], {"goal": 3})
+        self.assertEqual(reencoded["race_mode"], 1)
+
+    def test_legacy_format(self) -> None:
+        """Ensure files in the previous format can still be loaded."""
+        data = bytes([3]) + zlib.compress(pickle.dumps(sample_data))
+        self.assertEqual(decode_multidata(data), sample_data)
+
+        with (Path(__file__).parents[1] / "webhost" / "data" / "One_Archipelago.archipelago").open("rb") as f:
+            legacy = decode_multidata(f.read())
+        decoded = decode_multidata(encode_multidata(legacy))
+        self.assertEqual(decoded["slot_info"], legacy["slot_info"])
+        self.assertEqual(dict(decoded["slot_data"]), legacy["slot_data"])
@@ -1,5 +1,16 @@
+import asyncio
+import logging
+import os
+import tempfile
 import unittest
-from MultiServer import Context, ServerCommandProcessor
+import zlib
+from unittest import mock
+
+from MultiServer import Client, Context, MetricsHistogram, SaveJournal, ServerCommandProcessor, ServerMetrics, \
+    send_items_to, send_new_items, serve_metrics
+from NetUtils import Hint, HintStatus, NetworkItem, NetworkSlot, SlotType, decode_message
+from Utils import restricted_loads, version_tuple
+from worlds import AutoWorldRegister
 
 
 class TestResolvePlayerName(unittest.TestCase):
@@ -38,3 +49,282 @@ class TestResolvePlayerName(unittest.TestCase):
         assert p.resolve_player("ABC") == (1, 2, "abc"), "case insensitive resolves when 1 match"
         assert p.resolve_player("abcd") == (1, 3, "abCD"), "case insensitive resolves when 1 match"
         assert not p.resolve_player("aB"), "partial name shouldn't resolve to player"
+
+
+class TestSaveJournal(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.save_filename = os.path.join(self.temp_dir.name, "test.apsave")
+
+    def create_context(self) -> Context:
+        # the static game data can only be loaded by one Context per process and isn't needed for saving
+        with mock.patch.object(Context, "_load_game_data"):
+            ctx = Context("", 0, "", "", 0, 0, False)
+        ctx.save_filename = self.save_filename
+        ctx.save_journal_entries = 2
+        ctx.save_journal = SaveJournal(self.save_filename + ".journal", ctx.save_journal_entries)
+        return ctx
+
+    def load(self) -> dict:
+        with open(self.save_filename, "rb") as f:
+            save_data = restricted_loads(zlib.decompress(f.read()))
+        SaveJournal.replay(self.save_filename + ".journal", save_data, logging.getLogger())
+        return save_data
+
+    def test_journal(self) -> None:
+        """Test that changes are journaled between full saves and restored from the journal."""
+        ctx = self.create_context()
+        ctx.received_items[0, 1, True] = [NetworkItem(1, 2, 1)]
+        self.assertTrue(ctx._save())
+        with open(self.save_filename, "rb") as f:
+            full_save = f.read()
+
+        ctx.location_checks[0, 1].add(5)
+        ctx.received_items[0, 1, True].append(NetworkItem(2, 2, 1))
+        ctx.stored_data["key"] = {"a": 1}
+        ctx.stored_data_changed.add("key")
+        self.assertTrue(ctx._save())
+        ctx.stored_data["key"]["b"] = 2
+        ctx.stored_data_changed.add("key")
+        ctx.hints_used[0, 1] += 1
+        self.assertTrue(ctx._save())
+
+        with open(self.save_filename, "rb") as f:
+            self.assertEqual(f.read(), full_save, "full save was rewritten before compaction")
+        save_data = self.load()
+        self.assertEqual(save_data["received_items"], ctx.received_items)
+        self.assertEqual(save_data["location_checks"], ctx.location_checks)
+        self.assertEqual(save_data["stored_data"], {"key": {"a": 1, "b": 2}})
+        self.assertEqual(save_data["hints_used"], {(0, 1): 1})
+
+        # compaction
+        ctx.location_checks[0, 1].add(6)
+        self.assertTrue(ctx._save())
+        self.assertEqual(os.path.getsize(self.save_filename + ".journal"), 0)
+        self.assertEqual(self.load()["location_checks"], ctx.location_checks)
+
+    def test_incomplete_entry(self) -> None:
+        """Test that a partially written entry and entries for an older full save are ignored."""
+        ctx = self.create_context()
+        self.assertTrue(ctx._save())
+        ctx.location_checks[0, 1].add(5)
+        self.assertTrue(ctx._save())
+        with open(self.save_filename + ".journal", "ab") as f:
+            f.write(b"\xff\x00\x00\x00garbage")
+        self.assertEqual(self.load()["location_checks"], {(0, 1): {5}})
+
+        with open(self.save_filename + ".journal", "rb") as f:
+            stale_journal = f.read()
+        self.assertTrue(ctx._save(exit_save=True))
+        with open(self.save_filename + ".journal", "wb") as f:
+            f.write(stale_journal)
+        ctx.location_checks[0, 1].clear()
+        self.assertTrue(ctx._save(exit_save=True))
+        with open(self.save_filename + ".journal", "wb") as f:
+            f.write(stale_journal)
+        self.assertEqual(self.load()["location_checks"], {(0, 1): set()})
+
+    def test_failed_save(self) -> None:
+        """Test that a failed journal append or full save is cleaned up and followed by a full save."""
+        ctx = self.create_context()
+        self.assertTrue(ctx._save())
+        ctx.location_checks[0, 1].add(5)
+        self.assertTrue(ctx._save())
+        journal_size = os.path.getsize(self.save_filename + ".journal")
+
+        ctx.location_checks[0, 1].add(6)
+        with mock.patch("MultiServer.os.fsync", side_effect=OSError("disk full")), \
+                self.assertLogs(ctx.logger, logging.ERROR):
+            self.assertFalse(ctx._save())
+        self.assertEqual(os.path.getsize(self.save_filename + ".journal"), journal_size)
+        self.assertTrue(ctx.save_journal.wants_compaction)
+
+        ctx.location_checks[0, 1].add(7)
+        epoch = ctx.save_journal.epoch
+        with mock.patch("MultiServer.os.replace", side_effect=OSError("disk full")), \
+                self.assertLogs(ctx.logger, logging.ERROR):
+            self.assertFalse(ctx._save())
+        self.assertEqual(ctx.save_journal.epoch, epoch)
+        self.assertEqual(self.load()["location_checks"], {(0, 1): {5}})
+
+        self.assertTrue(ctx._save())
+        self.assertEqual(os.path.getsize(self.save_filename + ".journal"), 0)
+        ctx.location_checks[0, 1].add(8)
+        self.assertTrue(ctx._save())
+        self.assertEqual(self.load()["location_checks"], {(0, 1): {5, 6, 7, 8}})
+
+
+class TestSendNewItems(unittest.TestCase):
+    def test_shared_messages(self) -> None:
+        """Test that only slots that received items are sent them, once per group of clients needing the same items."""
+        with mock.patch.object(Context, "_load_game_data"):
+            ctx = Context("", 0, "", "", 0, 0, False)
+        clients = [Client(None, ctx) for _ in range(4)]
+        for client in clients:
+            client.team, client.slot = 0, 1
+        clients[2].remote_items = True
+        clients[3].slot = 2
+        ctx.clients = {0: {1: clients[:3], 2: clients[3:]}}
+        ctx.broadcast = mock.Mock()
+
+        send_items_to(ctx, 0, 1, NetworkItem(1, 5, 2, 0))
+        send_new_items(ctx)
+        self.assertEqual([list(call.args[0]) for call in ctx.broadcast.call_args_list],
+                         [clients[:2], clients[2:3]])
+        self.assertEqual([client.send_index for client in clients], [1, 1, 1, 0])
+
+        ctx.broadcast.reset_mock()
+        send_new_items(ctx)
+        ctx.broadcast.assert_not_called()
+
+
+class TestLazyGameData(unittest.TestCase):
+    def test_room_games(self) -> None:
+        """Ensure a server importing worlds lazily only loads the game data of the games being played."""
+        with mock.patch("worlds.lazy_loading", True):
+            ctx = Context("", 0, "", "", 0, 0, False)
+        self.assertEqual(ctx.gamespackage, {})
+        ctx._load({
+            "minimum_versions": {"server": (0, 0, 0)},
+            "version": version_tuple,
+            "slot_info": {1: NetworkSlot("Player1", "APQuest", SlotType.player),
+                          2: NetworkSlot("Player2", "Not Installed", SlotType.player)},
+            "seed_name": "0",
+            "connect_names": {"Player1": (0, 1), "Player2": (0, 2)},
+            "locations": {1: {}, 2: {}},
+            "slot_data": {1: {}, 2: {}},
+            "er_hint_data": {},
+            "precollected_items": {1: [], 2: []},
+            "precollected_hints": {1: set(), 2: set()},
+        }, {}, True)
+
+        world = AutoWorldRegister.world_types["APQuest"]
+        self.assertEqual(set(ctx.gamespackage), {"Archipelago", "APQuest"})
+        self.assertNotIn("item_name_groups", ctx.gamespackage["APQuest"])
+        self.assertEqual(ctx.item_name_groups["APQuest"], world.item_name_groups)
+        self.assertEqual(ctx.non_hintable_names["APQuest"], world.hint_blacklist)
+        item_name, item_id = next(iter(world.item_name_to_id.items()))
+        self.assertEqual(ctx.item_names["APQuest"][item_id], item_name)
+
+
+class TestWireEncoding(unittest.TestCase):
+    def test_broadcast(self) -> None:
+        """Ensure broadcasts are encoded once per encoding used by their recipients."""
+        with mock.patch.object(Context, "_load_game_data"):
+            ctx = Context("", 0, "", "", 0, 0, False)
+        clients = [Client(None, ctx) for _ in range(3)]
+        clients[1].encoding = "msgpack"
+        ctx.broadcast_send_encoded_msgs = mock.Mock()
+        msgs = [{"cmd": "ReceivedItems", "index": 0, "items": [NetworkItem(1, 5, 2, 0)]}]
+        with mock.patch("MultiServer.async_start"):
+            ctx.broadcast(clients, msgs)
+
+        calls = {call.args[1].__class__: list(call.args[0]) for call in ctx.broadcast_send_encoded_msgs.call_args_list}
+        self.assertEqual(calls, {str: [clients[0], clients[2]], bytes: [clients[1]]})
+        for call in ctx.broadcast_send_encoded_msgs.call_args_list:
+            self.assertEqual(decode_message(call.args[1]), msgs)
+
+
+class TestServerMetrics(unittest.TestCase):
+    def test_histogram(self) -> None:
+        histogram = MetricsHistogram()
+        for seconds in (0.0001, 0.001, 0.002, 100):
+            histogram.observe(seconds)
+        self.assertEqual(histogram.counts[:3], [1, 1, 1])
+        self.assertEqual(histogram.counts[-1], 1)
+        self.assertEqual(histogram.count, 4)
+        self.assertEqual(histogram.max, 100)
+
+    def test_prometheus_format(self) -> None:
+        """Ensure metrics of several rooms are merged into one family per metric."""
+        rooms = []
+        for room in range(2):
+            metrics = ServerMetrics()
+            metrics.commands["Sync"].observe(0.002)
+            metrics.bytes_in[0, 1] += 10
+            metrics.bytes_out[None] += 5
+            rooms.append(metrics.collect({"room": str(room)}))
+        text = ServerMetrics.format_prometheus(*rooms)
+        lines = text.splitlines()
+        self.assertEqual(lines.count("# TYPE archipelago_server_command_seconds histogram"), 1)
+        self.assertIn('archipelago_server_command_seconds_bucket{room="1",cmd="Sync",le="0.0025"} 1', lines)
+        self.assertIn('archipelago_server_command_seconds_bucket{room="1",cmd="Sync",le="0.001"} 0', lines)
+        self.assertIn('archipelago_server_command_seconds_count{room="0",cmd="Sync"} 1', lines)
+        self.assertIn('archipelago_server_in_bytes_total{room="0",team="0",slot="1"} 10', lines)
+        self.assertIn('archipelago_server_out_bytes_total{room="1",team="",slot=""} 5', lines)
+        self.assertNotIn("archipelago_server_event_loop_lag_seconds", text)
+
+    def test_serve_metrics(self) -> None:
+        async def request(path: str) -> bytes:
+            metrics_server = await serve_metrics(lambda: "test_metric 1\n", 0)
+            port = metrics_server.sockets[0].getsockname()[1]
+            try:
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+                response = await reader.read()
+                writer.close()
+                return response
+            finally:
+                metrics_server.close()
+
+        response = asyncio.run(request("/metrics"))
+        self.assertTrue(response.startswith(b"HTTP/1.1 200 OK\r\n"))
+        self.assertTrue(response.endswith(b"\r\n\r\ntest_metric 1\n"))
+        self.assertTrue(asyncio.run(request("/")).startswith(b"HTTP/1.1 404 Not Found\r\n"))
+
+    def test_console_command(self) -> None:
+        with mock.patch.object(Context, "_load_game_data"):
+            ctx = Context("", 0, "", "", 0, 0, False)
+        ctx.player_names = {(0, 1): "Player1"}
+        ctx.metrics.commands["Connect"].observe(0.01)
+        ctx.metrics.bytes_out[0, 1] += 2048
+        ctx.recheck_hints()
+        output = []
+        processor = ServerCommandProcessor(ctx)
+        with mock.patch.object(processor, "output", output.append):
+            processor("/metrics")
+        self.assertIn("  Connect: 1x, avg 10.00ms, max 10.00ms", output[0].splitlines())
+        self.assertIn("  Player1: in 0.00 B, out 2.00 kB", output[0].splitlines())
+        self.assertIn("recheck_hints: 1x", output[0])
+
+
+class TestRecheckHints(unittest.TestCase):
+    def setUp(self) -> None:
+        with mock.patch.object(Context, "_load_game_data"):
+            self.ctx = Context("", 0, "", "", 0, 0, False)
+        self.hints = [Hint(2, 1, location, 100 + location, False) for location in (10, 11, 12)]
+        for hint in self.hints:
+            for slot in (1, 2):
+                self.ctx.hints[0, slot].add(hint)
+            self.ctx._index_hint(0, hint)
+
+    def test_new_checks(self) -> None:
+        """Ensure only hints for newly checked locations are refreshed, in all slots concerned."""
+        self.ctx.location_checks[0, 1] |= {10, 11}
+        changed = set()
+        self.ctx.recheck_hints(0, 1, changed, {10})
+        self.assertEqual(changed, {(0, 1), (0, 2)})
+        found_hint = self.hints[0]._replace(found=True, status=HintStatus.HINT_FOUND)
+        for slot in (1, 2):
+            self.assertEqual(self.ctx.hints[0, slot], {found_hint, *self.hints[1:]})
+        self.assertEqual(set(self.ctx.unfound_hints), {(0, 1, 11), (0, 1, 12)})
+
+        # a full recheck picks up the check that was not passed in
+        changed.clear()
+        self.ctx.recheck_hints(changed=changed)
+        self.assertEqual(changed, {(0, 1), (0, 2)})
+        self.assertEqual(set(self.ctx.unfound_hints), {(0, 1, 12)})
+
+    def test_replaced_hint(self) -> None:
+        """Ensure hints replaced by status updates are still refreshed."""
+        old_hint = self.hints[2]
+        new_hint = old_hint.re_prioritize(self.ctx, HintStatus.HINT_PRIORITY)
+        for slot in (1, 2):
+            self.assertTrue(self.ctx.replace_hint(0, slot, old_hint, new_hint))
+        self.assertEqual(self.ctx.unfound_hints[0, 1, 12], {new_hint})
+
+        self.ctx.location_checks[0, 1].add(12)
+        self.ctx.recheck_hints(0, 1, locations={12})
+        self.assertIn(new_hint._replace(found=True, status=HintStatus.HINT_FOUND), self.ctx.hints[0, 2])
+        self.assertNotIn((0, 1, 12), self.ctx.unfound_hints)
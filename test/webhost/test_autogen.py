@@ -0,0 +1,47 @@
+import unittest
+from uuid import uuid4
+
+from WebHostLib import app
+from WebHostLib.autolauncher import GenerationJob, GenerationScheduler, estimate_generation_cost
+
+
+class TestGenerationScheduler(unittest.TestCase):
+    def setUp(self) -> None:
+        config = {**app.config, "GENERATORS": 2, "SMALL_JOB_GENERATORS": 1, "SMALL_JOB_COST": 4}
+        self.scheduler = GenerationScheduler(config)
+
+    def add_job(self, cost: float, queued_at: float) -> GenerationJob:
+        job = GenerationJob(uuid4(), cost, queued_at)
+        self.scheduler.queue[job.id] = job
+        return job
+
+    def test_estimate_cost(self) -> None:
+        """Ensure cost counts worlds, weighted by the cost of their game."""
+        options = {"Player1.yaml": {"game": "A Link to the Past"}, "Player2.yaml": {"game": "Clique"},
+                   "Player3.yaml": {"game": "Clique"}}
+        self.assertEqual(estimate_generation_cost(options, {}), 3)
+        self.assertEqual(estimate_generation_cost(options, {"A Link to the Past": 5, "Clique": 0.5}), 6)
+
+    def test_small_generators(self) -> None:
+        """Ensure at least one generator is kept for jobs of any size."""
+        config = {**app.config, "GENERATORS": 2, "SMALL_JOB_GENERATORS": 5}
+        self.assertEqual(GenerationScheduler(config).small_generators, 1)
+
+    def test_select_job(self) -> None:
+        """Ensure small jobs can skip ahead of large ones in the small lane, and the general lane is in order."""
+        large = self.add_job(200, 1)
+        small = self.add_job(2, 2)
+        later_small = self.add_job(2, 3)
+        self.assertIs(self.scheduler.select_job(False), large)
+        self.assertIs(self.scheduler.select_job(True), small)
+        del self.scheduler.queue[large.id]
+        self.assertIs(self.scheduler.select_job(False), small)
+        del self.scheduler.queue[small.id]
+        self.assertIs(self.scheduler.select_job(True), later_small)
+        del self.scheduler.queue[later_small.id]
+        self.assertIsNone(self.scheduler.select_job(True))
+
+    def test_no_small_jobs(self) -> None:
+        """Ensure the small lane doesn't pick up large jobs."""
+        self.add_job(5, 1)
+        self.assertIsNone(self.scheduler.select_job(True))
@@ -0,0 +1,99 @@
+import asyncio
+import logging
+import unittest
+from unittest import mock
+from uuid import uuid4
+
+from MultiServer import ServerMetrics
+from NetUtils import NetworkSlot, SlotType
+from Utils import version_tuple
+from WebHostLib import to_url
+from WebHostLib.customserver import AutoSaver, WebHostContext, get_room_id_from_path, get_static_server_data
+
+
+class TestSharedListener(unittest.TestCase):
+    def test_room_id_from_path(self) -> None:
+        room_id = uuid4()
+        self.assertEqual(get_room_id_from_path(f"/{to_url(room_id)}"), room_id)
+        self.assertEqual(get_room_id_from_path(f"/{to_url(room_id)}/?game=Archipelago"), room_id)
+        self.assertIsNone(get_room_id_from_path("/"))
+        self.assertIsNone(get_room_id_from_path("/not-a-room"))
+
+
+class FakeRoom:
+    def __init__(self, save_dirty: bool) -> None:
+        self.save_dirty = save_dirty
+        self.exit_event = asyncio.Event()
+        self._save = mock.Mock()
+        self.metrics = ServerMetrics()
+        self.logger = logging.getLogger()
+
+
+class TestAutoSaver(unittest.TestCase):
+    def test_save(self) -> None:
+        """Ensure only dirty rooms are saved, and rooms that shut down are dropped."""
+        auto_saver = AutoSaver()
+        dirty, clean, closed = FakeRoom(True), FakeRoom(False), FakeRoom(True)
+        closed.exit_event.set()
+        for room in (dirty, clean, closed):
+            auto_saver.add(room)
+            auto_saver.save(room)
+
+        dirty._save.assert_called_once_with()
+        self.assertFalse(dirty.save_dirty)
+        self.assertEqual(dirty.metrics.timings["autosave"].count, 1)
+        clean._save.assert_not_called()
+        closed._save.assert_not_called()
+        self.assertEqual(set(auto_saver.contexts), {dirty, clean})
+
+    def test_run(self) -> None:
+        """Ensure the thread saves rooms and can be stopped."""
+        auto_saver = AutoSaver(interval=0.01)
+        room = FakeRoom(True)
+        room._save.side_effect = lambda: auto_saver.stop_event.set()
+        auto_saver.add(room)
+        auto_saver.start()
+        auto_saver.join(5)
+        self.assertFalse(auto_saver.is_alive())
+        room._save.assert_called_once_with()
+
+
+class TestLoadRoom(unittest.TestCase):
+    def load(self, datapackage: dict) -> WebHostContext:
+        multidata = {
+            "minimum_versions": {"server": (0, 0, 0)},
+            "version": version_tuple,
+            "slot_info": {1: NetworkSlot("Player1", "APQuest", SlotType.player)},
+            "seed_name": "0",
+            "connect_names": {"Player1": (0, 1)},
+            "locations": {1: {}},
+            "slot_data": {1: {}},
+            "er_hint_data": {},
+            "precollected_items": {1: []},
+            "precollected_hints": {1: set()},
+            "datapackage": datapackage,
+        }
+
+        async def load() -> WebHostContext:
+            ctx = WebHostContext(get_static_server_data(), logging.getLogger())
+            with mock.patch("WebHostLib.customserver.Room"), \
+                    mock.patch("WebHostLib.customserver.GameDataPackage.get", return_value=None), \
+                    mock.patch.object(ctx, "decompress", return_value=multidata):
+                ctx.load(uuid4())
+            return ctx
+
+        return asyncio.run(load())
+
+    def test_static(self) -> None:
+        """Ensure rooms of games with known data packages use the static data package."""
+        checksum = get_static_server_data()["gamespackage"]["APQuest"]["checksum"]
+        ctx = self.load({"APQuest": {"checksum": checksum}})
+        self.assertIs(ctx.gamespackage, get_static_server_data()["gamespackage"])
+
+    def test_unknown_checksum(self) -> None:
+        """Ensure rooms load a data package that is only embedded, as its checksum is not known to the WebHost."""
+        ctx = self.load({"APQuest": {"checksum": "unknown", "item_name_to_id": {"Custom Item": 1},
+                                     "location_name_to_id": {"Custom Location": 1}, "item_name_groups": {}}})
+        self.assertEqual(ctx.item_names["APQuest"][1], "Custom Item")
+        self.assertEqual(ctx.location_names["APQuest"][1], "Custom Location")
+        self.assertIn("Archipelago", ctx.gamespackage)
@@ -72,6 +72,14 @@ class AutoWorldRegister(type):
             dct["location_name_groups"]["Everywhere"] = dct["location_names"]
             dct["all_item_and_group_names"] = frozenset(dct["item_names"] | set(dct.get("item_name_groups", {})))
 
+            # dense item indices for CollectionState item counts, see BaseClasses.ItemCounter
+            dct["item_name_to_index"] = {item_name: index for index, item_name in
+                                         enumerate(sorted(dct["item_name_to_id"], key=dct["item_name_to_id"].get))}
+            dct["item_name_group_indices"] = {group_name: tuple(sorted(dct["item_name_to_index"][item_name]
+                                                                      for item_name in group_set))
+                                              for group_name, group_set in dct["item_name_groups"].items()
+                                              if group_set <= dct["item_names"]}
+
             # move away from get_required_client_version function
             assert "get_required_client_version" not in dct, f"{name}: required_client_version is an attribute now"
         # set minimum required_client_version from bases
@@ -89,7 +97,8 @@ class AutoWorldRegister(type):
         new_class = super().__new__(mcs, name, bases, dct)
         new_class.__file__ = sys.modules[new_class.__module__].__file__
         if "game" in dct:
-            if dct["game"] in AutoWorldRegister.world_types:
+            # only imported worlds count, a lazy world_types also contains the games it has yet to import
+            if dict.__contains__(AutoWorldRegister.world_types, dct["game"]):
                 raise RuntimeError(f"""Game {dct["game"]} already registered in 
                 {AutoWorldRegister.world_types[dct["game"]].__file__} when attempting to register from
                 {new_class.__file__}.""")
@@ -294,6 +303,11 @@ class World(metaclass=AutoWorldRegister):
     item_name_groups: ClassVar[Dict[str, Set[str]]] = {}
     """maps item group names to sets of items. Example: {"Weapons": {"Sword", "Bow"}}"""
 
+    item_name_to_index: ClassVar[Dict[str, int]] = {}
+    """automatically generated map of item names to dense indices into ItemCounter.counts"""
+    item_name_group_indices: ClassVar[Dict[str, Tuple[int, ...]]] = {}
+    """automatically generated map of item group names to the indices of their items"""
+
     location_name_groups: ClassVar[Dict[str, Set[str]]] = {}
     """maps location group names to sets of locations. Example: {"Sewer": {"Sewer Key Drop 1", "Sewer Key Drop 2"}}"""
 
@@ -324,6 +338,10 @@ class World(metaclass=AutoWorldRegister):
     If False, everything is rechecked at every step, which is slower computationally, 
     but may be desirable in complex/dynamic worlds."""
 
+    sweep_dependencies: bool = False
+    """If True, the world implements get_sweep_dependencies(), so sweeps only re-test this world's unreachable locations
+    after something their access depends on was collected or reached."""
+
     multiworld: "MultiWorld"
     """autoset on creation. The MultiWorld object for the currently generating multiworld."""
     player: int
@@ -576,6 +594,16 @@ class World(metaclass=AutoWorldRegister):
         """Called when a region is newly reachable by the state."""
         pass
 
+    def get_sweep_dependencies(self, location: "Location") -> Optional[Tuple[Iterable[str], Iterable[str]]]:
+        """
+        Only used if sweep_dependencies is True.
+        Returns the names of the items and regions of this world that the access rule of the location depends on, or None
+        if they are not known. Item names are matched against the names of collected Items and the names collect_item
+        returns for them, so worlds that count items in prog_items under other names have to return None for rules
+        depending on those.
+        """
+        return None
+
     # following methods should not need to be overridden.
     def create_filler(self) -> "Item":
         return self.create_item(self.get_filler_item_name())
@@ -5,11 +5,12 @@ import json
 import zipfile
 from enum import IntEnum
 import os
+import struct
 import threading
 from io import BytesIO
 
 from typing import (ClassVar, Dict, List, Literal, Tuple, Any, Optional, Union, BinaryIO, overload, Sequence,
-                    TYPE_CHECKING)
+                    TYPE_CHECKING, Callable, TypeVar)
 
 import bsdiff4
 
@@ -199,13 +200,17 @@ class APWorldContainer(APContainer):
     maximum_ap_version: "Version | None" = None
 
     def read_contents(self, opened_zipfile: zipfile.ZipFile) -> Dict[str, Any]:
-        from Utils import tuplize_version
         manifest = super().read_contents(opened_zipfile)
+        self.apply_manifest(manifest)
+        return manifest
+
+    def apply_manifest(self, manifest: Dict[str, Any]) -> None:
+        """Populate metadata from a manifest, such as one previously read and cached, without opening the zip."""
+        from Utils import tuplize_version
         self.game = manifest["game"]
         for version_key in ("world_version", "minimum_ap_version", "maximum_ap_version"):
             if version_key in manifest:
                 setattr(self, version_key, tuplize_version(manifest[version_key]))
-        return manifest
 
     def get_manifest(self) -> Dict[str, Any]:
         manifest = super().get_manifest()
@@ -344,7 +349,8 @@ class APProcedurePatch(APAutoPatchInterface):
 
     def patch(self, target: str) -> None:
         self.read()
-        base_data = self.get_source_data_with_cache()
+        base_data: Union[bytes, bytearray] = self.get_source_data_with_cache()
+        buffer: Optional[bytearray] = None
         patch_extender = AutoPatchExtensionRegister.get_handler(self.game)
         assert not isinstance(self.procedure, str), f"{type(self)} must define procedures"
         for step, args in self.procedure:
@@ -353,10 +359,16 @@ class APProcedurePatch(APAutoPatchInterface):
                                   if item is not None), None)
             else:
                 extension = getattr(patch_extender, step, None)
-            if extension is not None:
-                base_data = extension(self, base_data, *args)
-            else:
+            if extension is None:
                 raise NotImplementedError(f"Unknown procedure {step} for {self.game}.")
+            # keep one buffer across consecutive in place steps, other extensions still get bytes
+            if getattr(extension, "patches_in_place", False):
+                # only change a private copy, never the cached source data or data an extension may still hold on to
+                if base_data is not buffer:
+                    buffer = base_data = bytearray(base_data)
+            elif isinstance(base_data, bytearray):
+                base_data = bytes(base_data)
+            base_data = extension(self, base_data, *args)
         with open(target, 'wb') as f:
             f.write(base_data)
 
@@ -457,6 +469,73 @@ class APTokenMixin:
         self._tokens.append((token_type, offset, data))
 
 
+_token_header = struct.Struct("<BII")
+_bitwise_token = struct.Struct("<BIIB")
+_AND_8, _OR_8, _XOR_8 = APTokenTypes.AND_8.value, APTokenTypes.OR_8.value, APTokenTypes.XOR_8.value
+
+
+def apply_token_binary(rom_data: bytearray, token_data: bytes) -> None:
+    """
+    Applies a token binary, as created by APTokenMixin.get_token_binary, onto rom_data in place.
+    Runs of AND/OR/XOR tokens are unpacked together instead of token by token.
+    """
+    view = memoryview(token_data)
+    token_count, = struct.unpack_from("<I", view)
+    bpr = 4
+    remaining = token_count
+    while remaining:
+        token_type, offset, size = _token_header.unpack_from(view, bpr)
+        if size == 1 and _AND_8 <= token_type <= _XOR_8:
+            run = min(remaining, (len(view) - bpr) // _bitwise_token.size)
+            if run:
+                # records stay aligned with tokens until the first one that isn't a bitwise token
+                for token_type, offset, size, arg in _bitwise_token.iter_unpack(
+                        view[bpr:bpr + run * _bitwise_token.size]):
+                    if size != 1 or not _AND_8 <= token_type <= _XOR_8:
+                        break
+                    if token_type == _AND_8:
+                        rom_data[offset] &= arg
+                    elif token_type == _OR_8:
+                        rom_data[offset] |= arg
+                    else:
+                        rom_data[offset] ^= arg
+                    bpr += _bitwise_token.size
+                    remaining -= 1
+                continue
+        data = view[bpr + 9:bpr + 9 + size]
+        if _AND_8 <= token_type <= _XOR_8:
+            arg = data[0]
+            if token_type == _AND_8:
+                rom_data[offset] &= arg
+            elif token_type == _OR_8:
+                rom_data[offset] |= arg
+            else:
+                rom_data[offset] ^= arg
+        elif token_type == APTokenTypes.COPY or token_type == APTokenTypes.RLE:
+            length = int.from_bytes(data[:4], "little")
+            value = int.from_bytes(data[4:], "little")
+            if token_type == APTokenTypes.COPY:
+                rom_data[offset: offset + length] = rom_data[value: value + length]
+            else:
+                rom_data[offset: offset + length] = bytes((value,)) * length
+        else:
+            rom_data[offset:offset + len(data)] = data
+        bpr += 9 + size
+        remaining -= 1
+
+
+PatchExtensionFunction = TypeVar("PatchExtensionFunction", bound=Callable[..., Any])
+
+
+def patch_in_place(function: PatchExtensionFunction) -> PatchExtensionFunction:
+    """
+    Marks a patch extension function as accepting a bytearray as rom, which it changes in place and returns.
+    APProcedurePatch.patch then keeps one buffer across consecutive marked steps instead of copying it for each.
+    """
+    function.patches_in_place = True  # type: ignore[attr-defined]
+    return function
+
+
 class APPatchExtension(metaclass=AutoPatchExtensionRegister):
     """Class that defines patch extension functions for a given game.
     Patch extension functions must have the following two arguments in the following order:
@@ -468,6 +547,7 @@ class APPatchExtension(metaclass=AutoPatchExtensionRegister):
     Further arguments are passed in from the procedure as defined.
 
     Patch extension functions must return the changed bytes.
+    Functions marked with patch_in_place instead get a bytearray, which they change and return.
     """
     game: str
     required_extensions: ClassVar[Tuple[str, ...]] = ()
@@ -478,44 +558,25 @@ class APPatchExtension(metaclass=AutoPatchExtensionRegister):
         return bsdiff4.patch(rom, caller.get_file(patch))
 
     @staticmethod
-    def apply_tokens(caller: APProcedurePatch, rom: bytes, token_file: str) -> bytes:
+    @patch_in_place
+    def apply_tokens(caller: APProcedurePatch, rom: Union[bytes, bytearray],
+                     token_file: str) -> Union[bytes, bytearray]:
         """Applies the given token file from the patch onto the current file."""
-        token_data = caller.get_file(token_file)
+        if isinstance(rom, bytearray):
+            apply_token_binary(rom, caller.get_file(token_file))
+            return rom
         rom_data = bytearray(rom)
-        token_count = int.from_bytes(token_data[0:4], "little")
-        bpr = 4
-        for _ in range(token_count):
-            token_type = token_data[bpr:bpr + 1][0]
-            offset = int.from_bytes(token_data[bpr + 1:bpr + 5], "little")
-            size = int.from_bytes(token_data[bpr + 5:bpr + 9], "little")
-            data = token_data[bpr + 9:bpr + 9 + size]
-            if token_type in [APTokenTypes.AND_8, APTokenTypes.OR_8, APTokenTypes.XOR_8]:
-                arg = data[0]
-                if token_type == APTokenTypes.AND_8:
-                    rom_data[offset] = rom_data[offset] & arg
-                elif token_type == APTokenTypes.OR_8:
-                    rom_data[offset] = rom_data[offset] | arg
-                else:
-                    rom_data[offset] = rom_data[offset] ^ arg
-            elif token_type in [APTokenTypes.COPY, APTokenTypes.RLE]:
-                length = int.from_bytes(data[:4], "little")
-                value = int.from_bytes(data[4:], "little")
-                if token_type == APTokenTypes.COPY:
-                    rom_data[offset: offset + length] = rom_data[value: value + length]
-                else:
-                    rom_data[offset: offset + length] = bytes([value] * length)
-            else:
-                rom_data[offset:offset + len(data)] = data
-            bpr += 9 + size
+        apply_token_binary(rom_data, caller.get_file(token_file))
         return bytes(rom_data)
 
     @staticmethod
-    def calc_snes_crc(caller: APProcedurePatch, rom: bytes) -> bytes:
+    @patch_in_place
+    def calc_snes_crc(caller: APProcedurePatch, rom: Union[bytes, bytearray]) -> Union[bytes, bytearray]:
         """Calculates and applies a valid CRC for the SNES rom header."""
-        rom_data = bytearray(rom)
         if len(rom) < 0x8000:
             raise Exception("Tried to calculate SNES CRC on file too small to be a SNES ROM.")
-        crc = (sum(rom_data[:0x7FDC] + rom_data[0x7FE0:]) + 0x01FE) & 0xFFFF
+        rom_data = rom if isinstance(rom, bytearray) else bytearray(rom)
+        crc = (sum(rom_data[:0x7FDC]) + sum(rom_data[0x7FE0:]) + 0x01FE) & 0xFFFF
         inv = crc ^ 0xFFFF
         rom_data[0x7FDC:0x7FE0] = [inv & 0xFF, (inv >> 8) & 0xFF, crc & 0xFF, (crc >> 8) & 0xFF]
-        return bytes(rom_data)
+        return rom_data if rom_data is rom else bytes(rom_data)
@@ -1,20 +1,30 @@
+import hashlib
 import importlib
 import importlib.abc
 import importlib.machinery
+import importlib.util
 import logging
+import marshal
 import os
+import shutil
 import sys
 import zipimport
 import time
 import dataclasses
 import json
 from pathlib import Path
-from types import ModuleType
-from typing import List, Sequence
+from types import CodeType, ModuleType
+from collections.abc import ItemsView, Iterator, KeysView, ValuesView
+from typing import TYPE_CHECKING, Any, ClassVar, Dict, List, Optional, Sequence, Tuple, TypedDict
 from zipfile import BadZipFile
 
-from NetUtils import DataPackage
-from Utils import local_path, user_path, Version, version_tuple, tuplize_version, messagebox
+from NetUtils import (DataPackage, GamesPackage, MappedDataPackage, data_package_format_version,
+                      load_mapped_data_package, write_mapped_data_package)
+from Utils import (cache_path, local_path, user_path, Version, version_tuple, tuplize_version, messagebox,
+                   __version__)
+
+if TYPE_CHECKING:
+    from .AutoWorld import AutoWorldRegister
 
 local_folder = os.path.dirname(__file__)
 user_folder = user_path("worlds") if user_path() != local_path() else user_path("custom_worlds")
@@ -30,11 +40,20 @@ __all__ = [
     "local_folder",
     "user_folder",
     "failed_world_loads",
+    "get_mapped_data_package",
+    "get_world_settings_names",
+    "lazy_loading",
 ]
 
 
 failed_world_loads: List[str] = []
 
+lazy_loading: bool = os.environ.get("ARCHIPELAGO_LAZY_WORLDS", "0") == "1"
+"""
+Only import world folders once their game is accessed, using the world index in the cache to know their games.
+Is set through the environment, so it is decided before this package gets imported.
+"""
+
 
 @dataclasses.dataclass(order=True)
 class WorldSource:
@@ -72,6 +91,314 @@ class WorldSource:
             failed_world_loads.append(os.path.basename(self.path).rsplit(".", 1)[0])
             return False
 
+    def read_manifest(self) -> Dict[str, Any]:
+        """Returns the archipelago.json of a loose world source, or an empty dict if it has none."""
+        for dirpath, dirnames, filenames in os.walk(self.resolved_path):
+            for file in filenames:
+                if file.endswith("archipelago.json"):
+                    with open(os.path.join(dirpath, file), mode="r", encoding="utf-8") as manifest_file:
+                        return json.load(manifest_file)
+        return {}
+
+    def get_stamp(self) -> List[int]:
+        """Returns newest modification time and number of files of a loose world source, to detect changes to it."""
+        newest = count = 0
+        for dirpath, dirnames, filenames in os.walk(self.resolved_path):
+            dirnames[:] = [dirname for dirname in dirnames if dirname != "__pycache__"]
+            for file in filenames:
+                newest = max(newest, os.stat(os.path.join(dirpath, file)).st_mtime_ns)
+                count += 1
+        return [newest, count]
+
+
+class APWorldCache:
+    """
+    Persistent cache of the manifest and compiled modules of an .apworld, see APWorldImporter.
+    Everything cached is dropped once the .apworld, the cache version or the python bytecode version changes.
+    """
+    version: ClassVar[int] = 1
+
+    path: str
+    directory: str
+    stamp: List[Any]
+    valid: bool = False
+    """if the cache directory belongs to the current .apworld, so compiled modules may be read and written"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.directory = cache_path("apworlds", hashlib.sha1(os.path.abspath(path).encode()).hexdigest())
+        stat = os.stat(path)
+        self.stamp = [self.version, stat.st_mtime_ns, stat.st_size, importlib.util.MAGIC_NUMBER.hex()]
+
+    def read_manifest(self) -> Optional[Dict[str, Any]]:
+        """Returns the cached manifest, or None if there is none for the current .apworld."""
+        try:
+            with open(os.path.join(self.directory, "manifest.json"), encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if cached.get("stamp") != self.stamp:
+            return None
+        self.valid = True
+        return cached["manifest"]
+
+    def write_manifest(self, manifest: Dict[str, Any]) -> None:
+        """Caches the manifest of the current .apworld, dropping anything cached for a previous one."""
+        path = os.path.join(self.directory, "manifest.json")
+        try:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            os.makedirs(self.directory, exist_ok=True)
+            with open(f"{path}.{os.getpid()}.tmp", "w", encoding="utf-8") as f:
+                json.dump({"stamp": self.stamp, "manifest": manifest}, f)
+            os.replace(f"{path}.{os.getpid()}.tmp", path)
+        except OSError as e:
+            logging.debug(f"Could not cache manifest of {self.path}: {e}")
+        else:
+            self.valid = True
+
+    def read_module(self, fullname: str) -> Optional[Tuple[str, CodeType]]:
+        """Returns file name and code object of a cached module."""
+        if not self.valid:
+            return None
+        try:
+            with open(os.path.join(self.directory, f"{fullname}.pyc"), "rb") as f:
+                return marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+
+    def write_module(self, fullname: str, module: Tuple[str, CodeType]) -> None:
+        if not self.valid:
+            return
+        path = os.path.join(self.directory, f"{fullname}.pyc")
+        try:
+            with open(f"{path}.{os.getpid()}.tmp", "wb") as f:
+                marshal.dump(module, f)
+            os.replace(f"{path}.{os.getpid()}.tmp", path)
+        except OSError as e:
+            logging.debug(f"Could not cache module {fullname} of {self.path}: {e}")
+
+
+# private zipimport function returning code and file name of a module at once, may be missing in other Python versions
+_get_module_code = getattr(zipimport, "_get_module_code", None)
+
+
+class APWorldImporter(zipimport.zipimporter):
+    """
+    zipimporter that stores the modules it compiles from an .apworld in an APWorldCache,
+    as zipimport can't write .pyc files and would otherwise compile every module on each start.
+    """
+    cache: APWorldCache
+    _modules: Dict[str, Tuple[str, CodeType]]
+
+    def __init__(self, path: str, cache: APWorldCache) -> None:
+        super().__init__(path)
+        self.cache = cache
+        self._modules = {}
+
+    def _get_module(self, fullname: str) -> Tuple[str, CodeType]:
+        module = self._modules.get(fullname) or self.cache.read_module(fullname)
+        if module is None:
+            # zipimporter's own get_filename and get_code would each compile the module
+            if _get_module_code is None:
+                module = super().get_filename(fullname), super().get_code(fullname)
+            else:
+                code, is_package, file_name = _get_module_code(self, fullname)
+                module = file_name, code
+            self.cache.write_module(fullname, module)
+        self._modules[fullname] = module
+        return module
+
+    def get_filename(self, fullname: str) -> str:
+        return self._get_module(fullname)[0]
+
+    def get_code(self, fullname: str) -> CodeType:
+        # executed once, after get_filename created the spec
+        self._get_module(fullname)
+        return self._modules.pop(fullname)[1]
+
+
+class WorldIndexGame(TypedDict):
+    world_version: str
+    checksum: str
+    settings_key: str
+    settings: Optional[str]
+    """module.class name of the world providing settings, see settings.Settings"""
+
+
+class WorldIndexEntry(TypedDict):
+    stamp: List[int]
+    games: Dict[str, WorldIndexGame]
+
+
+world_index_version = 1
+
+
+def read_world_index() -> Dict[str, WorldIndexEntry]:
+    """Returns the world index of the cache, which lists the games of each loose world source by its path."""
+    try:
+        with open(cache_path("worlds", "index.json"), encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if index.get("version") != world_index_version or index.get("core_version") != __version__:
+        return {}
+    return index["sources"]
+
+
+def write_world_index(sources: Dict[str, WorldIndexEntry]) -> None:
+    path = cache_path("worlds", "index.json")
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(f"{path}.{os.getpid()}.tmp", "w", encoding="utf-8") as f:
+            json.dump({"version": world_index_version, "core_version": __version__, "sources": sources}, f)
+        os.replace(f"{path}.{os.getpid()}.tmp", path)
+    except OSError as e:
+        logging.debug(f"Could not write world index: {e}")
+
+
+def get_world_settings_name(world_type: "AutoWorldRegister") -> Optional[str]:
+    """Returns module.class name of a world type if it provides settings."""
+    annotation = world_type.__annotations__.get("settings", None)
+    if annotation is None or annotation == "ClassVar[Optional['Group']]":
+        return None
+    return f"{world_type.__module__}.{world_type.__name__}"
+
+
+def get_world_settings_names() -> Dict[str, str]:
+    """Returns settings key -> module.class name of each world that provides settings, see settings.Settings."""
+    world_types = AutoWorldRegister.world_types
+    if isinstance(world_types, WorldTypes):
+        return world_types.get_settings_names()
+    return {world_type.settings_key: name for world_type in world_types.values()
+            if (name := get_world_settings_name(world_type))}
+
+
+class WorldTypes(Dict[str, "AutoWorldRegister"]):
+    """
+    AutoWorldRegister.world_types for lazy loading, where games listed in the world index are imported on first access.
+    The dict itself only holds imported worlds, while lookups, membership and iteration include the indexed games,
+    so code iterating over all values still gets every world.
+    """
+    _order: Dict[str, None]
+    """all known games, in world source order"""
+    _lazy: Dict[str, Tuple[WorldSource, WorldIndexGame]]
+    """games that have not been imported yet"""
+    _versions: Dict[str, Version]
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._order = {}
+        self._lazy = {}
+        self._versions = {}
+
+    def add_lazy(self, world_source: WorldSource, games: Dict[str, WorldIndexGame]) -> None:
+        for game, entry in games.items():
+            if super().__contains__(game):
+                continue  # already imported by another world
+            self._order[game] = None
+            self._lazy[game] = world_source, entry
+            self._versions[game] = tuplize_version(entry["world_version"])
+
+    def get_settings_names(self) -> Dict[str, str]:
+        names = {entry["settings_key"]: entry["settings"] for _, entry in self._lazy.values() if entry["settings"]}
+        names.update((world_type.settings_key, name) for world_type in super().values()
+                     if (name := get_world_settings_name(world_type)))
+        return names
+
+    def load_all(self) -> None:
+        for game in list(self._lazy):
+            self.get(game)
+
+    def __missing__(self, game: str) -> "AutoWorldRegister":
+        if game not in self._lazy:
+            raise KeyError(game)
+        world_source, _ = self._lazy[game]
+        world_source.load()
+        for lazy_game, (lazy_source, _) in list(self._lazy.items()):
+            if lazy_source is world_source:
+                # failed to load or did not register as the index said
+                del self._lazy[lazy_game]
+                del self._order[lazy_game]
+        return super().__getitem__(game)
+
+    def __setitem__(self, game: str, world_type: "AutoWorldRegister") -> None:
+        super().__setitem__(game, world_type)
+        self._order[game] = None
+        self._lazy.pop(game, None)
+        if game in self._versions:
+            world_type.world_version = self._versions.pop(game)
+
+    def __delitem__(self, game: str) -> None:
+        super().__delitem__(game)
+        del self._order[game]
+
+    def __contains__(self, game: object) -> bool:
+        return game in self._order
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._order))
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def get(self, game: str, default: Any = None) -> Any:
+        try:
+            return self[game]
+        except KeyError:
+            return default
+
+    def keys(self) -> KeysView[str]:  # type: ignore[override]
+        return KeysView(self)
+
+    def values(self) -> ValuesView["AutoWorldRegister"]:  # type: ignore[override]
+        self.load_all()
+        return ValuesView(self)
+
+    def items(self) -> ItemsView[str, "AutoWorldRegister"]:  # type: ignore[override]
+        self.load_all()
+        return ItemsView(self)
+
+    def copy(self) -> Dict[str, "AutoWorldRegister"]:
+        return dict(self.items())
+
+
+class GamesPackages(Dict[str, GamesPackage]):
+    """network_data_package["games"] for lazy loading, which builds the data package of a game on first access."""
+
+    def __missing__(self, game: str) -> GamesPackage:
+        game_package = self[game] = AutoWorldRegister.world_types[game].get_data_package_data()
+        return game_package
+
+    def __contains__(self, game: object) -> bool:
+        return game in AutoWorldRegister.world_types
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(AutoWorldRegister.world_types)
+
+    def __len__(self) -> int:
+        return len(AutoWorldRegister.world_types)
+
+    def get(self, game: str, default: Any = None) -> Any:
+        return self[game] if game in self else default
+
+    def get_checksum(self, game: str) -> str:
+        """Returns the checksum of a game's data package, without importing the world if it is indexed."""
+        world_types = AutoWorldRegister.world_types
+        if isinstance(world_types, WorldTypes) and game in world_types._lazy:
+            return world_types._lazy[game][1]["checksum"]
+        return self[game]["checksum"]
+
+    def keys(self) -> KeysView[str]:  # type: ignore[override]
+        return KeysView(self)
+
+    def values(self) -> ValuesView[GamesPackage]:  # type: ignore[override]
+        AutoWorldRegister.world_types.load_all()
+        return ValuesView(self)
+
+    def items(self) -> ItemsView[str, GamesPackage]:  # type: ignore[override]
+        AutoWorldRegister.world_types.load_all()
+        return ItemsView(self)
+
 
 # find potential world containers, currently folders and zip-importable .apworld's
 world_sources: List[WorldSource] = []
@@ -91,33 +418,32 @@ for folder in (folder for folder in (user_folder, local_folder) if folder):
             elif entry.is_file() and entry.name.endswith(".apworld"):
                 world_sources.append(WorldSource(file_name, is_zip=True, relative=relative))
 
+from .AutoWorld import AutoWorldRegister
+
+world_index: Dict[str, WorldIndexEntry] = {}
+if lazy_loading:
+    AutoWorldRegister.world_types = WorldTypes()
+    world_index = read_world_index()
+
 # import all submodules to trigger AutoWorldRegister
 world_sources.sort()
 apworlds: list[WorldSource] = []
+loaded_sources: list[WorldSource] = []
 for world_source in world_sources:
     # load all loose files first:
     if world_source.is_zip:
         apworlds.append(world_source)
-    else:
-        world_source.load()
+    elif world_source.resolved_path in world_index and \
+            world_index[world_source.resolved_path]["stamp"] == world_source.get_stamp():
+        AutoWorldRegister.world_types.add_lazy(world_source, world_index[world_source.resolved_path]["games"])
+    elif world_source.load():
+        loaded_sources.append(world_source)
 
-from .AutoWorld import AutoWorldRegister
-
-for world_source in world_sources:
-    if not world_source.is_zip:
-        # look for manifest
-        manifest = {}
-        for dirpath, dirnames, filenames in os.walk(world_source.resolved_path):
-            for file in filenames:
-                if file.endswith("archipelago.json"):
-                    with open(os.path.join(dirpath, file), mode="r", encoding="utf-8") as manifest_file:
-                        manifest = json.load(manifest_file)
-                    break
-            if manifest:
-                break
-        game = manifest.get("game")
-        if game in AutoWorldRegister.world_types:
-            AutoWorldRegister.world_types[game].world_version = tuplize_version(manifest.get("world_version", "0.0.0"))
+for world_source in loaded_sources:
+    manifest = world_source.read_manifest()
+    game = manifest.get("game")
+    if dict.__contains__(AutoWorldRegister.world_types, game):
+        AutoWorldRegister.world_types[game].world_version = tuplize_version(manifest.get("world_version", "0.0.0"))
 
 if apworlds:
     # encapsulation for namespace / gc purposes
@@ -125,6 +451,7 @@ if apworlds:
         global apworlds
         from .Files import APWorldContainer, InvalidDataError
         core_compatible: list[tuple[WorldSource, APWorldContainer]] = []
+        apworld_caches: dict[str, APWorldCache] = {}
 
         def fail_world(game_name: str, reason: str, add_as_failed_to_load: bool = True) -> None:
             if add_as_failed_to_load:
@@ -133,9 +460,15 @@ if apworlds:
 
         for apworld_source in apworlds:
             apworld: APWorldContainer = APWorldContainer(apworld_source.resolved_path)
+            cache = apworld_caches[apworld_source.resolved_path] = APWorldCache(apworld_source.resolved_path)
             # populate metadata
             try:
-                apworld.read()
+                manifest = cache.read_manifest()
+                if manifest:
+                    apworld.apply_manifest(manifest)
+                else:
+                    apworld.read()
+                    cache.write_manifest(apworld.get_manifest())
             except InvalidDataError as e:
                 if version_tuple < (0, 7, 0):
                     logging.error(
@@ -173,11 +506,20 @@ if apworlds:
             reverse=True)
 
         apworld_module_specs = {}
+        # world package name -> importer, to find its submodules with the same cache
+        apworld_importers: dict[str, APWorldImporter] = {}
         class APWorldModuleFinder(importlib.abc.MetaPathFinder):
             def find_spec(
-                    self, fullname: str, _path: Sequence[str] | None, _target: ModuleType = None
+                    self, fullname: str, path: Sequence[str] | None, _target: ModuleType = None
             ) -> importlib.machinery.ModuleSpec | None:
-                return apworld_module_specs.get(fullname)
+                if fullname in apworld_module_specs:
+                    return apworld_module_specs[fullname]
+                world_importer = apworld_importers.get(".".join(fullname.split(".", 2)[:2]))
+                if world_importer and path:
+                    for entry in path:
+                        if entry.startswith(world_importer.archive + os.sep):
+                            return APWorldImporter(entry, world_importer.cache).find_spec(fullname)
+                return None
 
         sys.meta_path.insert(0, APWorldModuleFinder())
 
@@ -188,11 +530,12 @@ if apworlds:
                            f"as its game {apworld.game} is already loaded.",
                            add_as_failed_to_load=False)
             else:
-                importer = zipimport.zipimporter(apworld_source.resolved_path)
+                importer = APWorldImporter(apworld_source.resolved_path, apworld_caches[apworld_source.resolved_path])
                 world_name = Path(apworld.path).stem
 
                 spec = importer.find_spec(f"worlds.{world_name}")
                 apworld_module_specs[f"worlds.{world_name}"] = spec
+                apworld_importers[f"worlds.{world_name}"] = importer
 
                 apworld_source.load()
                 if apworld.game in AutoWorldRegister.world_types:
@@ -204,8 +547,50 @@ if apworlds:
 
 del apworlds
 
+if lazy_loading:
+    # list the games of the sources that had to be imported, so the next start can skip them
+    for world_source in loaded_sources:
+        module_name = f"worlds.{Path(world_source.path).stem}"
+        world_index[world_source.resolved_path] = {
+            "stamp": world_source.get_stamp(),
+            "games": {
+                game: {
+                    "world_version": world_type.world_version.as_simple_string(),
+                    "checksum": world_type.get_data_package_data()["checksum"],
+                    "settings_key": world_type.settings_key,
+                    "settings": get_world_settings_name(world_type),
+                }
+                for game, world_type in dict.items(AutoWorldRegister.world_types)
+                if world_type.__module__ == module_name or world_type.__module__.startswith(f"{module_name}.")
+            },
+        }
+    if loaded_sources:
+        current_sources = {world_source.resolved_path for world_source in world_sources}
+        write_world_index({path: entry for path, entry in world_index.items() if path in current_sources})
+
 # Build the data package for each game.
-network_data_package: DataPackage = {
-    "games": {world_name: world.get_data_package_data() for world_name, world in AutoWorldRegister.world_types.items()},
-}
+network_data_package: DataPackage
+if lazy_loading:
+    network_data_package = {"games": GamesPackages()}
+else:
+    network_data_package = {
+        "games": {world_name: world.get_data_package_data()
+                  for world_name, world in AutoWorldRegister.world_types.items()},
+    }
+
+
 
+def get_mapped_data_package() -> MappedDataPackage:
+    """
+    Returns the games of network_data_package as a memory mapped file, so processes share its name lookups.
+    The file is written to the cache once per combination of game checksums.
+    """
+    games = network_data_package["games"]
+    get_checksum = games.get_checksum if isinstance(games, GamesPackages) else lambda game: games[game]["checksum"]
+    key = hashlib.sha1(json.dumps([data_package_format_version, sorted(
+        (game, get_checksum(game)) for game in games)]).encode()).hexdigest()
+    path = cache_path("datapackage", f"{key}.apdp")
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_mapped_data_package(path, games)
+    return load_mapped_data_package(path)
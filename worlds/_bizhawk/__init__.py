@@ -8,6 +8,7 @@ naively passed to BizHawk without validation or modification.
 import asyncio
 import base64
 import enum
+import itertools
 import json
 import sys
 from typing import Any, Sequence
@@ -48,12 +49,22 @@ class BizHawkContext:
     connection_status: ConnectionStatus
     _lock: asyncio.Lock
     _port: int | None
+    _batch: list[tuple[list[dict[str, Any]], asyncio.Future[list[dict[str, Any]]]]]
+    """Request lists waiting to be sent together in the next message"""
+    _in_flight: dict[int, list[asyncio.Future[list[dict[str, Any]]]]]
+    """Futures of the request lists of sent messages by message id, waiting for their responses"""
+    _message_ids: itertools.count
+    _reader_task: asyncio.Task[None] | None
 
     def __init__(self) -> None:
         self.streams = None
         self.connection_status = ConnectionStatus.NOT_CONNECTED
         self._lock = asyncio.Lock()
         self._port = None
+        self._batch = []
+        self._in_flight = {}
+        self._message_ids = itertools.count(1)
+        self._reader_task = None
 
     async def _send_message(self, message: str):
         async with self._lock:
@@ -88,6 +99,89 @@ class BizHawkContext:
                 self.connection_status = ConnectionStatus.NOT_CONNECTED
                 raise RequestFailedError("Connection reset") from exc
 
+    async def _send_request_list(self, req_list: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Sends a list of requests and returns their responses.
+
+        Request lists sent during the same iteration of the event loop are batched into one message, and further
+        messages are sent without waiting for the responses of previous ones."""
+        if self.streams is None:
+            raise NotConnectedError("You tried to send a request before a connection to BizHawk was made")
+
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[list[dict[str, Any]]] = loop.create_future()
+        if not self._batch:
+            loop.call_soon(self._send_batch)
+        self._batch.append((req_list, future))
+
+        try:
+            return await asyncio.wait_for(future, timeout=5)
+        except asyncio.TimeoutError as exc:
+            error = RequestFailedError("Connection timed out")
+            self._close(error)
+            raise error from exc
+
+    def _send_batch(self) -> None:
+        batch, self._batch = self._batch, []
+        if self.streams is None:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(NotConnectedError("Connection to BizHawk was closed"))
+            return
+
+        reader, writer = self.streams
+        message_id = next(self._message_ids)
+        self._in_flight[message_id] = [future for _, future in batch]
+        message = {"id": message_id, "requests": [req_list for req_list, _ in batch]}
+        writer.write(json.dumps(message).encode("utf-8") + b"\n")
+        if self._reader_task is None:
+            self._reader_task = asyncio.create_task(self._receive_responses(reader), name="BizHawkReceive")
+
+    async def _receive_responses(self, reader: asyncio.StreamReader) -> None:
+        try:
+            while True:
+                res = await reader.readline()
+                if res == b"":
+                    raise RequestFailedError("Connection closed")
+
+                if self.connection_status == ConnectionStatus.TENTATIVE:
+                    self.connection_status = ConnectionStatus.CONNECTED
+
+                message = json.loads(res)
+                for future, responses in zip(self._in_flight.pop(message["id"], ()), message["responses"]):
+                    if not future.done():
+                        future.set_result(responses)
+        except ConnectionResetError:
+            self._close(RequestFailedError("Connection reset"))
+        except OSError as exc:
+            self._close(RequestFailedError(f"Connection failed: {exc}"))
+        except RequestFailedError as exc:
+            self._close(exc)
+        except (ValueError, KeyError) as exc:
+            self._close(SyncError(f"Received malformed message: {exc}"))
+        finally:
+            # let the next request start a new reader, even if this one ended in an unexpected way
+            if self._reader_task is asyncio.current_task():
+                self._reader_task = None
+
+    def _close(self, error: Exception) -> None:
+        """Closes the connection, failing every request waiting for a response with error."""
+        if self.streams is not None:
+            self.streams[1].close()
+            self.streams = None
+        self.connection_status = ConnectionStatus.NOT_CONNECTED
+
+        if self._reader_task is not None:
+            if self._reader_task is not asyncio.current_task():
+                self._reader_task.cancel()
+            self._reader_task = None
+        waiting = [future for _, future in self._batch]
+        waiting.extend(future for futures in self._in_flight.values() for future in futures)
+        self._batch.clear()
+        self._in_flight.clear()
+        for future in waiting:
+            if not future.done():
+                future.set_exception(error)
+
 
 async def connect(ctx: BizHawkContext) -> bool:
     """Attempts to establish a connection with a connector script. Returns True if successful."""
@@ -112,10 +206,7 @@ async def connect(ctx: BizHawkContext) -> bool:
 
 def disconnect(ctx: BizHawkContext) -> None:
     """Closes the connection to the connector script."""
-    if ctx.streams is not None:
-        ctx.streams[1].close()
-        ctx.streams = None
-    ctx.connection_status = ConnectionStatus.NOT_CONNECTED
+    ctx._close(NotConnectedError("Disconnected from BizHawk"))
 
 
 async def get_script_version(ctx: BizHawkContext) -> int:
@@ -125,8 +216,11 @@ async def get_script_version(ctx: BizHawkContext) -> int:
 async def send_requests(ctx: BizHawkContext, req_list: list[dict[str, Any]]) -> list[dict[str, Any]]:
     """Sends a list of requests to the BizHawk connector and returns their responses.
 
+    Requests sent concurrently, for example with `asyncio.gather`, are batched into a single message to the connector,
+    which processes them in the same frame. Each list still gets its own guards.
+
     It's likely you want to use the wrapper functions instead of this."""
-    responses = json.loads(await ctx._send_message(json.dumps(req_list)))
+    responses = await ctx._send_request_list(req_list)
     errors: list[ConnectorError] = []
 
     for response in responses:
@@ -19,7 +19,7 @@ from . import BizHawkContext, ConnectionStatus, NotConnectedError, RequestFailed
 from .client import BizHawkClient, AutoBizHawkClientRegister
 
 
-EXPECTED_SCRIPT_VERSION = 1
+EXPECTED_SCRIPT_VERSION = 2
 
 
 class AuthStatus(enum.IntEnum):
@@ -254,13 +254,16 @@ async def _game_watcher(ctx: BizHawkClientContext):
 
             showed_connecting_message = False
 
-            await ping(ctx.bizhawk_ctx)
+            # sent concurrently so they share one message to the connector
+            requests = [ping(ctx.bizhawk_ctx), get_hash(ctx.bizhawk_ctx)]
+            if ctx.client_handler is None:
+                requests.append(get_system(ctx.bizhawk_ctx))
+            _, rom_hash, *system = await asyncio.gather(*requests)
 
             if not showed_connected_message:
                 showed_connected_message = True
                 logger.info("Connected to BizHawk")
 
-            rom_hash = await get_hash(ctx.bizhawk_ctx)
             if ctx.rom_hash is not None and ctx.rom_hash != rom_hash:
                 if ctx.server is not None and not ctx.server.socket.closed:
                     logger.info(f"ROM changed. Disconnecting from server.")
@@ -273,7 +276,7 @@ async def _game_watcher(ctx: BizHawkClientContext):
             ctx.rom_hash = rom_hash
 
             if ctx.client_handler is None:
-                system = await get_system(ctx.bizhawk_ctx)
+                system = system[0] if system else await get_system(ctx.bizhawk_ctx)
                 ctx.client_handler = await AutoBizHawkClientRegister.get_handler(ctx, system)
 
                 if ctx.client_handler is None:
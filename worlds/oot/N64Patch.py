@@ -1,3 +1,4 @@
+import itertools
 import struct
 import io
 import array
@@ -7,67 +8,142 @@ import zipfile
 from .ntype import BigStream
 
 
-# get the next XOR key. Uses some location in the source rom.
-# This will skip of 0s, since if we hit a block of 0s, the
-# patch data will be raw.
-def key_next(rom, key_address, address_range):
-    key = 0
-    while key == 0:
-        key_address += 1
-        if key_address > address_range[1]:
-            key_address = address_range[0]
-        key = rom.original.buffer[key_address]
-    return key, key_address
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class XorKeys:
+    """
+    The XOR keys of a patch. These are the non-zero bytes of the original rom in the XOR range, used in order from
+    after the XOR address and wrapping around at the end of the range. Skipping 0s means that a block of 0s in the
+    source rom won't leave the patch data raw.
+    """
+
+    def __init__(self, rom, xor_address, xor_range):
+        region = bytes(memoryview(rom.original.buffer)[xor_range[0]:xor_range[1] + 1])
+        self.keys = region.replace(b"\x00", b"")
+        # the next key is the first non-zero byte after the XOR address
+        searched = xor_address + 1 - xor_range[0]
+        self.index = (searched - region.count(0, 0, searched)) % len(self.keys)
+
+    def peek(self, count):
+        keys = self.keys[self.index:self.index + count]
+        while len(keys) < count:
+            keys += self.keys[:count - len(keys)]
+        return keys
+
+    def skip(self, count):
+        self.index = (self.index + count) % len(self.keys)
+
+    def next(self):
+        key = self.keys[self.index]
+        self.skip(1)
+        return key
+
+
+# XORs the non-zero bytes of data with consecutive keys, leaving 0s as 0s.
+# Returns the result, and the index of the first non-zero byte that was equal to its key, or -1.
+def xor_non_zero(data, keys):
+    if np is not None:
+        return xor_non_zero_numpy(data, keys)
+    return xor_non_zero_python(data, keys)
+
+
+def xor_non_zero_numpy(data, keys):
+    data_array = np.frombuffer(data, dtype=np.uint8)
+    non_zero = np.flatnonzero(data_array)
+    xored = data_array[non_zero] ^ np.frombuffer(keys, dtype=np.uint8, count=non_zero.size)
+    result = data_array.copy()
+    result[non_zero] = xored
+    collisions = non_zero[xored == 0]
+    return result.tobytes(), int(collisions[0]) if collisions.size else -1
+
+
+def xor_non_zero_python(data, keys):
+    # spread the keys over the non-zero bytes, to XOR everything at once as big integers
+    runs = data.split(b"\x00")
+    ends = list(itertools.accumulate(map(len, runs)))
+    starts = [0] + ends[:-1]
+    spread_keys = b"\x00".join(map(keys.__getitem__, map(slice, starts, ends)))
+    xored = (int.from_bytes(data, "big") ^ int.from_bytes(spread_keys, "big")).to_bytes(len(data), "big")
+    if xored.count(0) == data.count(0):
+        return xored, -1
+    position = 0
+    for run in runs:
+        collision = xored.find(0, position, position + len(run))
+        if collision != -1:
+            return xored, collision
+        position += len(run) + 1
+    raise AssertionError("XOR result has more zero bytes than the data, but none of them is in a non-zero run")
 
 
 # creates a XOR block for the patch. This might break it up into
 # multiple smaller blocks if there is a concern about the XOR key
 # or if it is too long.
-def write_block(rom, xor_address, xor_range, block_start, data, patch_data):
-    new_data = []
+def write_block(keys, block_start, data, patch_data):
+    data = bytes(data)
+    new_data = bytearray()
     key_offset = 0
     continue_block = False
 
-    for b in data:
-        if b == 0:
-            # Leave 0s as 0s. Do not XOR
-            new_data += [0]
-        else:
-            # get the next XOR key
-            key, xor_address = key_next(rom, xor_address, xor_range)
-
-            # if the XOR would result in 0, change the key.
-            # This requires breaking up the block.
-            if b == key:
+    position = 0
+    # a byte XORs to 0 about every 255 bytes, so chunks are kept short after that happened
+    chunk_size = 0x100
+    while position < len(data):
+        # A block is broken when a byte would XOR to 0, or when a non-zero byte makes it 0xFFFF long.
+        # Only the last byte of the chunk can do the latter.
+        chunk_end = position + chunk_size
+        if len(new_data) < 0xFFFF:
+            chunk_end = min(chunk_end, position + 0xFFFF - len(new_data))
+        chunk = data[position:chunk_end]
+        non_zero_count = len(chunk) - chunk.count(0)
+        xored, collision = xor_non_zero(chunk, keys.peek(non_zero_count))
+
+        if collision == -1:
+            keys.skip(non_zero_count)
+            new_data += xored
+            position += len(chunk)
+            chunk_size *= 2
+            if len(new_data) == 0xFFFF and chunk[-1]:
                 write_block_section(block_start, key_offset, new_data, patch_data, continue_block)
-                new_data = []
+                new_data = bytearray()
                 key_offset = 0
                 continue_block = True
-
-                # search for next safe XOR key
-                while b == key:
-                    key_offset += 1
-                    key, xor_address = key_next(rom, xor_address, xor_range)
-                    # if we aren't able to find one quickly, we may need to break again
-                    if key_offset == 0xFF:
-                        write_block_section(block_start, key_offset, new_data, patch_data, continue_block)
-                        new_data = []
-                        key_offset = 0
-                        continue_block = True
-
-            # XOR the key with the byte
-            new_data += [b ^ key]
-
-            # Break the block if it's too long
-            if (len(new_data) == 0xFFFF):
+            continue
+
+        keys.skip(collision - chunk.count(0, 0, collision))
+        new_data += xored[:collision]
+        position += collision
+        chunk_size = 0x100
+
+        # if the XOR would result in 0, change the key.
+        # This requires breaking up the block.
+        b = data[position]
+        key = keys.next()
+        write_block_section(block_start, key_offset, new_data, patch_data, continue_block)
+        new_data = bytearray()
+        key_offset = 0
+        continue_block = True
+
+        # search for next safe XOR key
+        while b == key:
+            key_offset += 1
+            key = keys.next()
+            # if we aren't able to find one quickly, we may need to break again
+            if key_offset == 0xFF:
                 write_block_section(block_start, key_offset, new_data, patch_data, continue_block)
-                new_data = []
+                new_data = bytearray()
                 key_offset = 0
                 continue_block = True
 
+        # XOR the key with the byte
+        new_data.append(b ^ key)
+        position += 1
+
     # Save the block
     write_block_section(block_start, key_offset, new_data, patch_data, continue_block)
-    return xor_address
 
 
 # This saves a sub-block for the XOR block. If it's the first part
@@ -91,7 +167,7 @@ def create_patch_file(rom, rand, xor_range=(0x00B8AD30, 0x00F029A0)):
     dma_start, dma_end = rom.get_dma_table_range()
 
     # add header
-    patch_data = BigStream([])
+    patch_data = BigStream(bytearray())
     patch_data.append_bytes(list(map(ord, 'ZPFv1')))
     patch_data.append_int32(dma_start)
     patch_data.append_int32(xor_range[0])
@@ -101,6 +177,7 @@ def create_patch_file(rom, rand, xor_range=(0x00B8AD30, 0x00F029A0)):
     # doesn't have many sections of 0s
     xor_address = rand.randint(*xor_range)
     patch_data.append_int32(xor_address)
+    keys = XorKeys(rom, xor_address, xor_range)
 
     new_buffer = copy.copy(rom.original.buffer)
 
@@ -114,8 +191,7 @@ def create_patch_file(rom, rand, xor_range=(0x00B8AD30, 0x00F029A0)):
         # We don't trust files that have modified DMA to have their
         # changed addresses tracked correctly, so we invalidate the
         # entire file
-        for address in range(start, start + size):
-            rom.changed_address[address] = rom.buffer[address]
+        rom.changed_address.update(zip(range(start, start + size), rom.buffer[start:start + size]))
 
         # Simulate moving the files to know which addresses have changed
         if from_file >= 0:
@@ -132,37 +208,32 @@ def create_patch_file(rom, rand, xor_range=(0x00B8AD30, 0x00F029A0)):
 
     # filter down the addresses that will actually need to change.
     # Make sure to not include any of the DMA table addresses
+    force_patch = set(rom.force_patch)
     changed_addresses = [address for address,value in rom.changed_address.items() \
         if (address >= dma_end or address < dma_start) and \
-            (address in rom.force_patch or new_buffer[address] != value)]
+            (address in force_patch or new_buffer[address] != value)]
     changed_addresses.sort()
 
     # Write the address changes. We'll store the data with XOR so that
     # the patch data won't be raw data from the patched rom.
-    data = []
     block_start = None
+    block_end = None
     BLOCK_HEADER_SIZE = 7 # this is used to break up gaps
     for address in changed_addresses:
         # if there's a block to write and there's a gap, write it
-        if block_start:
-            block_end = block_start + len(data) - 1
-            if address > block_end + BLOCK_HEADER_SIZE:
-                xor_address = write_block(rom, xor_address, xor_range, block_start, data, patch_data)
-                data = []
-                block_start = None
-                block_end = None
+        if block_start is not None and address > block_end + BLOCK_HEADER_SIZE:
+            write_block(keys, block_start, rom.buffer[block_start:block_end+1], patch_data)
+            block_start = None
 
         # start a new block
-        if not block_start:
+        if block_start is None:
             block_start = address
-            block_end = address - 1             
-
-        # save the new data
-        data += rom.buffer[block_end+1:address+1]
+        # the block includes the unchanged bytes in between
+        block_end = address
 
     # if there was any left over blocks, write them out
-    if block_start:
-        xor_address = write_block(rom, xor_address, xor_range, block_start, data, patch_data)
+    if block_start is not None:
+        write_block(keys, block_start, rom.buffer[block_start:block_end+1], patch_data)
 
     # compress the patch file
     patch_data = bytes(patch_data.buffer)
@@ -199,6 +270,7 @@ def apply_patch_file(rom, file, sub_file=None):
     dma_start = patch_data.read_int32()
     xor_range = (patch_data.read_int32(), patch_data.read_int32())
     xor_address = patch_data.read_int32()
+    keys = XorKeys(rom, xor_address, xor_range)
 
     # Load all the DMA table updates. This will move the files around.
     # A key thing is that some of these entries will list a source file
@@ -248,19 +320,14 @@ def apply_patch_file(rom, file, sub_file=None):
             key_skip = patch_data.read_byte()
             block_size = patch_data.read_int16()
             # skip specified XOR keys
-            for _ in range(key_skip):
-                key, xor_address = key_next(rom, xor_address, xor_range)
-
-        # read in the new data
-        data = []
-        for b in patch_data.read_bytes(length=block_size):
-            if b == 0:
-                # keep 0s as 0s
-                data += [0]
-            else:
-                # The XOR will always be safe and will never produce 0
-                key, xor_address = key_next(rom, xor_address, xor_range)
-                data += [b ^ key]
+            keys.skip(key_skip)
+
+        # read in the new data, keeping 0s as 0s
+        # The XOR will always be safe and will never produce 0
+        block = bytes(patch_data.read_bytes(length=block_size))
+        non_zero_count = len(block) - block.count(0)
+        data, _ = xor_non_zero(block, keys.peek(non_zero_count))
+        keys.skip(non_zero_count)
 
         # Save the new data to rom
         rom.write_bytes(block_start, data)
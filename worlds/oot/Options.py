@@ -11,6 +11,7 @@ from .ColorSFXOptions import *
 class TrackRandomRange(Range):
     """Overrides normal from_any behavior to track whether the option was randomized at generation time."""
     supports_weighting = False
+    cacheable = False  # lists and dicts are rolled in from_any
     randomized: bool = False
 
     @classmethod
@@ -1,18 +1,61 @@
-import itertools
-from .ntype import BigStream, uint32
+import struct
 
-def calculate_crc(self):
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
-    t1 = t2 = t3 = t4 = t5 = t6 = 0xDF26F436
-    u32 = 0xFFFFFFFF
+from .ntype import uint32
+
+CRC_SEED = 0xDF26F436
+u32 = 0xFFFFFFFF
 
-    m1 = self.read_bytes(0x1000, 0x100000)
-    words = map(uint32.value, zip(m1[0::4], m1[1::4], m1[2::4], m1[3::4]))
 
+def calculate_crc(self):
+    m1 = self.read_bytes(0x1000, 0x100000)
     m2 = self.read_bytes(0x750, 0x100)
-    words2 = map(uint32.value, zip(m2[0::4], m2[1::4], m2[2::4], m2[3::4]))
+    if np is not None:
+        return calculate_crc_numpy(m1, m2)
+    return calculate_crc_python(m1, m2)
+
+
+def calculate_crc_numpy(m1, m2):
+    d = np.frombuffer(m1, dtype=">u4").astype(np.uint64)
+    d2 = np.resize(np.frombuffer(m2, dtype=">u4"), d.size).astype(np.uint64)
+
+    # t6 is the running sum, t4 counts how often it overflowed
+    sums = np.cumsum(d) + CRC_SEED
+    t6s = sums & u32
+    t6 = int(t6s[-1])
+    t4 = CRC_SEED + int(sums[-1] >> 32)
+    t3 = CRC_SEED ^ int(np.bitwise_xor.reduce(d))
+    shift = d & 0x1F
+    r = ((d << shift) | (d >> (32 - shift))) & u32
+    # only the lower 32 bits of the sums are kept, which can't overflow in uint64 for 2^18 words
+    t5 = CRC_SEED + int(r.sum())
+    t1 = CRC_SEED + int((d2 ^ d).sum())
+
+    # t2 depends on its own value in each step
+    t2 = CRC_SEED
+    for word, rotated, mixed in zip(d.tolist(), r.tolist(), (t6s ^ d).tolist()):
+        if t2 > word:
+            t2 ^= rotated
+        else:
+            t2 ^= mixed
+
+    crc0 = (t6 ^ t4 ^ t3) & u32
+    crc1 = (t5 ^ t2 ^ t1) & u32
+
+    return uint32.bytes(crc0) + uint32.bytes(crc1)
+
+
+def calculate_crc_python(m1, m2):
+    t1 = t2 = t3 = t4 = t5 = t6 = CRC_SEED
+
+    words = struct.unpack(f">{len(m1) // 4}I", m1)
+    words2 = struct.unpack(f">{len(m2) // 4}I", m2)
 
-    for d, d2 in zip(words, itertools.cycle(words2)):
+    for index, d in enumerate(words):
         # keep t2 and t6 in u32 for comparisons; others can wait to be truncated
         if ((t6 + d) & u32) < t6:
             t4 += 1
@@ -28,9 +71,9 @@ def calculate_crc(self):
         else:
             t2 ^= t6 ^ d
 
-        t1 += d2 ^ d
+        t1 += words2[index % len(words2)] ^ d
 
     crc0 = (t6 ^ t4 ^ t3) & u32
     crc1 = (t5 ^ t2 ^ t1) & u32
 
-    return uint32.bytes(crc0) + uint32.bytes(crc1)
\ No newline at end of file
+    return uint32.bytes(crc0) + uint32.bytes(crc1)
@@ -0,0 +1,19 @@
+import random
+import unittest
+from unittest import mock
+
+from worlds.oot import crc
+from worlds.oot.ntype import BigStream
+
+
+class TestCRC(unittest.TestCase):
+    def test_crc(self) -> None:
+        """Ensure the CRC stays the same as calculated word by word before, with and without numpy."""
+        random_rom = bytearray(random.Random(0).randbytes(0x101000))
+        # the running sum overflows with every word
+        overflowing_rom = bytearray(random.Random(2).randbytes(0x101000))
+        overflowing_rom[0x1000:0x101000] = b"\xFF" * 0x100000
+        for np in (crc.np, None):
+            with self.subTest(numpy=np is not None), mock.patch.object(crc, "np", np):
+                self.assertEqual(bytes(crc.calculate_crc(BigStream(random_rom))).hex(), "7f2a58983b5dafca")
+                self.assertEqual(bytes(crc.calculate_crc(BigStream(overflowing_rom))).hex(), "df2ef4364259b436")
@@ -0,0 +1,73 @@
+import hashlib
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+from worlds.oot import N64Patch
+from worlds.oot.ntype import BigStream
+
+xor_range = (0x1000, 0x1FFF)
+
+
+class PatchRom(BigStream):
+    """The parts of Rom used by patches, without needing a base rom."""
+    original: "PatchRom"
+
+    def __init__(self, buffer: bytearray) -> None:
+        super().__init__(buffer)
+        self.changed_address = {}
+        self.changed_dma = {}
+        self.force_patch = []
+
+    def get_dma_table_range(self):
+        return 0x10, 0x20
+
+    def write_bytes(self, address, values):
+        super().write_bytes(address, values)
+        self.changed_address.update(zip(range(address, address + len(values)), values))
+
+
+def make_rom() -> PatchRom:
+    rng = random.Random(0)
+    original = PatchRom(bytearray(rng.randbytes(0x40000)))
+    # 0s that are skipped as keys, and repeated keys that the data has to break blocks for
+    original.buffer[0x1100:0x1180] = bytes(0x80)
+    original.buffer[0x1800:0x1A00] = b"\x42" * 0x200
+    rom = PatchRom(bytearray(original.buffer))
+    rom.original = original
+    for start in range(0x2000, 0x20000, 0x1800):
+        rom.write_bytes(start, bytes(rng.choice((0, 0x42, rng.randrange(0x100))) for _ in range(0x400)))
+    # longer than a block can be, with 0s where it would be split
+    long_block = bytearray(rng.randbytes(0x18000))
+    long_block[0xFFF0:0x10000] = bytes(0x10)
+    rom.write_bytes(0x20000, long_block)
+    rom.force_patch.append(0x30)
+    return rom
+
+
+class TestPatch(unittest.TestCase):
+    # created byte by byte, before XOR blocks were created from whole buffers
+    expected_sha1 = "670ebb2d700a314b1700f6499cb54e73cd80a1f7"
+
+    def test_create(self) -> None:
+        """Ensure created patches stay the same, with and without numpy."""
+        for np in (N64Patch.np, None):
+            with self.subTest(numpy=np is not None), mock.patch.object(N64Patch, "np", np):
+                patch = N64Patch.create_patch_file(make_rom(), random.Random(0), xor_range)
+                self.assertEqual(hashlib.sha1(patch).hexdigest(), self.expected_sha1)
+
+    def test_apply(self) -> None:
+        """Ensure applying a patch to the original rom recreates the patched rom, with and without numpy."""
+        rom = make_rom()
+        with tempfile.TemporaryDirectory() as directory:
+            patch_path = os.path.join(directory, "patch.zpf")
+            with open(patch_path, "wb") as patch_file:
+                patch_file.write(N64Patch.create_patch_file(rom, random.Random(0), xor_range))
+            for np in (N64Patch.np, None):
+                with self.subTest(numpy=np is not None), mock.patch.object(N64Patch, "np", np):
+                    patched = PatchRom(bytearray(rom.original.buffer))
+                    patched.original = rom.original
+                    N64Patch.apply_patch_file(patched, patch_path)
+                    self.assertEqual(patched.buffer, rom.buffer)
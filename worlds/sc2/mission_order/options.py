@@ -98,6 +98,7 @@ class CustomMissionOrder(OptionDict):
     """
     display_name = "Custom Mission Order"
     visibility = Visibility.template
+    cacheable = False  # random-range values are rolled on creation
     value: Dict[str, Dict[str, Any]]
     default = {
         "Default Campaign": {